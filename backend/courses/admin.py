@@ -0,0 +1,16 @@
+from django.contrib import admin
+from .models import Course, CourseAlias
+
+
+class CourseAliasInline(admin.TabularInline):
+    model = CourseAlias
+    extra = 1
+
+
+@admin.register(Course)
+class CourseAdmin(admin.ModelAdmin):
+    list_display = ['name', 'key', 'created_at']
+    search_fields = ['name', 'key', 'aliases__name']
+    readonly_fields = ['key', 'created_at']
+    ordering = ['name']
+    inlines = [CourseAliasInline]
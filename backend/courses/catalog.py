@@ -0,0 +1,122 @@
+"""
+课程目录
+
+教师的“主讲课程”和资源的“相关课程”都是自由文本，只能做子串扫描，也无法互相
+关联。这里把其中的课程名解析为 Course（先按规范化名称查别名，再查课程，都找
+不到时新建），教师通过多对多、资源通过外键关联到课程：按课程精确或前缀查找走
+key 列上的唯一索引，“某位老师所授课程的资源”也变成一次连接查询。
+
+原文本字段保持不变，关联由保存时的信号和批量导入维护；别名修改后或首次部署时
+运行 ``python manage.py backfill_courses`` 按现有文本重新关联。
+"""
+from django.db.models import Q
+
+from xuanwu_backend.bulk import chunked
+
+from .models import Course, CourseAlias
+from .names import clean, normalize, split
+
+# 前缀查询的上界：任何以 prefix 开头的字符串都小于 prefix + _MAX_CHAR
+_MAX_CHAR = '\U0010ffff'
+
+
+def resolve(names):
+    """
+    把课程名解析为课程ID，返回 {规范化名称: course_id}
+
+    别名优先于同名课程，这样把某种写法设为别名后它就归入别名指向的课程。不存在的
+    课程被创建（并发创建同名课程时以先写入的为准）。
+    """
+    wanted = {}
+    for name in names:
+        name = clean(name)
+        key = normalize(name)
+        if key:
+            wanted.setdefault(key, name)
+    if not wanted:
+        return {}
+
+    ids = {}
+    for chunk in chunked(wanted):
+        ids.update(Course.objects.filter(key__in=chunk).values_list('key', 'id'))
+        ids.update(CourseAlias.objects.filter(key__in=chunk).values_list('key', 'course_id'))
+    missing = [key for key in wanted if key not in ids]
+    if missing:
+        Course.objects.bulk_create([Course(name=wanted[key], key=key) for key in missing], ignore_conflicts=True)
+        for chunk in chunked(missing):
+            ids.update(Course.objects.filter(key__in=chunk).values_list('key', 'id'))
+    return ids
+
+
+def search(text, exact=False):
+    """
+    名称（或别名）与 text 相同（exact=True）或以 text 开头的课程
+
+    前缀匹配写成 key 上的范围条件而不是 startswith：SQLite 的 LIKE 默认不区分
+    大小写，用不上普通索引，范围条件可以。
+    """
+    key = normalize(text)
+    if not key:
+        return Course.objects.none()
+    if exact:
+        lookup = {'key': key}
+    else:
+        lookup = {'key__gte': key, 'key__lt': key + _MAX_CHAR}
+    return Course.objects.filter(Q(**lookup) | Q(pk__in=CourseAlias.objects.filter(**lookup).values('course_id')))
+
+
+def teacher_ids(courses):
+    """讲授 courses（课程查询集）中任一课程的教师ID，作为子查询使用"""
+    from ratings.models import Teacher
+    return Teacher.catalog_courses.through.objects.filter(course__in=courses).values('teacher_id')
+
+
+def course_ids(teacher_id):
+    """教师所授课程的ID，作为子查询使用"""
+    from ratings.models import Teacher
+    return Teacher.catalog_courses.through.objects.filter(teacher_id=teacher_id).values('course_id')
+
+
+def link_teachers(teachers):
+    """按“主讲课程”文本重建一组教师与课程的关联"""
+    from ratings.models import Teacher
+
+    teachers = [teacher for teacher in teachers if teacher.pk is not None]
+    if not teachers:
+        return
+    names = {teacher.pk: split(teacher.courses) for teacher in teachers}
+    ids = resolve(name for teacher_names in names.values() for name in teacher_names)
+
+    Through = Teacher.catalog_courses.through
+    for chunk in chunked(names):
+        Through.objects.filter(teacher_id__in=chunk).delete()
+    Through.objects.bulk_create([
+        Through(teacher_id=teacher_id, course_id=course_id)
+        for teacher_id, teacher_names in names.items()
+        for course_id in dict.fromkeys(ids[normalize(name)] for name in teacher_names)
+    ], ignore_conflicts=True)
+
+
+def link_resources(resources):
+    """按“相关课程”文本设置一组资源的 catalog_course"""
+    from resources.models import Resource
+
+    resources = [resource for resource in resources if resource.pk is not None]
+    if not resources:
+        return
+    ids = resolve(resource.course for resource in resources)
+    changed = []
+    for resource in resources:
+        course_id = ids.get(normalize(resource.course))
+        if resource.catalog_course_id != course_id:
+            resource.catalog_course_id = course_id
+            changed.append(resource)
+    Resource.objects.bulk_update(changed, ['catalog_course'])
+
+
+def prune():
+    """删除没有教师、资源和别名引用的课程，返回删除的数量"""
+    _, deleted = Course.objects.filter(
+        teachers__isnull=True, resources__isnull=True, aliases__isnull=True
+    ).delete()
+    return deleted.get(Course._meta.label, 0)
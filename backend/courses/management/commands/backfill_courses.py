@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from courses import catalog
+from ratings.models import Teacher
+from resources.models import Resource
+from xuanwu_backend.bulk import CHUNK_SIZE, chunked
+
+
+class Command(BaseCommand):
+    help = '解析教师的“主讲课程”和资源的“相关课程”，重建它们与课程目录的关联'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=CHUNK_SIZE, help='每批处理的记录数')
+        parser.add_argument('--prune', action='store_true', help='删除不再被引用且没有别名的课程')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        teachers = self._link(Teacher.objects.only('id', 'courses'), catalog.link_teachers, batch_size)
+        resources = self._link(Resource.objects.only('id', 'course', 'catalog_course'), catalog.link_resources, batch_size)
+        self.stdout.write(self.style.SUCCESS(f'已关联 {teachers} 位教师、{resources} 个资源'))
+        if options['prune']:
+            self.stdout.write(self.style.SUCCESS(f'已删除 {catalog.prune()} 门无引用的课程'))
+
+    def _link(self, queryset, link, batch_size):
+        total = 0
+        for chunk in chunked(queryset.order_by('pk').iterator(chunk_size=batch_size), batch_size):
+            with transaction.atomic():
+                link(chunk)
+            total += len(chunk)
+        return total
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.27 on 2026-10-17 22:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Course',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='课程名称')),
+                ('key', models.CharField(editable=False, max_length=100, unique=True, verbose_name='规范化名称')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '课程',
+                'verbose_name_plural': '课程',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CourseAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='新增或修改别名后运行 backfill_courses 重新关联已有的教师和资源', max_length=100, verbose_name='别名')),
+                ('key', models.CharField(editable=False, max_length=100, unique=True, verbose_name='规范化名称')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='courses.course', verbose_name='课程')),
+            ],
+            options={
+                'verbose_name': '课程别名',
+                'verbose_name_plural': '课程别名',
+                'ordering': ['course', 'name'],
+            },
+        ),
+    ]
@@ -0,0 +1,65 @@
+from django.core.exceptions import ValidationError
+from django.db import models
+
+from .names import normalize
+
+
+class Course(models.Model):
+    """课程"""
+    name = models.CharField(max_length=100, verbose_name="课程名称")
+    key = models.CharField(max_length=100, unique=True, editable=False, verbose_name="规范化名称")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
+    
+    class Meta:
+        verbose_name = "课程"
+        verbose_name_plural = "课程"
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+    
+    def clean(self):
+        self.key = normalize(self.name)
+        if not self.key:
+            raise ValidationError({'name': '名称不能为空'})
+        if type(self).objects.filter(key=self.key).exclude(pk=self.pk).exists():
+            raise ValidationError({'name': f'已存在同名的{self._meta.verbose_name}'})
+    
+    def save(self, *args, **kwargs):
+        self.key = normalize(self.name)
+        super().save(*args, **kwargs)
+
+
+class CourseAlias(models.Model):
+    """课程别名（同一课程的其他写法，如简称、旧名）"""
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='aliases',
+        verbose_name="课程"
+    )
+    name = models.CharField(
+        max_length=100,
+        verbose_name="别名",
+        help_text="新增或修改别名后运行 backfill_courses 重新关联已有的教师和资源"
+    )
+    key = models.CharField(max_length=100, unique=True, editable=False, verbose_name="规范化名称")
+    
+    class Meta:
+        verbose_name = "课程别名"
+        verbose_name_plural = "课程别名"
+        ordering = ['course', 'name']
+    
+    def __str__(self):
+        return f"{self.name} -> {self.course.name}"
+    
+    def clean(self):
+        self.key = normalize(self.name)
+        if not self.key:
+            raise ValidationError({'name': '名称不能为空'})
+        if type(self).objects.filter(key=self.key).exclude(pk=self.pk).exists():
+            raise ValidationError({'name': f'已存在同名的{self._meta.verbose_name}'})
+    
+    def save(self, *args, **kwargs):
+        self.key = normalize(self.name)
+        super().save(*args, **kwargs)
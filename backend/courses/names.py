@@ -0,0 +1,39 @@
+"""
+课程名称的规范化和拆分
+
+同一门课在不同地方写法不一：全角/半角、大小写、多余空格、书名号。规范化后的
+名称（key）用于唯一约束和索引查找；教师的“主讲课程”是自由文本，按常见分隔符
+拆成单独的课程名。
+"""
+import re
+import unicodedata
+
+# 课程名称的最大长度（与 Course.name 一致），更长的片段不视为课程名
+MAX_NAME_LENGTH = 100
+
+_SEPARATORS = re.compile(r'[,、;\n|]+')
+_QUOTES = '《》〈〉"\'“”‘’「」'
+
+
+def normalize(name):
+    """规范化课程名称：NFKC（全角转半角）、去掉空白和首尾书名号/引号、小写"""
+    name = unicodedata.normalize('NFKC', name or '')
+    return ''.join(name.split()).strip(_QUOTES).casefold()
+
+
+def clean(name):
+    """展示用的课程名称：NFKC、合并空白、去掉首尾书名号/引号"""
+    name = unicodedata.normalize('NFKC', name or '')
+    return ' '.join(name.split()).strip(_QUOTES).strip()
+
+
+def split(text):
+    """把“主讲课程”等自由文本拆成课程名列表（按规范化名称去重，保持原顺序）"""
+    names = {}
+    # NFKC first so full-width separators (，；) split too
+    for part in _SEPARATORS.split(unicodedata.normalize('NFKC', text or '')):
+        name = clean(part)
+        key = normalize(name)
+        if key and len(name) <= MAX_NAME_LENGTH:
+            names.setdefault(key, name)
+    return list(names.values())
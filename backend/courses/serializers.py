@@ -0,0 +1,21 @@
+from rest_framework import serializers
+from .models import Course
+
+
+class CourseSerializer(serializers.ModelSerializer):
+    """课程序列化器"""
+    aliases = serializers.SlugRelatedField(many=True, read_only=True, slug_field='name')
+    
+    class Meta:
+        model = Course
+        fields = ('id', 'name', 'aliases')
+        read_only_fields = ('id', 'name')
+
+
+class CourseBriefSerializer(serializers.ModelSerializer):
+    """课程序列化器（简化版，用于教师详情等）"""
+    
+    class Meta:
+        model = Course
+        fields = ('id', 'name')
+        read_only_fields = ('id', 'name')
@@ -0,0 +1,24 @@
+from rest_framework import viewsets, permissions
+from .models import Course
+from .serializers import CourseSerializer
+from . import catalog
+
+
+class CourseViewSet(viewsets.ReadOnlyModelViewSet):
+    """课程目录视图集"""
+    queryset = Course.objects.prefetch_related('aliases')
+    serializer_class = CourseSerializer
+    permission_classes = [permissions.AllowAny]
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        
+        # Exact (?name=) or prefix (?search=) match on the name or an alias
+        name = self.request.query_params.get('name')
+        if name:
+            queryset = queryset & catalog.search(name, exact=True)
+        search = self.request.query_params.get('search')
+        if search:
+            queryset = queryset & catalog.search(search)
+        
+        return queryset
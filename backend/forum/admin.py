@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Category, Post, Comment, Like
+from .models import Category, Post, Comment, Like, PostImage, ArchivedPost
+from . import counters, images, moderation
 
 
 @admin.register(Category)
@@ -16,8 +17,10 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ['category', 'is_pinned', 'is_locked', 'created_at']
     search_fields = ['title', 'content', 'author__username']
     list_editable = ['is_pinned', 'is_locked']
-    readonly_fields = ['view_count', 'created_at', 'updated_at']
+    readonly_fields = ['view_count', 'comment_count', 'like_count', 'last_activity_at',
+                       'created_at', 'updated_at']
     ordering = ['-created_at']
+    actions = ['pin_posts', 'unpin_posts', 'lock_posts', 'unlock_posts']
     
     fieldsets = (
         ('基本信息', {
@@ -27,19 +30,62 @@ class PostAdmin(admin.ModelAdmin):
             'fields': ('images', 'is_pinned', 'is_locked')
         }),
         ('统计信息', {
-            'fields': ('view_count', 'created_at', 'updated_at'),
+            'fields': ('view_count', 'comment_count', 'like_count', 'last_activity_at',
+                       'created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
     )
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if not change:
+            counters.post_created(obj)
+        elif 'category' in form.changed_data:
+            old_category = form.initial.get('category')
+            counters.posts_deleted([old_category, obj.category_id])
+    
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        counters.posts_deleted([obj.category_id])
+    
+    def delete_queryset(self, request, queryset):
+        moderation.delete_posts(list(queryset.values_list('pk', flat=True)))
+    
+    def _update_flags(self, request, queryset, action, label):
+        updated = moderation.update_posts(list(queryset.values_list('pk', flat=True)), action)
+        self.message_user(request, f'已{label} {updated} 个帖子')
+    
+    @admin.action(description='置顶所选帖子')
+    def pin_posts(self, request, queryset):
+        self._update_flags(request, queryset, 'pin', '置顶')
+    
+    @admin.action(description='取消置顶所选帖子')
+    def unpin_posts(self, request, queryset):
+        self._update_flags(request, queryset, 'unpin', '取消置顶')
+    
+    @admin.action(description='锁定所选帖子')
+    def lock_posts(self, request, queryset):
+        self._update_flags(request, queryset, 'lock', '锁定')
+    
+    @admin.action(description='解除锁定所选帖子')
+    def unlock_posts(self, request, queryset):
+        self._update_flags(request, queryset, 'unlock', '解除锁定')
 
 
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
-    list_display = ['__str__', 'post', 'author', 'parent', 'created_at']
+    list_display = ['__str__', 'post', 'author', 'parent', 'like_count', 'created_at']
     list_filter = ['created_at']
     search_fields = ['content', 'author__username', 'post__title']
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['like_count', 'created_at', 'updated_at']
     ordering = ['-created_at']
+    
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        counters.comments_deleted([obj.post_id])
+    
+    def delete_queryset(self, request, queryset):
+        moderation.delete_comments(list(queryset.values_list('pk', flat=True)))
 
 
 @admin.register(Like)
@@ -49,3 +95,52 @@ class LikeAdmin(admin.ModelAdmin):
     search_fields = ['user__username']
     readonly_fields = ['created_at']
     ordering = ['-created_at']
+    
+    def delete_model(self, request, obj):
+        target = obj.content_object
+        super().delete_model(request, obj)
+        if target is not None:
+            counters.like_changed(target, -1)
+    
+    def delete_queryset(self, request, queryset):
+        targets = list(queryset.values_list('content_type__model', 'object_id'))
+        super().delete_queryset(request, queryset)
+        counters.refresh_counters(
+            post_ids=[object_id for model, object_id in targets if model == 'post'],
+            comment_ids=[object_id for model, object_id in targets if model == 'comment']
+        )
+
+
+@admin.register(PostImage)
+class PostImageAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'width', 'height', 'size', 'status', 'uploader', 'created_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['sha256', 'uploader__username']
+    readonly_fields = ['sha256', 'width', 'height', 'size', 'thumbnails', 'status', 'created_at']
+    ordering = ['-created_at']
+    actions = ['regenerate_thumbnails']
+    
+    @admin.action(description='重新生成缩略图')
+    def regenerate_thumbnails(self, request, queryset):
+        for image_id in queryset.values_list('id', flat=True):
+            images.schedule_thumbnails(image_id)
+        self.message_user(request, f'已提交 {queryset.count()} 张图片的缩略图生成任务')
+
+
+@admin.register(ArchivedPost)
+class ArchivedPostAdmin(admin.ModelAdmin):
+    list_display = ['title', 'author', 'category', 'created_at', 'last_activity_at', 'archived_at']
+    list_filter = ['category', 'archived_at']
+    search_fields = ['title', 'author__username']
+    exclude = ['data']
+    readonly_fields = ['id', 'title', 'author', 'category', 'created_at', 'last_activity_at', 'archived_at']
+    ordering = ['-archived_at']
+    
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        counters.posts_deleted([obj.category_id])
+    
+    def delete_queryset(self, request, queryset):
+        category_ids = set(queryset.values_list('category_id', flat=True))
+        super().delete_queryset(request, queryset)
+        counters.posts_deleted(category_ids)
@@ -5,3 +5,6 @@ class ForumConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'forum'
     verbose_name = '论坛'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,139 @@
+"""
+旧帖子归档
+
+长期没有新评论的帖子整体移入 ArchivedPost：帖子详情（含评论树和点赞数）按匿名
+视角预先渲染为 JSON，压缩后保存为一行，随后从帖子、评论、点赞表和全文索引中
+删除。热数据表和索引因此只保留近期帖子；归档帖子仍可通过原来的详情URL只读访问。
+
+渲染结果中的图片和头像保存为相对路径，点赞用户ID另存一份：读取时按当前请求
+补全为绝对URL并计算当前用户的 is_liked，与未归档帖子的详情格式一致。
+"""
+import zlib
+from collections import defaultdict
+from datetime import timedelta
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from xuanwu_backend.bulk import chunked
+
+from .models import ArchivedPost, Post, Comment, Like
+from .serializers import PostDetailSerializer
+from . import moderation
+
+# 压缩级别：归档只写一次、偶尔读取，取较高压缩率
+COMPRESSION_LEVEL = 9
+
+
+def archivable(days):
+    """最后活跃时间早于 days 天前、且未置顶的帖子"""
+    cutoff = timezone.now() - timedelta(days=days)
+    return Post.objects.filter(last_activity_at__lt=cutoff, is_pinned=False)
+
+
+# 保存点赞用户ID的键，读取时移除
+_LIKERS = '_likers'
+
+
+def _likers(posts):
+    """{(content_type_id, object_id): [用户ID, ...]}，涵盖这些帖子及其评论"""
+    post_type = ContentType.objects.get_for_model(Post)
+    comment_type = ContentType.objects.get_for_model(Comment)
+    post_ids = [post.id for post in posts]
+    likers = defaultdict(list)
+    for likes in (
+        Like.objects.filter(content_type=post_type, object_id__in=post_ids),
+        Like.objects.filter(
+            content_type=comment_type,
+            object_id__in=Comment.objects.filter(post_id__in=post_ids).values('pk')
+        ),
+    ):
+        for content_type_id, object_id, user_id in likes.values_list('content_type_id', 'object_id', 'user_id'):
+            likers[(content_type_id, object_id)].append(user_id)
+    return likers
+
+
+def _render(post, likers):
+    # Rendered without a request: media URLs stay relative and load() absolutizes them
+    data = PostDetailSerializer(post).data
+    data['is_archived'] = True
+    post_type = ContentType.objects.get_for_model(Post)
+    comment_type = ContentType.objects.get_for_model(Comment)
+    data[_LIKERS] = {
+        'post': likers.get((post_type.id, post.id), []),
+        'comments': {
+            str(comment['id']): likers[(comment_type.id, comment['id'])]
+            for comment in _comments(data) if (comment_type.id, comment['id']) in likers
+        },
+    }
+    return zlib.compress(JSONRenderer().render(data), COMPRESSION_LEVEL)
+
+
+def _comments(data):
+    """详情数据中的全部评论（含各层回复）"""
+    for comment in data['comments']:
+        yield comment
+        yield from comment['replies']
+
+
+def archive_posts(post_ids, batch_size=100):
+    """归档一组帖子，返回 {'posts': n, 'comments': n}"""
+    archived = {'posts': 0, 'comments': 0}
+    for chunk in chunked(post_ids, batch_size):
+        with transaction.atomic():
+            posts = list(Post.objects.filter(pk__in=chunk).select_related('author', 'category'))
+            likers = _likers(posts)
+            ArchivedPost.objects.bulk_create([
+                ArchivedPost(
+                    id=post.id,
+                    title=post.title,
+                    author_id=post.author_id,
+                    category_id=post.category_id,
+                    data=_render(post, likers),
+                    created_at=post.created_at,
+                    last_activity_at=post.last_activity_at,
+                )
+                for post in posts
+            ])
+            deleted = moderation.delete_posts([post.id for post in posts])
+        archived['posts'] += deleted['posts']
+        archived['comments'] += deleted['comments']
+    return archived
+
+
+def _absolute(url, request):
+    return request.build_absolute_uri(url) if url and request is not None else url
+
+
+def _absolutize_user(user, request):
+    if user:
+        user['avatar'] = _absolute(user.get('avatar'), request)
+
+
+def load(pk, request=None):
+    """
+    归档帖子的详情数据，不存在时返回 None
+
+    图片和头像按 request 补全为绝对URL，is_liked 按 request 的用户计算。
+    """
+    archived = ArchivedPost.objects.filter(pk=pk).only('data').first()
+    if archived is None:
+        return None
+    data = archived.payload
+    # Archives written before likers were kept have none; nobody is shown as liking them
+    likers = data.pop(_LIKERS, {'post': [], 'comments': {}})
+    user = getattr(request, 'user', None)
+    user_id = user.pk if user is not None and user.is_authenticated else None
+
+    _absolutize_user(data.get('author'), request)
+    data['is_liked'] = user_id is not None and user_id in likers['post']
+    for image in data.get('images', []):
+        image['url'] = _absolute(image['url'], request)
+        image['original'] = _absolute(image['original'], request)
+        image['thumbnails'] = {name: _absolute(url, request) for name, url in image['thumbnails'].items()}
+    for comment in _comments(data):
+        _absolutize_user(comment.get('author'), request)
+        comment['is_liked'] = user_id is not None and user_id in likers['comments'].get(str(comment['id']), ())
+    return data
@@ -0,0 +1,96 @@
+"""
+帖子实时事件的发布/订阅
+
+写路径（发表评论、点赞）在事务提交后向 ``post:<id>`` 频道发布增量事件，
+SSE 连接订阅对应频道把事件推给客户端，客户端不必反复轮询整棵评论树。
+
+默认的 InProcessBroker 只在当前进程内分发，适合单进程部署；多进程部署时
+可通过 ``FORUM_STREAM_BROKER`` 换成实现了相同 publish/subscribe 接口的
+跨进程消息代理。
+"""
+import asyncio
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+class InProcessBroker:
+    """进程内的发布/订阅，publish 可在任意线程调用"""
+
+    # 单个订阅者积压的事件上限，超出时丢弃新事件（客户端可重新拉取详情补齐）
+    queue_size = 100
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(self._deliver, queue, event)
+
+    @staticmethod
+    def _deliver(queue, event):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+    async def subscribe(self, channel, heartbeat=15, lifetime=None):
+        """
+        异步迭代频道中的事件
+
+        超过 ``heartbeat`` 秒没有事件时产出 None，调用方可借此发送心跳。``lifetime``
+        秒后迭代结束、订阅被移除（None 表示不限）：ASGI 服务器不一定会通知客户端
+        已断开，限定时长可以保证断开的连接最终被回收。
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if lifetime is None else loop.time() + lifetime
+        subscriber = (loop, asyncio.Queue(self.queue_size))
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscriber)
+        try:
+            while True:
+                timeout = heartbeat
+                if deadline is not None:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        return
+                    timeout = min(timeout, remaining)
+                try:
+                    yield await asyncio.wait_for(subscriber[1].get(), timeout)
+                except asyncio.TimeoutError:
+                    if deadline is None or loop.time() < deadline:
+                        yield None
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(channel)
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscribers.get(channel, ()))
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.FORUM_STREAM_BROKER)()
+    return _broker
+
+
+def post_channel(post_id):
+    return f'post:{post_id}'
+
+
+def publish_post_event(post_id, event):
+    """事务提交后向帖子频道发布事件"""
+    transaction.on_commit(lambda: get_broker().publish(post_channel(post_id), event))
@@ -0,0 +1,130 @@
+"""
+论坛计数器维护
+
+Post.comment_count / Post.like_count / Post.last_activity_at 和 Comment.like_count
+是冗余存储的字段，所有写路径都通过这里的函数以 F() 表达式原子更新，
+避免列表页逐行 COUNT(*)。浏览次数则通过写回缓冲批量累加。计数变化后同步
+重算相关帖子的热度（见 ranking）。分类的帖子数、今日帖子数和最新帖子存放在
+CategoryStats 中，随发帖/删帖更新（帖子数包含已归档的帖子）。
+"""
+from datetime import datetime, time
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Case, Count, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from xuanwu_backend.buffers import WriteBehindCounter
+from .models import ArchivedPost, Category, CategoryStats, Post, Comment, Like
+from .ranking import refresh_hot_scores
+
+
+# 帖子浏览次数缓冲：每个刷写周期对每个帖子只产生一次写入
+view_counter = WriteBehindCounter(
+    Post, 'view_count', settings.FORUM_VIEW_COUNT_FLUSH_INTERVAL, on_write=refresh_hot_scores
+)
+
+
+def _count_subquery(queryset, field):
+    """按外键分组计数的相关子查询，没有记录时返回 0"""
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(
+        c=Count('pk')
+    ).values('c')
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def comment_created(comment):
+    """新评论：帖子评论数 +1 并刷新最后活跃时间"""
+    Post.objects.filter(pk=comment.post_id).update(
+        comment_count=F('comment_count') + 1,
+        last_activity_at=timezone.now()
+    )
+    refresh_hot_scores([comment.post_id])
+
+
+def comments_deleted(post_ids):
+    """
+    评论删除后重新统计评论数
+
+    删除一条评论会级联删除它的所有回复，因此直接按剩余评论重算，
+    用一条 UPDATE ... SET comment_count = (SELECT COUNT(*) ...) 完成。
+    """
+    Post.objects.filter(pk__in=post_ids).update(
+        comment_count=_count_subquery(Comment.objects.all(), 'post')
+    )
+    refresh_hot_scores(post_ids)
+
+
+def like_changed(obj, delta):
+    """点赞/取消点赞后调整对应帖子或评论的点赞数"""
+    type(obj).objects.filter(pk=obj.pk).update(like_count=F('like_count') + delta)
+    if isinstance(obj, Post):
+        refresh_hot_scores([obj.pk])
+
+
+def refresh_counters(post_ids=None, comment_ids=None):
+    """从明细表重算计数器，用于后台删除等绕过上述函数的写路径"""
+    posts = Post.objects.all()
+    comments = Comment.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    if comment_ids is not None:
+        comments = comments.filter(pk__in=comment_ids)
+
+    post_likes = Like.objects.filter(content_type=ContentType.objects.get_for_model(Post))
+    comment_likes = Like.objects.filter(content_type=ContentType.objects.get_for_model(Comment))
+    posts.update(
+        comment_count=_count_subquery(Comment.objects.all(), 'post'),
+        like_count=_count_subquery(post_likes, 'object_id')
+    )
+    comments.update(like_count=_count_subquery(comment_likes, 'object_id'))
+    refresh_hot_scores(posts.values_list('pk', flat=True))
+
+
+def post_created(post):
+    """新帖子：所属分类帖子数、今日帖子数 +1，并记为最新帖子"""
+    if post.category_id is None:
+        return
+    today = timezone.localdate()
+    updated = CategoryStats.objects.filter(pk=post.category_id).update(
+        post_count=F('post_count') + 1,
+        today_post_count=Case(
+            When(stats_date=today, then=F('today_post_count') + 1),
+            default=Value(1)
+        ),
+        stats_date=today,
+        latest_post=post
+    )
+    if not updated:
+        refresh_category_stats([post.category_id])
+
+
+def posts_deleted(category_ids):
+    """帖子删除或移出分类后重算这些分类的统计"""
+    category_ids = [pk for pk in set(category_ids) if pk is not None]
+    if category_ids:
+        refresh_category_stats(category_ids)
+
+
+def refresh_category_stats(category_ids=None):
+    """按帖子表重算分类统计，缺失的统计行会先补齐；category_ids 为 None 时处理全部分类"""
+    categories = Category.objects.all()
+    if category_ids is not None:
+        categories = categories.filter(pk__in=category_ids)
+    CategoryStats.objects.bulk_create(
+        [CategoryStats(category_id=pk) for pk in categories.filter(stats__isnull=True).values_list('pk', flat=True)],
+        ignore_conflicts=True
+    )
+
+    today = timezone.localdate()
+    today_start = timezone.make_aware(datetime.combine(today, time.min))
+    latest = Post.objects.filter(category=OuterRef('pk')).order_by('-created_at', '-id').values('pk')[:1]
+    return CategoryStats.objects.filter(category__in=categories).update(
+        # Archived threads still count towards the category total
+        post_count=(_count_subquery(Post.objects.all(), 'category') +
+                    _count_subquery(ArchivedPost.objects.all(), 'category')),
+        today_post_count=_count_subquery(Post.objects.filter(created_at__gte=today_start), 'category'),
+        stats_date=today,
+        latest_post=Subquery(latest)
+    )
@@ -0,0 +1,171 @@
+"""
+帖子图片处理
+
+上传的图片按 SHA-256 去重：同一张图片无论被上传多少次，只保存一份原图和一组缩略图。
+缩略图由后台线程池生成，不阻塞上传请求；生成完成前展开结果中的各尺寸都指向原图。
+帖子的 images 字段保存图片ID，序列化时展开为各尺寸的URL，列表页默认使用小图。
+"""
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import IntegrityError, connection, transaction
+
+from .models import PostImage
+
+logger = logging.getLogger(__name__)
+
+# 缩略图尺寸：名称 -> 最长边像素
+SIZES = {'small': 240, 'medium': 720, 'large': 1440}
+
+# 允许上传的格式及保存时使用的扩展名
+FORMATS = {'JPEG': '.jpg', 'PNG': '.png', 'GIF': '.gif', 'WEBP': '.webp'}
+
+# EXIF 方向值为 5~8 时图片需要旋转 90 度，宽高互换
+_ROTATED = {5, 6, 7, 8}
+_ORIENTATION = 0x0112
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def content_hash(file):
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def _display_size(file):
+    """按 EXIF 方向校正后的宽高"""
+    with Image.open(file) as image:
+        width, height = image.size
+        if image.getexif().get(_ORIENTATION) in _ROTATED:
+            width, height = height, width
+    file.seek(0)
+    return width, height
+
+
+def store(file, image_format, uploader):
+    """
+    保存上传的图片，返回 (PostImage, created)
+
+    内容相同的图片已存在时直接返回已有记录，不再写入文件。
+    """
+    sha256 = content_hash(file)
+    existing = PostImage.objects.filter(sha256=sha256).first()
+    if existing is not None:
+        return existing, False
+
+    width, height = _display_size(file)
+    image = PostImage(sha256=sha256, size=file.size, uploader=uploader)
+    image.file.save(f'{sha256}{FORMATS[image_format]}', file, save=False)
+    image.width, image.height = width, height
+    try:
+        with transaction.atomic():
+            image.save()
+    except IntegrityError:
+        # The same content was stored by a concurrent upload; keep theirs
+        image.file.delete(save=False)
+        return PostImage.objects.get(sha256=sha256), False
+
+    transaction.on_commit(lambda: schedule_thumbnails(image.id))
+    return image, True
+
+
+def _thumbnail_name(image, size, ext):
+    return f'forum/images/{image.sha256[:2]}/{image.sha256}_{size}{ext}'
+
+
+def generate_thumbnails(image_id):
+    """生成各尺寸缩略图并更新处理状态"""
+    image = PostImage.objects.get(pk=image_id)
+    storage = image.file.storage
+    thumbnails = {}
+    try:
+        with image.file.open('rb') as file, Image.open(file) as source:
+            # Animated images keep their original so the animation is not lost
+            if not getattr(source, 'is_animated', False):
+                source = ImageOps.exif_transpose(source)
+                has_alpha = source.mode in ('RGBA', 'LA') or 'transparency' in source.info
+                for size, edge in SIZES.items():
+                    if max(source.size) <= edge:
+                        continue  # Smaller than this size already, the original is served instead
+                    thumbnail = source.copy()
+                    thumbnail.thumbnail((edge, edge), Image.LANCZOS)
+                    buffer = io.BytesIO()
+                    if has_alpha:
+                        thumbnail.save(buffer, 'PNG', optimize=True)
+                        ext = '.png'
+                    else:
+                        thumbnail.convert('RGB').save(buffer, 'JPEG', quality=82, optimize=True, progressive=True)
+                        ext = '.jpg'
+                    thumbnails[size] = storage.save(
+                        _thumbnail_name(image, size, ext), ContentFile(buffer.getvalue())
+                    )
+        status = 'ready'
+    except Exception:
+        logger.exception('生成缩略图失败: image=%s', image_id)
+        status = 'failed'
+    PostImage.objects.filter(pk=image_id).update(thumbnails=thumbnails, status=status)
+    return status
+
+
+def _run(image_id):
+    try:
+        generate_thumbnails(image_id)
+    finally:
+        # Worker threads get their own connection; close it instead of leaking it
+        connection.close()
+
+
+def schedule_thumbnails(image_id):
+    """把缩略图生成交给后台线程池（FORUM_IMAGE_WORKERS 为 0 时在当前线程执行）"""
+    global _executor
+    workers = settings.FORUM_IMAGE_WORKERS
+    if workers <= 0:
+        generate_thumbnails(image_id)
+        return
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='forum-images')
+    _executor.submit(_run, image_id)
+
+
+def _absolute(url, request):
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def represent(image, size=None, request=None):
+    """
+    展开为 {id, width, height, url, original, thumbnails}
+
+    ``url`` 是 ``size`` 对应尺寸的地址（不指定时为原图），缺少的尺寸退回原图。
+    ``image`` 为字符串时是旧数据中的图片URL，各尺寸都指向它。
+    """
+    if isinstance(image, str):
+        return {
+            'id': None, 'width': None, 'height': None,
+            'url': image, 'original': image,
+            'thumbnails': {name: image for name in SIZES},
+        }
+    original = _absolute(image.file.url, request)
+    storage = image.file.storage
+    thumbnails = {
+        name: _absolute(storage.url(image.thumbnails[name]), request) if name in image.thumbnails else original
+        for name in SIZES
+    }
+    return {
+        'id': image.id,
+        'width': image.width,
+        'height': image.height,
+        'url': thumbnails[size] if size else original,
+        'original': original,
+        'thumbnails': thumbnails,
+    }
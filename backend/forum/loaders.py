@@ -0,0 +1,99 @@
+"""
+按请求批量加载序列化所需的关联数据
+
+序列化一页帖子/评论前，把页面上所有对象的ID交给 ViewerLikes，用一次 IN 查询
+取回当前用户的点赞记录，序列化器的 is_liked 只做集合查找；帖子引用的图片
+同样由 PostImages 按页一次取回。
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
+
+from .models import Post, Comment, Like, PostImage
+
+
+class ViewerLikes:
+    """当前用户对帖子和评论的点赞状态"""
+
+    def __init__(self, user):
+        self.user = user if user is not None and user.is_authenticated else None
+        self._loaded = {Post: set(), Comment: set()}
+        self._liked = {Post: set(), Comment: set()}
+
+    def load(self, posts=(), comments=()):
+        """批量加载尚未加载过的对象，帖子和评论合并为一次查询"""
+        wanted = {
+            Post: {obj.pk for obj in posts} - self._loaded[Post],
+            Comment: {obj.pk for obj in comments} - self._loaded[Comment],
+        }
+        if not any(wanted.values()):
+            return
+        for model, ids in wanted.items():
+            self._loaded[model] |= ids
+        if self.user is None:
+            return
+
+        content_types = ContentType.objects.get_for_models(Post, Comment)
+        models_by_ct = {ct.id: model for model, ct in content_types.items()}
+        condition = Q()
+        for model, ids in wanted.items():
+            if ids:
+                condition |= Q(content_type=content_types[model], object_id__in=ids)
+        likes = Like.objects.filter(condition, user=self.user).values_list('content_type_id', 'object_id')
+        for content_type_id, object_id in likes:
+            self._liked[models_by_ct[content_type_id]].add(object_id)
+
+    def is_liked(self, obj):
+        if self.user is None:
+            return False
+        model = type(obj)
+        if obj.pk not in self._loaded[model]:
+            self.load(**{'posts' if model is Post else 'comments': [obj]})
+        return obj.pk in self._liked[model]
+
+
+def viewer_likes(context):
+    """取出（或创建）序列化上下文中共享的 ViewerLikes"""
+    loader = context.get('viewer_likes')
+    if loader is None:
+        request = context.get('request')
+        loader = ViewerLikes(request.user if request else None)
+        context['viewer_likes'] = loader
+    return loader
+
+
+class PostImages:
+    """帖子 images 字段中引用的图片"""
+
+    def __init__(self):
+        self._images = {}
+
+    def load(self, posts):
+        """批量加载一组帖子引用的、尚未加载过的图片"""
+        wanted = {
+            image_id for post in posts for image_id in post.images
+            if isinstance(image_id, int) and image_id not in self._images
+        }
+        if wanted:
+            images = PostImage.objects.in_bulk(wanted)
+            for image_id in wanted:
+                self._images[image_id] = images.get(image_id)
+
+    def get(self, post):
+        """帖子的图片列表，旧数据中的URL原样保留，已删除的图片被跳过"""
+        self.load([post])
+        images = []
+        for item in post.images:
+            if isinstance(item, int):
+                item = self._images.get(item)
+            if item is not None:
+                images.append(item)
+        return images
+
+
+def post_images(context):
+    """取出（或创建）序列化上下文中共享的 PostImages"""
+    loader = context.get('post_images')
+    if loader is None:
+        loader = PostImages()
+        context['post_images'] = loader
+    return loader
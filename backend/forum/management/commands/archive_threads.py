@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from forum import archive
+
+
+class Command(BaseCommand):
+    help = '把长期不活跃的帖子（连同评论）压缩移入归档表，归档后仍可通过帖子详情接口只读访问'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.FORUM_ARCHIVE_AFTER_DAYS,
+                            help='最后活跃时间早于多少天的帖子会被归档')
+        parser.add_argument('--batch-size', type=int, default=100, help='每批归档的帖子数')
+        parser.add_argument('--dry-run', action='store_true', help='只统计符合条件的帖子数，不归档')
+
+    def handle(self, *args, **options):
+        post_ids = list(archive.archivable(options['days']).values_list('pk', flat=True))
+        if options['dry_run']:
+            self.stdout.write(f'有 {len(post_ids)} 个帖子超过 {options["days"]} 天未活跃')
+            return
+        archived = archive.archive_posts(post_ids, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'已归档 {archived["posts"]} 个帖子、{archived["comments"]} 条评论'
+        ))
@@ -0,0 +1,129 @@
+import asyncio
+import time
+import uuid
+from contextlib import aclosing
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from forum.loaders import ViewerLikes
+from forum.models import Category, Post, Comment
+from forum.serializers import PostDetailSerializer, CommentSerializer
+from forum.broker import InProcessBroker, post_channel
+from forum.streams import _format
+from forum.views import PostViewSet
+from users.models import User
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = '对比轮询帖子详情与订阅事件流的查询数和传输量：轮询实测一次详情请求，事件流通过进程内代理实际订阅和分发（在回滚的事务中构造测试数据）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', type=int, default=200, help='帖子中的评论数')
+        parser.add_argument('--clients', type=int, default=100, help='同时查看该帖子的客户端数')
+        parser.add_argument('--poll-interval', type=float, default=5, help='轮询间隔（秒）')
+        parser.add_argument('--events-per-minute', type=float, default=6, help='每分钟新评论/点赞事件数')
+        parser.add_argument('--events', type=int, default=50, help='事件流实测时发布的事件数')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        suffix = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(f'bench_{suffix}', password=None)
+        category = Category.objects.create(name=f'bench_{suffix}')
+        post = Post.objects.create(title='压测帖子', content='正文' * 100, author=user, category=category)
+
+        roots = Comment.objects.bulk_create(
+            Comment(post=post, author=user, content=f'评论 {i}' * 10)
+            for i in range(options['comments'] // 2)
+        )
+        # bulk_create skips Comment.save(), so root is set explicitly
+        Comment.objects.bulk_create(
+            Comment(post=post, author=user, content=f'回复 {i}' * 10, parent=root, root=root)
+            for i, root in enumerate(roots[:options['comments'] - len(roots)])
+        )
+
+        request = APIRequestFactory().get(f'/api/forum/posts/{post.id}/')
+        request.user = user
+        with CaptureQueriesContext(connection) as queries:
+            data = PostDetailSerializer(PostViewSet.queryset.get(pk=post.id), context={'request': request}).data
+        poll_bytes = len(JSONRenderer().render(data))
+
+        # The write path serializes each event once, whatever the number of subscribers
+        comment = Comment.objects.create(post=post, author=user, content='新评论' * 10)
+        with CaptureQueriesContext(connection) as event_queries:
+            context = {'request': request, 'comment_replies': {}, 'viewer_likes': ViewerLikes(None)}
+            event = {'type': 'comment', 'comment': CommentSerializer(comment, context=context).data}
+        clients = options['clients']
+        with CaptureQueriesContext(connection) as fan_out_queries:
+            received, stream_bytes, elapsed = asyncio.run(
+                self._fan_out(post.id, clients, options['events'], event)
+            )
+
+        polls_per_second = clients / options['poll_interval']
+        events_per_second = options['events_per_minute'] / 60
+        poll_queries = polls_per_second * len(queries)
+        stream_queries = events_per_second * (len(event_queries) + len(fan_out_queries) / options['events'])
+
+        self.stdout.write(f'评论数: {options["comments"]}，客户端: {clients}，轮询间隔: {options["poll_interval"]}s')
+        self.stdout.write(f'单次轮询: {len(queries)} 次查询，{poll_bytes} 字节')
+        self.stdout.write(
+            f'事件流实测: {options["events"]} 个事件推送给 {clients} 个订阅者，收到 {received} 条'
+            f'（应为 {options["events"] * clients}），共 {stream_bytes} 字节，耗时 {elapsed * 1000:.1f}ms，'
+            f'序列化每个事件 {len(event_queries)} 次查询，分发期间 {len(fan_out_queries)} 次查询'
+        )
+        self.stdout.write(
+            f'轮询: {polls_per_second:.1f} 次请求/秒，{poll_queries:.1f} 次查询/秒，'
+            f'{polls_per_second * poll_bytes / 1024:.1f} KiB/秒'
+        )
+        self.stdout.write(
+            f'事件流: {stream_queries:.2f} 次查询/秒，'
+            f'{events_per_second * stream_bytes / options["events"] / 1024:.2f} KiB/秒'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'按每分钟 {options["events_per_minute"]:g} 个事件计，改用事件流后每秒减少约 '
+            f'{poll_queries - stream_queries:.0f} 次查询'
+        ))
+
+    async def _fan_out(self, post_id, clients, events, event):
+        """通过一个新的进程内代理实际订阅和分发，返回 (收到的事件数, 推送字节数, 耗时)"""
+        broker = InProcessBroker()
+        channel = post_channel(post_id)
+        # Every subscriber must be able to hold all events without dropping any
+        broker.queue_size = max(broker.queue_size, events)
+
+        async def client():
+            received = size = 0
+            subscription = broker.subscribe(channel, heartbeat=60)
+            async with aclosing(subscription):
+                async for item in subscription:
+                    if item is None:
+                        continue
+                    received += 1
+                    size += len(_format(item).encode())
+                    if received == events:
+                        break
+            return received, size
+
+        tasks = [asyncio.create_task(client()) for _ in range(clients)]
+        while broker.subscriber_count(channel) < clients:
+            await asyncio.sleep(0)
+        start = time.perf_counter()
+        for _ in range(events):
+            broker.publish(channel, event)
+        results = await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+        return sum(r for r, _ in results), sum(size for _, size in results), elapsed
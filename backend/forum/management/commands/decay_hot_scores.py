@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from forum.ranking import decay_hot_scores
+
+
+class Command(BaseCommand):
+    help = '按当前时间重新计算帖子热度（建议每 10~30 分钟由定时任务执行一次）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='每批更新的帖子数')
+
+    def handle(self, *args, **options):
+        total = decay_hot_scores(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'已更新 {total} 个帖子的热度'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from forum.images import generate_thumbnails
+from forum.models import PostImage
+
+
+class Command(BaseCommand):
+    help = '为未处理或处理失败的帖子图片生成缩略图（如进程重启导致后台任务丢失）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='重新生成全部图片的缩略图')
+
+    def handle(self, *args, **options):
+        images = PostImage.objects.all() if options['all'] else PostImage.objects.exclude(status='ready')
+        results = {'ready': 0, 'failed': 0}
+        for image_id in images.values_list('id', flat=True).iterator():
+            results[generate_thumbnails(image_id)] += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'已处理 {results["ready"]} 张图片，失败 {results["failed"]} 张'
+        ))
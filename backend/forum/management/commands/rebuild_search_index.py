@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from forum import search
+from forum.models import Post, Comment
+
+
+class Command(BaseCommand):
+    help = '重建论坛全文索引（帖子和评论）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='每批写入的记录数')
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            self.stderr.write('当前数据库不是 SQLite，未启用全文索引')
+            return
+
+        batch_size = options['batch_size']
+        with transaction.atomic():
+            search.clear()
+            posts = self._rebuild(Post.objects.only('id', 'title', 'content'), search.index_posts, batch_size)
+            comments = self._rebuild(
+                Comment.objects.only('id', 'post_id', 'content'), search.index_comments, batch_size
+            )
+        self.stdout.write(self.style.SUCCESS(f'已索引 {posts} 个帖子、{comments} 条评论'))
+
+    def _rebuild(self, queryset, index, batch_size):
+        batch = []
+        total = 0
+        for obj in queryset.order_by('pk').iterator(chunk_size=batch_size):
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                index(batch)
+                total += len(batch)
+                batch = []
+        index(batch)
+        return total + len(batch)
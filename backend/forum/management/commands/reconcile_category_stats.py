@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from forum.counters import refresh_category_stats
+
+
+class Command(BaseCommand):
+    help = '按帖子表重新统计分类的帖子数、今日帖子数和最新帖子'
+
+    def handle(self, *args, **options):
+        total = refresh_category_stats()
+        self.stdout.write(self.style.SUCCESS(f'已校正 {total} 个分类的统计'))
@@ -0,0 +1,75 @@
+# Generated by Django 4.2.27 on 2026-10-17 22:03
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+import django.utils.timezone
+
+
+def backfill_counters(apps, schema_editor):
+    Post = apps.get_model('forum', 'Post')
+    Comment = apps.get_model('forum', 'Comment')
+    Like = apps.get_model('forum', 'Like')
+
+    def count_of(queryset, field):
+        counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(
+            c=Count('pk')
+        ).values('c')
+        return Coalesce(Subquery(counts), Value(0))
+
+    post_likes = Like.objects.filter(content_type__app_label='forum', content_type__model='post')
+    comment_likes = Like.objects.filter(content_type__app_label='forum', content_type__model='comment')
+    latest_comment = Comment.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(
+        latest=Max('created_at')
+    ).values('latest')
+
+    Post.objects.update(
+        comment_count=count_of(Comment.objects.all(), 'post'),
+        like_count=count_of(post_likes, 'object_id'),
+        last_activity_at=Greatest('created_at', Coalesce(Subquery(latest_comment), 'created_at')),
+    )
+    Comment.objects.update(like_count=count_of(comment_likes, 'object_id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('forum', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='like_count',
+            field=models.IntegerField(default=0, verbose_name='点赞数'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.IntegerField(default=0, verbose_name='评论数'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='最后活跃时间'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.IntegerField(default=0, verbose_name='点赞数'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', '-like_count'], name='forum_comme_post_id_bfa166_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-last_activity_at'], name='forum_post_last_ac_26069a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-like_count'], name='forum_post_like_co_0f8297_idx'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.27 on 2026-10-17 22:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_root(apps, schema_editor):
+    Comment = apps.get_model('forum', 'Comment')
+    parents = dict(Comment.objects.filter(parent__isnull=False).values_list('id', 'parent_id'))
+    updates = []
+    for comment_id in parents:
+        root_id = parents[comment_id]
+        while root_id in parents:
+            root_id = parents[root_id]
+        updates.append(Comment(id=comment_id, root_id=root_id))
+    Comment.objects.bulk_update(updates, ['root'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0002_post_comment_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='root',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='thread_replies', to='forum.comment', verbose_name='所属顶级评论'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['root', 'created_at'], name='forum_comme_root_id_7db049_idx'),
+        ),
+        migrations.RunPython(backfill_root, migrations.RunPython.noop),
+    ]
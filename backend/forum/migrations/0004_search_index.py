@@ -0,0 +1,74 @@
+import re
+
+from django.db import migrations
+
+# Frozen copies of forum.search / xuanwu_backend.tokenizer as of this migration, so later
+# changes to those modules cannot alter what the migration builds
+
+TABLE = 'forum_search_index'
+
+_CJK = '㐀-䶿一-鿿豈-﫿'
+_TOKEN_RE = re.compile(rf'(?P<cjk>[{_CJK}]+)|(?P<word>[^\W_{_CJK}]+)')
+
+
+def tokenize(text):
+    tokens = []
+    for match in _TOKEN_RE.finditer(text or ''):
+        run = match.group('cjk')
+        if run:
+            tokens.extend([run] if len(run) < 2 else [run[i:i + 2] for i in range(len(run) - 1)])
+        else:
+            tokens.append(match.group('word').lower())
+    return ' '.join(tokens)
+
+
+def _write(schema_editor, rows):
+    """rows: [(rowid, post_id, title, body), ...]"""
+    if not rows:
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, post_id, title, body) VALUES (%s, %s, %s, %s)',
+            [(rowid, post_id, tokenize(title), tokenize(body)) for rowid, post_id, title, body in rows]
+        )
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} "
+        f"USING fts5(post_id UNINDEXED, title, body, tokenize='unicode61')"
+    )
+    Post = apps.get_model('forum', 'Post')
+    Comment = apps.get_model('forum', 'Comment')
+    # Post rows use rowid 2*id, comment rows 2*id+1
+    rows = []
+    for post in Post.objects.only('id', 'title', 'content').iterator(chunk_size=500):
+        rows.append((post.id * 2, post.id, post.title, post.content))
+        if len(rows) >= 500:
+            _write(schema_editor, rows)
+            rows = []
+    for comment in Comment.objects.only('id', 'post_id', 'content').iterator(chunk_size=500):
+        rows.append((comment.id * 2 + 1, comment.post_id, '', comment.content))
+        if len(rows) >= 500:
+            _write(schema_editor, rows)
+            rows = []
+    _write(schema_editor, rows)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0003_comment_root'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.27 on 2026-10-17 22:09
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# Frozen copy of forum.ranking.hot_score as of this migration
+GRAVITY = 1.8
+LIKE_WEIGHT = 1.0
+COMMENT_WEIGHT = 2.0
+VIEW_WEIGHT = 0.05
+HOT_WINDOW = timedelta(days=14)
+
+
+def hot_score(like_count, comment_count, view_count, created_at, now):
+    if now - created_at > HOT_WINDOW:
+        return 0.0
+    points = 1 + LIKE_WEIGHT * like_count + COMMENT_WEIGHT * comment_count + VIEW_WEIGHT * view_count
+    age_hours = max((now - created_at).total_seconds() / 3600, 0)
+    return points / (age_hours + 2) ** GRAVITY
+
+
+def backfill_hot_scores(apps, schema_editor):
+    Post = apps.get_model('forum', 'Post')
+    now = timezone.now()
+    updates = [
+        Post(id=post_id, hot_score=hot_score(likes, comments, views, created_at, now))
+        for post_id, likes, comments, views, created_at in Post.objects.values_list(
+            'id', 'like_count', 'comment_count', 'view_count', 'created_at'
+        )
+    ]
+    Post.objects.bulk_update(updates, ['hot_score'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0004_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='hot_score',
+            field=models.FloatField(default=0, verbose_name='热度'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-hot_score'], name='forum_post_hot_sco_053438_idx'),
+        ),
+        migrations.RunPython(backfill_hot_scores, migrations.RunPython.noop),
+    ]
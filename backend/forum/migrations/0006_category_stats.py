@@ -0,0 +1,47 @@
+# Generated by Django 4.2.27 on 2026-10-17 22:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def backfill_category_stats(apps, schema_editor):
+    Category = apps.get_model('forum', 'Category')
+    CategoryStats = apps.get_model('forum', 'CategoryStats')
+    Post = apps.get_model('forum', 'Post')
+    today = timezone.localdate()
+    for category in Category.objects.all():
+        posts = Post.objects.filter(category=category)
+        CategoryStats.objects.create(
+            category=category,
+            post_count=posts.count(),
+            today_post_count=sum(1 for created_at in posts.values_list('created_at', flat=True)
+                                 if timezone.localdate(created_at) == today),
+            stats_date=today,
+            latest_post=posts.order_by('-created_at', '-id').first(),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0005_post_hot_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryStats',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='forum.category', verbose_name='分类')),
+                ('post_count', models.IntegerField(default=0, verbose_name='帖子数')),
+                ('today_post_count', models.IntegerField(default=0, verbose_name='今日帖子数')),
+                ('stats_date', models.DateField(blank=True, null=True, verbose_name='今日统计日期')),
+                ('latest_post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='forum.post', verbose_name='最新帖子')),
+            ],
+            options={
+                'verbose_name': '分类统计',
+                'verbose_name_plural': '分类统计',
+            },
+        ),
+        migrations.RunPython(backfill_category_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.27 on 2026-10-17 22:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import forum.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('forum', '0006_category_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='images',
+            field=models.JSONField(blank=True, default=list, help_text='PostImage ID 列表（兼容旧数据中的图片URL）', verbose_name='图片列表'),
+        ),
+        migrations.CreateModel(
+            name='PostImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True, verbose_name='内容哈希')),
+                ('file', models.ImageField(height_field='height', upload_to=forum.models.post_image_path, verbose_name='原图', width_field='width')),
+                ('width', models.PositiveIntegerField(default=0, verbose_name='宽度')),
+                ('height', models.PositiveIntegerField(default=0, verbose_name='高度')),
+                ('size', models.PositiveIntegerField(default=0, verbose_name='文件大小(字节)')),
+                ('thumbnails', models.JSONField(blank=True, default=dict, help_text='尺寸名称到存储路径的映射', verbose_name='缩略图')),
+                ('status', models.CharField(choices=[('pending', '处理中'), ('ready', '已完成'), ('failed', '处理失败')], default='pending', max_length=10, verbose_name='处理状态')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='上传时间')),
+                ('uploader', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='forum_images', to=settings.AUTH_USER_MODEL, verbose_name='首次上传者')),
+            ],
+            options={
+                'verbose_name': '帖子图片',
+                'verbose_name_plural': '帖子图片',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status'], name='forum_posti_status_511608_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.27 on 2026-10-17 22:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('forum', '0007_post_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPost',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='帖子ID')),
+                ('title', models.CharField(max_length=200, verbose_name='标题')),
+                ('data', models.BinaryField(help_text='zlib 压缩的帖子详情 JSON', verbose_name='帖子数据')),
+                ('created_at', models.DateTimeField(verbose_name='创建时间')),
+                ('last_activity_at', models.DateTimeField(verbose_name='最后活跃时间')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='归档时间')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_posts', to=settings.AUTH_USER_MODEL, verbose_name='作者')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_posts', to='forum.category', verbose_name='分类')),
+            ],
+            options={
+                'verbose_name': '归档帖子',
+                'verbose_name_plural': '归档帖子',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.27 on 2026-10-17 23:02
+
+from django.db import migrations, models
+import forum.models
+
+# Frozen copy of forum.images._display_size: EXIF orientations 5~8 swap width and height
+ROTATED = {5, 6, 7, 8}
+ORIENTATION = 0x0112
+
+
+def fix_display_sizes(apps, schema_editor):
+    """width_field/height_field 写入的是原始像素尺寸，按 EXIF 方向重新计算"""
+    from PIL import Image
+
+    PostImage = apps.get_model('forum', 'PostImage')
+    for image in PostImage.objects.only('id', 'file', 'width', 'height').iterator():
+        try:
+            with image.file.open('rb') as file, Image.open(file) as source:
+                width, height = source.size
+                if source.getexif().get(ORIENTATION) in ROTATED:
+                    width, height = height, width
+        except (OSError, ValueError):
+            continue  # Missing or unreadable file; keep the stored size
+        if (width, height) != (image.width, image.height):
+            PostImage.objects.filter(pk=image.pk).update(width=width, height=height)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('forum', '0008_archived_post'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='postimage',
+            name='file',
+            field=models.ImageField(upload_to=forum.models.post_image_path, verbose_name='原图'),
+        ),
+        migrations.RunPython(fix_display_sizes, migrations.RunPython.noop),
+    ]
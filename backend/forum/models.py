@@ -1,7 +1,11 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
+import json
+import os
+import zlib
 
 
 class Category(models.Model):
@@ -21,6 +25,87 @@ class Category(models.Model):
         return self.name
 
 
+class CategoryStats(models.Model):
+    """分类统计（随发帖/删帖更新，避免分类列表逐行 COUNT）"""
+    category = models.OneToOneField(
+        Category,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name="分类"
+    )
+    post_count = models.IntegerField(default=0, verbose_name="帖子数")
+    today_post_count = models.IntegerField(default=0, verbose_name="今日帖子数")
+    stats_date = models.DateField(null=True, blank=True, verbose_name="今日统计日期")
+    latest_post = models.ForeignKey(
+        'Post',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="最新帖子"
+    )
+    
+    class Meta:
+        verbose_name = "分类统计"
+        verbose_name_plural = "分类统计"
+    
+    def __str__(self):
+        return f"{self.category.name} 统计"
+    
+    @property
+    def current_today_post_count(self):
+        """统计日期不是今天时，今日帖子数视为 0"""
+        if self.stats_date == timezone.localdate():
+            return self.today_post_count
+        return 0
+
+
+def post_image_path(instance, filename):
+    """Store images by content hash so identical uploads share one file"""
+    ext = os.path.splitext(filename)[1].lower()
+    return f'forum/images/{instance.sha256[:2]}/{instance.sha256}{ext}'
+
+
+class PostImage(models.Model):
+    """帖子图片（按内容哈希去重存储）"""
+    STATUS_CHOICES = [
+        ('pending', '处理中'),
+        ('ready', '已完成'),
+        ('failed', '处理失败'),
+    ]
+    
+    sha256 = models.CharField(max_length=64, unique=True, verbose_name="内容哈希")
+    file = models.ImageField(upload_to=post_image_path, verbose_name="原图")
+    # Set from the EXIF-corrected size in images.store(); width_field/height_field
+    # would overwrite them with the raw pixel size
+    width = models.PositiveIntegerField(default=0, verbose_name="宽度")
+    height = models.PositiveIntegerField(default=0, verbose_name="高度")
+    size = models.PositiveIntegerField(default=0, verbose_name="文件大小(字节)")
+    thumbnails = models.JSONField(default=dict, blank=True, verbose_name="缩略图",
+                                  help_text="尺寸名称到存储路径的映射")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name="处理状态")
+    uploader = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='forum_images',
+        verbose_name="首次上传者"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="上传时间")
+    
+    class Meta:
+        verbose_name = "帖子图片"
+        verbose_name_plural = "帖子图片"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status']),
+        ]
+    
+    def __str__(self):
+        return self.sha256[:12]
+
+
 class Post(models.Model):
     """帖子"""
     title = models.CharField(max_length=200, verbose_name="标题")
@@ -39,10 +124,15 @@ class Post(models.Model):
         related_name='posts',
         verbose_name="分类"
     )
-    images = models.JSONField(default=list, blank=True, verbose_name="图片列表")
+    images = models.JSONField(default=list, blank=True, verbose_name="图片列表",
+                              help_text="PostImage ID 列表（兼容旧数据中的图片URL）")
     is_pinned = models.BooleanField(default=False, verbose_name="是否置顶")
     is_locked = models.BooleanField(default=False, verbose_name="是否锁定")
     view_count = models.IntegerField(default=0, verbose_name="浏览次数")
+    comment_count = models.IntegerField(default=0, verbose_name="评论数")
+    like_count = models.IntegerField(default=0, verbose_name="点赞数")
+    last_activity_at = models.DateTimeField(default=timezone.now, verbose_name="最后活跃时间")
+    hot_score = models.FloatField(default=0, verbose_name="热度")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
     likes = GenericRelation('Like', related_query_name='post')
@@ -55,18 +145,13 @@ class Post(models.Model):
             models.Index(fields=['-created_at']),
             models.Index(fields=['author']),
             models.Index(fields=['category']),
+            models.Index(fields=['-last_activity_at']),
+            models.Index(fields=['-like_count']),
+            models.Index(fields=['-hot_score']),
         ]
     
     def __str__(self):
         return self.title
-    
-    @property
-    def comment_count(self):
-        return self.comments.count()
-    
-    @property
-    def like_count(self):
-        return self.likes.count()
 
 
 class Comment(models.Model):
@@ -92,6 +177,15 @@ class Comment(models.Model):
         related_name='replies',
         verbose_name="父评论"
     )
+    root = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='thread_replies',
+        verbose_name="所属顶级评论"
+    )
+    like_count = models.IntegerField(default=0, verbose_name="点赞数")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
     likes = GenericRelation('Like', related_query_name='comment')
@@ -102,15 +196,82 @@ class Comment(models.Model):
         ordering = ['created_at']
         indexes = [
             models.Index(fields=['post', 'created_at']),
+            models.Index(fields=['post', '-like_count']),
+            models.Index(fields=['root', 'created_at']),
             models.Index(fields=['author']),
         ]
     
     def __str__(self):
         return f"{self.author.username} 的评论"
     
+    # parent_id as last loaded from or saved to the database
+    _saved_parent_id = None
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_parent_id = instance.__dict__.get('parent_id')
+        return instance
+    
+    def save(self, *args, **kwargs):
+        # Replies at any depth are grouped under their top-level comment; the root is
+        # recomputed whenever the parent changes
+        parent_changed = self.parent_id != self._saved_parent_id
+        if parent_changed or (self.parent_id and not self.root_id):
+            self.root_id = (self.parent.root_id or self.parent_id) if self.parent_id else None
+        moved = parent_changed and not self._state.adding
+        super().save(*args, **kwargs)
+        self._saved_parent_id = self.parent_id
+        if moved:
+            self._reroot_replies()
+    
+    def _reroot_replies(self):
+        """评论移动后，把它下面各层回复的 root 改为它新的顶级评论"""
+        root_id = self.root_id or self.pk
+        seen, level = {self.pk}, [self.pk]
+        while level:
+            level = [
+                pk for pk in Comment.objects.filter(parent_id__in=level).values_list('pk', flat=True)
+                if pk not in seen
+            ]
+            seen.update(level)
+            Comment.objects.filter(pk__in=level).update(root_id=root_id)
+
+
+class ArchivedPost(models.Model):
+    """归档帖子（帖子详情连同评论树预先渲染为 JSON 并压缩保存）"""
+    id = models.BigIntegerField(primary_key=True, verbose_name="帖子ID")
+    title = models.CharField(max_length=200, verbose_name="标题")
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name="作者"
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='archived_posts',
+        verbose_name="分类"
+    )
+    data = models.BinaryField(verbose_name="帖子数据", help_text="zlib 压缩的帖子详情 JSON")
+    created_at = models.DateTimeField(verbose_name="创建时间")
+    last_activity_at = models.DateTimeField(verbose_name="最后活跃时间")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="归档时间")
+    
+    class Meta:
+        verbose_name = "归档帖子"
+        verbose_name_plural = "归档帖子"
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return self.title
+    
     @property
-    def like_count(self):
-        return self.likes.count()
+    def payload(self):
+        return json.loads(zlib.decompress(self.data))
 
 
 class Like(models.Model):
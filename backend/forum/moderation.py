@@ -0,0 +1,89 @@
+"""
+论坛批量管理
+
+置顶、锁定按块直接 UPDATE；删除不走 Django 逐对象收集级联和发送信号的流程，
+而是按块查出受影响的评论，用集合语句依次删除点赞、全文索引行、评论和帖子，
+最后在同一事务中重算帖子计数和分类统计。
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from xuanwu_backend.bulk import bulk_update, chunked
+
+from .models import Post, Comment, Like
+from . import counters, search
+
+POST_ACTIONS = {
+    'pin': {'is_pinned': True},
+    'unpin': {'is_pinned': False},
+    'lock': {'is_locked': True},
+    'unlock': {'is_locked': False},
+}
+
+
+def update_posts(post_ids, action):
+    """批量置顶/锁定，返回更新的帖子数"""
+    return bulk_update(Post.objects.all(), post_ids, **POST_ACTIONS[action])
+
+
+def _raw_delete(queryset):
+    # One DELETE statement; likes, search rows and counters are handled by the callers
+    return queryset._raw_delete(queryset.db)
+
+
+def _delete_likes(post_ids=(), comment_ids=()):
+    content_types = ContentType.objects.get_for_models(Post, Comment)
+    if post_ids:
+        Like.objects.filter(content_type=content_types[Post], object_id__in=post_ids).delete()
+    for chunk in chunked(comment_ids):
+        Like.objects.filter(content_type=content_types[Comment], object_id__in=chunk).delete()
+
+
+def delete_posts(post_ids):
+    """删除帖子及其全部评论和点赞，返回 {'posts': n, 'comments': n}"""
+    deleted = {'posts': 0, 'comments': 0}
+    for chunk in chunked(post_ids):
+        with transaction.atomic():
+            posts = Post.objects.filter(pk__in=chunk)
+            category_ids = set(posts.values_list('category_id', flat=True))
+            comment_ids = list(Comment.objects.filter(post_id__in=chunk).values_list('pk', flat=True))
+            _delete_likes(chunk, comment_ids)
+            search.remove(chunk, comment_ids)
+            deleted['comments'] += _raw_delete(Comment.objects.filter(post_id__in=chunk))
+            deleted['posts'] += _raw_delete(posts)
+            # Also clears CategoryStats.latest_post rows that point at deleted posts
+            counters.posts_deleted(category_ids)
+    return deleted
+
+
+def _reply_levels(comment_ids):
+    """评论及其全部下级回复，按层级分组（第一层是 comment_ids 本身）"""
+    seen = set(comment_ids)
+    levels = [list(seen)]
+    while levels[-1]:
+        children = set()
+        for chunk in chunked(levels[-1]):
+            children.update(Comment.objects.filter(parent_id__in=chunk).values_list('pk', flat=True))
+        levels.append(list(children - seen))
+        seen |= children
+    return levels[:-1]
+
+
+def delete_comments(comment_ids):
+    """删除评论及其全部回复和点赞，返回 {'comments': n}"""
+    existing = set()
+    for chunk in chunked(comment_ids):
+        existing.update(Comment.objects.filter(pk__in=chunk).values_list('pk', flat=True))
+
+    deleted = 0
+    # Deepest replies go first so every committed chunk leaves no dangling parent references
+    for level in reversed(_reply_levels(existing)):
+        for chunk in chunked(level):
+            with transaction.atomic():
+                comments = Comment.objects.filter(pk__in=chunk)
+                post_ids = set(comments.values_list('post_id', flat=True))
+                _delete_likes(comment_ids=chunk)
+                search.remove(comment_ids=chunk)
+                deleted += _raw_delete(comments)
+                counters.comments_deleted(post_ids)
+    return {'comments': deleted}
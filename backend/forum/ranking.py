@@ -0,0 +1,67 @@
+"""
+帖子热度
+
+参照 Hacker News 的排序公式：热度 = 互动分 / (发帖小时数 + 2) ^ GRAVITY，
+互动分由点赞、评论和浏览加权得到。点赞、评论、浏览写回时只重算相关帖子，
+随时间的衰减由 decay_hot_scores 命令定期批量刷新；超出统计窗口的帖子热度归零，
+不再参与热榜。
+"""
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Post
+
+GRAVITY = 1.8
+LIKE_WEIGHT = 1.0
+COMMENT_WEIGHT = 2.0
+VIEW_WEIGHT = 0.05
+
+# 只有这段时间内发布的帖子参与热榜
+HOT_WINDOW = timedelta(days=14)
+
+
+def hot_score(like_count, comment_count, view_count, created_at, now=None):
+    now = now or timezone.now()
+    if now - created_at > HOT_WINDOW:
+        return 0.0
+    points = 1 + LIKE_WEIGHT * like_count + COMMENT_WEIGHT * comment_count + VIEW_WEIGHT * view_count
+    age_hours = max((now - created_at).total_seconds() / 3600, 0)
+    return points / (age_hours + 2) ** GRAVITY
+
+
+def _rescore(posts, now):
+    updates = [
+        Post(id=post_id, hot_score=hot_score(likes, comments, views, created_at, now))
+        for post_id, likes, comments, views, created_at in posts
+    ]
+    Post.objects.bulk_update(updates, ['hot_score'], batch_size=500)
+    return len(updates)
+
+
+def refresh_hot_scores(post_ids):
+    """点赞、评论、浏览变化后重算这些帖子的热度"""
+    posts = Post.objects.filter(pk__in=post_ids).values_list(
+        'id', 'like_count', 'comment_count', 'view_count', 'created_at'
+    )
+    return _rescore(posts, timezone.now())
+
+
+def decay_hot_scores(batch_size=500):
+    """按当前时间重新衰减窗口内所有帖子的热度，窗口外的帖子归零"""
+    now = timezone.now()
+    cutoff = now - HOT_WINDOW
+    Post.objects.filter(Q(created_at__lt=cutoff) & ~Q(hot_score=0)).update(hot_score=0)
+
+    posts = Post.objects.filter(created_at__gte=cutoff).values_list(
+        'id', 'like_count', 'comment_count', 'view_count', 'created_at'
+    ).order_by('pk')
+    total = 0
+    batch = []
+    for row in posts.iterator(chunk_size=batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            total += _rescore(batch, now)
+            batch = []
+    return total + _rescore(batch, now)
@@ -0,0 +1,198 @@
+"""
+论坛全文检索
+
+基于 SQLite FTS5 维护帖子和评论的全文索引。FTS5 自带的分词器不能切分中文，
+因此写入和查询前都先用 xuanwu_backend.tokenizer 做二元切分，索引中保存的是
+以空格分隔的词元；排序使用 bm25，标题权重高于正文。
+
+索引行的 rowid 由对象ID推出（帖子 2*id，评论 2*id+1），增删改都按 rowid 定位。
+非 SQLite 数据库不建索引，搜索退回到 icontains 查询。
+"""
+import re
+
+from rest_framework import filters
+from django.db import connection
+from django.db.models import Case, IntegerField, Value, When
+from django.utils.html import escape
+
+from xuanwu_backend.tokenizer import segments, tokenize
+
+TABLE = 'forum_search_index'
+
+# bm25 列权重：post_id（不参与检索）、title、body
+_BM25 = f'bm25({TABLE}, 0.0, 10.0, 1.0)'
+
+# 最多返回的相关结果数
+MAX_RESULTS = 500
+
+# 检索结果上的相关度名次注解（0 为最相关）
+RANK = 'search_rank'
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def create_index(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} "
+        f"USING fts5(post_id UNINDEXED, title, body, tokenize='unicode61')"
+    )
+
+
+def drop_index(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+def _post_rowid(post_id):
+    return post_id * 2
+
+
+def _comment_rowid(comment_id):
+    return comment_id * 2 + 1
+
+
+def _write(rows):
+    """rows: [(rowid, post_id, title, body), ...]"""
+    if not rows or not is_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, post_id, title, body) VALUES (%s, %s, %s, %s)',
+            [(rowid, post_id, ' '.join(tokenize(title)), ' '.join(tokenize(body)))
+             for rowid, post_id, title, body in rows]
+        )
+
+
+def index_posts(posts):
+    _write([(_post_rowid(post.id), post.id, post.title, post.content) for post in posts])
+
+
+def index_comments(comments):
+    _write([(_comment_rowid(comment.id), comment.post_id, '', comment.content) for comment in comments])
+
+
+def remove(post_ids=(), comment_ids=()):
+    if not is_available():
+        return
+    rowids = [_post_rowid(pk) for pk in post_ids] + [_comment_rowid(pk) for pk in comment_ids]
+    if rowids:
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {TABLE} WHERE rowid = %s', [(rowid,) for rowid in rowids])
+
+
+def clear():
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+
+
+def build_match(query):
+    """
+    把用户输入转成 FTS5 查询
+
+    每段连续汉字的二元词元组成一个短语（保证相邻），单个汉字用前缀匹配，
+    英文单词直接匹配；各部分之间是 AND 关系。
+    """
+    parts = []
+    for kind, _, tokens in segments(query):
+        if kind == 'cjk' and len(tokens[0]) == 1:
+            parts.append(f'"{tokens[0]}"*')
+        else:
+            parts.append('"' + ' '.join(tokens) + '"')
+    return ' '.join(parts)
+
+
+def search_post_ids(query, limit=MAX_RESULTS, posts=None):
+    """
+    按相关度返回匹配的帖子ID（标题、正文或评论命中均算）
+
+    posts 为帖子查询集时只在其中检索：它的筛选条件作为子查询写进同一条 FTS
+    查询，先筛选再取前 limit 个，筛选范围内的命中不会被全站排名更靠前的帖子挤掉。
+    """
+    match = build_match(query)
+    if not match:
+        return []
+    sql = f'SELECT post_id, {_BM25} AS score FROM {TABLE} WHERE {TABLE} MATCH %s'
+    params = [match]
+    if posts is not None:
+        subquery, subquery_params = posts.order_by().values('pk').query.sql_with_params()
+        sql += f' AND post_id IN ({subquery})'
+        params.extend(subquery_params)
+    # A post can match on several rows (itself and its comments); it ranks by its best row.
+    # bm25() cannot be used inside an aggregate; the LIMIT keeps SQLite from flattening
+    # the derived table back into the aggregate query
+    sql = f'SELECT post_id FROM ({sql} LIMIT -1) GROUP BY post_id ORDER BY min(score), post_id LIMIT %s'
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def ranked(queryset, query):
+    """
+    queryset 中命中 query 的帖子，按相关度排序
+
+    queryset 上已有的筛选（分类、作者等）在全文查询中就已生效，结果是筛选范围内
+    相关度最高的 MAX_RESULTS 个帖子，相关度名次以 RANK 注解保存。
+    """
+    post_ids = search_post_ids(query, posts=queryset)
+    rank = Case(
+        *(When(pk=post_id, then=Value(position)) for position, post_id in enumerate(post_ids)),
+        output_field=IntegerField()
+    )
+    return queryset.filter(pk__in=post_ids).annotate(**{RANK: rank}).order_by(RANK)
+
+
+def query_terms(query):
+    """用于高亮的原始查询词（连续汉字段和英文单词）"""
+    return [raw for _, raw, _ in segments(query)]
+
+
+def snippet(text, terms, width=60):
+    """截取第一个命中词附近的片段，并用 <mark> 标出命中词"""
+    text = text or ''
+    lowered = text.lower()
+    positions = [pos for pos in (lowered.find(term.lower()) for term in terms) if pos >= 0]
+    start = max(min(positions) - width // 3, 0) if positions else 0
+    fragment = text[start:start + width]
+
+    pieces = []
+    last = 0
+    if terms:
+        pattern = re.compile(
+            '|'.join(re.escape(term) for term in sorted(set(terms), key=len, reverse=True)),
+            re.IGNORECASE
+        )
+        for match in pattern.finditer(fragment):
+            pieces.append(escape(fragment[last:match.start()]))
+            pieces.append(f'<mark>{escape(match.group(0))}</mark>')
+            last = match.end()
+    pieces.append(escape(fragment[last:]))
+
+    prefix = '…' if start > 0 else ''
+    suffix = '…' if start + width < len(text) else ''
+    return prefix + ''.join(pieces) + suffix
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """?search= 走全文索引；非 SQLite 数据库时退回 SearchFilter 的 icontains 查询"""
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query or not is_available():
+            return super().filter_queryset(request, queryset, view)
+        return ranked(queryset, query)
+
+
+class RelevanceOrderingFilter(filters.OrderingFilter):
+    """未指定 ?ordering= 时，全文检索的结果保持相关度顺序而不是默认排序"""
+
+    def filter_queryset(self, request, queryset, view):
+        if RANK in queryset.query.annotations and not request.query_params.get(self.ordering_param):
+            return queryset
+        return super().filter_queryset(request, queryset, view)
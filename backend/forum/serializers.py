@@ -1,20 +1,99 @@
 from rest_framework import serializers
 from django.contrib.contenttypes.models import ContentType
-from .models import Category, Post, Comment, Like
+from django.conf import settings
+from django.db.models import Manager
+from .models import Category, Post, Comment, Like, PostImage
+from .images import FORMATS, represent, store
+from .loaders import viewer_likes, post_images
+from .search import snippet
+from .threads import group_replies, load_post_comments
 from users.serializers import UserSerializer
+from xuanwu_backend.bulk import BulkActionSerializer
 
 
 class CategorySerializer(serializers.ModelSerializer):
     """分类序列化器"""
     post_count = serializers.SerializerMethodField()
+    today_post_count = serializers.SerializerMethodField()
+    latest_post = serializers.SerializerMethodField()
     
     class Meta:
         model = Category
-        fields = ('id', 'name', 'description', 'icon', 'order', 'post_count', 'created_at')
+        fields = ('id', 'name', 'description', 'icon', 'order', 'post_count',
+                  'today_post_count', 'latest_post', 'created_at')
         read_only_fields = ('id', 'created_at')
     
+    def _stats(self, obj):
+        # Categories without any post yet have no stats row
+        return getattr(obj, 'stats', None)
+    
     def get_post_count(self, obj):
-        return obj.posts.count()
+        stats = self._stats(obj)
+        return stats.post_count if stats else 0
+    
+    def get_today_post_count(self, obj):
+        stats = self._stats(obj)
+        return stats.current_today_post_count if stats else 0
+    
+    def get_latest_post(self, obj):
+        stats = self._stats(obj)
+        if stats is None or stats.latest_post is None:
+            return None
+        post = stats.latest_post
+        return {
+            'id': post.id,
+            'title': post.title,
+            'created_at': serializers.DateTimeField().to_representation(post.created_at),
+        }
+
+
+class ViewerLikesListSerializer(serializers.ListSerializer):
+    """序列化整页对象前，一次性加载当前用户对它们的点赞状态"""
+    
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, Manager) else data)
+        if items:
+            key = 'posts' if self.child.Meta.model is Post else 'comments'
+            viewer_likes(self.context).load(**{key: items})
+        return super().to_representation(items)
+
+
+class PostImagesListSerializer(serializers.ListSerializer):
+    """序列化整页帖子前，一次性加载它们引用的图片"""
+    
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, Manager) else data)
+        post_images(self.context).load(items)
+        return super().to_representation(items)
+
+
+class PostImageSerializer(serializers.ModelSerializer):
+    """帖子图片上传序列化器"""
+    image = serializers.ImageField(write_only=True)
+    
+    class Meta:
+        model = PostImage
+        fields = ('id', 'image', 'width', 'height', 'size', 'status', 'created_at')
+        read_only_fields = ('id', 'width', 'height', 'size', 'status', 'created_at')
+    
+    def validate_image(self, value):
+        """验证图片大小和格式"""
+        if value.size > settings.FORUM_IMAGE_MAX_UPLOAD_SIZE:
+            limit = settings.FORUM_IMAGE_MAX_UPLOAD_SIZE // (1024 * 1024)
+            raise serializers.ValidationError(f"图片不能超过 {limit}MB")
+        if value.image.format not in FORMATS:
+            raise serializers.ValidationError("仅支持 JPEG、PNG、GIF、WEBP 格式的图片")
+        return value
+    
+    def create(self, validated_data):
+        image = validated_data['image']
+        instance, self.created = store(image, image.image.format, validated_data.get('uploader'))
+        return instance
+    
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        data.update(represent(instance, request=self.context.get('request')))
+        return data
 
 
 class CommentSerializer(serializers.ModelSerializer):
@@ -28,24 +107,23 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
         fields = ('id', 'post', 'author', 'content', 'parent', 'like_count', 
                   'is_liked', 'replies', 'created_at', 'updated_at')
-        read_only_fields = ('id', 'author', 'created_at', 'updated_at')
+        # Comments are created with CommentCreateSerializer; moving one to another post or
+        # parent on update would leave the denormalized counters and thread root stale
+        read_only_fields = ('id', 'post', 'author', 'parent', 'created_at', 'updated_at')
+        list_serializer_class = ViewerLikesListSerializer
     
     def get_is_liked(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            content_type = ContentType.objects.get_for_model(Comment)
-            return Like.objects.filter(
-                user=request.user,
-                content_type=content_type,
-                object_id=obj.id
-            ).exists()
-        return False
+        return viewer_likes(self.context).is_liked(obj)
     
     def get_replies(self, obj):
-        if obj.parent is None:  # Only show replies for top-level comments
-            replies = obj.replies.all()
-            return CommentSerializer(replies, many=True, context=self.context).data
-        return []
+        if obj.parent_id is not None:  # Only show replies for top-level comments
+            return []
+        replies = self.context.get('comment_replies')
+        if replies is not None:
+            replies = replies.get(obj.id, [])
+        else:
+            replies = obj.thread_replies.select_related('author').order_by('created_at', 'id')
+        return CommentSerializer(replies, many=True, context=self.context).data
 
 
 class PostListSerializer(serializers.ModelSerializer):
@@ -54,13 +132,34 @@ class PostListSerializer(serializers.ModelSerializer):
     category_name = serializers.CharField(source='category.name', read_only=True)
     comment_count = serializers.ReadOnlyField()
     like_count = serializers.ReadOnlyField()
+    images = serializers.SerializerMethodField()
     
     class Meta:
         model = Post
-        fields = ('id', 'title', 'author', 'category', 'category_name', 
+        fields = ('id', 'title', 'author', 'category', 'category_name', 'images',
                   'is_pinned', 'view_count', 'comment_count', 'like_count',
-                  'created_at', 'updated_at')
-        read_only_fields = ('id', 'author', 'view_count', 'created_at', 'updated_at')
+                  'last_activity_at', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'author', 'view_count', 'last_activity_at', 'created_at', 'updated_at')
+        list_serializer_class = PostImagesListSerializer
+    
+    def get_images(self, obj):
+        request = self.context.get('request')
+        return [represent(image, 'small', request) for image in post_images(self.context).get(obj)]
+
+
+class PostSearchResultSerializer(PostListSerializer):
+    """帖子搜索结果序列化器（附高亮摘要）"""
+    highlight = serializers.SerializerMethodField()
+    
+    class Meta(PostListSerializer.Meta):
+        fields = PostListSerializer.Meta.fields + ('highlight',)
+    
+    def get_highlight(self, obj):
+        terms = self.context.get('search_terms', [])
+        return {
+            'title': snippet(obj.title, terms, width=len(obj.title)),
+            'content': snippet(obj.content, terms),
+        }
 
 
 class PostDetailSerializer(serializers.ModelSerializer):
@@ -70,6 +169,7 @@ class PostDetailSerializer(serializers.ModelSerializer):
     comment_count = serializers.ReadOnlyField()
     like_count = serializers.ReadOnlyField()
     is_liked = serializers.SerializerMethodField()
+    images = serializers.SerializerMethodField()
     comments = serializers.SerializerMethodField()
     
     class Meta:
@@ -79,21 +179,24 @@ class PostDetailSerializer(serializers.ModelSerializer):
                   'like_count', 'is_liked', 'comments', 'created_at', 'updated_at')
         read_only_fields = ('id', 'author', 'view_count', 'created_at', 'updated_at')
     
+    def to_representation(self, instance):
+        # Load the whole thread first so the post and all its comments share one likes query
+        instance._thread_comments = load_post_comments(instance)
+        viewer_likes(self.context).load(posts=[instance], comments=instance._thread_comments)
+        return super().to_representation(instance)
+    
     def get_is_liked(self, obj):
+        return viewer_likes(self.context).is_liked(obj)
+    
+    def get_images(self, obj):
         request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            content_type = ContentType.objects.get_for_model(Post)
-            return Like.objects.filter(
-                user=request.user,
-                content_type=content_type,
-                object_id=obj.id
-            ).exists()
-        return False
+        return [represent(image, 'large', request) for image in post_images(self.context).get(obj)]
     
     def get_comments(self, obj):
         # Only return top-level comments, replies are nested within them
-        comments = obj.comments.filter(parent=None)
-        return CommentSerializer(comments, many=True, context=self.context).data
+        roots, replies = group_replies(obj._thread_comments)
+        context = dict(self.context, comment_replies=replies)
+        return CommentSerializer(roots, many=True, context=context).data
 
 
 class PostCreateUpdateSerializer(serializers.ModelSerializer):
@@ -104,11 +207,20 @@ class PostCreateUpdateSerializer(serializers.ModelSerializer):
         fields = ('title', 'content', 'category', 'images')
     
     def validate_images(self, value):
-        """验证图片列表"""
+        """验证图片列表（上传接口返回的图片ID，兼容旧的图片URL）"""
         if not isinstance(value, list):
             raise serializers.ValidationError("图片必须是列表格式")
         if len(value) > 9:
             raise serializers.ValidationError("最多只能上传9张图片")
+        image_ids = set()
+        for item in value:
+            if isinstance(item, int) and not isinstance(item, bool):
+                image_ids.add(item)
+            elif not isinstance(item, str):
+                raise serializers.ValidationError("图片必须是图片ID或图片URL")
+        missing = image_ids - set(PostImage.objects.filter(pk__in=image_ids).values_list('pk', flat=True))
+        if missing:
+            raise serializers.ValidationError(f"图片不存在: {sorted(missing)}")
         return value
 
 
@@ -156,3 +268,37 @@ class LikeSerializer(serializers.Serializer):
         
         attrs['content_type_obj'] = content_type
         return attrs
+
+
+class LikeOperationSerializer(serializers.Serializer):
+    """单个批量点赞操作"""
+    content_type = serializers.ChoiceField(choices=['post', 'comment'])
+    object_id = serializers.IntegerField()
+    liked = serializers.BooleanField(default=True)
+
+
+class LikeBulkSerializer(serializers.Serializer):
+    """批量点赞序列化器"""
+    operations = serializers.ListField(
+        child=LikeOperationSerializer(),
+        allow_empty=False,
+        max_length=200
+    )
+
+
+class PostBulkActionSerializer(BulkActionSerializer):
+    """帖子批量操作"""
+    ACTIONS = (
+        ('pin', '置顶'),
+        ('unpin', '取消置顶'),
+        ('lock', '锁定'),
+        ('unlock', '解除锁定'),
+        ('delete', '删除'),
+    )
+
+
+class CommentBulkActionSerializer(BulkActionSerializer):
+    """评论批量操作"""
+    ACTIONS = (
+        ('delete', '删除'),
+    )
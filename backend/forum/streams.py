@@ -0,0 +1,47 @@
+"""
+帖子实时事件流（Server-Sent Events）
+
+需要在 ASGI 服务器下运行（如 ``uvicorn xuanwu_backend.asgi:application``），
+每个连接只占用一个协程；WSGI 下会独占一个工作线程，不建议使用。
+
+Django 4.2 的 ASGI 处理器在流式响应期间不检测客户端断开，因此每个连接最多保持
+FORUM_STREAM_MAX_AGE 秒后由服务器关闭，浏览器的 EventSource 按 retry 间隔自动
+重连；已断开的连接也因此最终被回收，不会一直留在订阅表中。
+"""
+import json
+from contextlib import aclosing
+
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
+
+from .broker import get_broker, post_channel
+from .models import Post
+
+# 连接关闭后客户端重连的等待时间（毫秒）
+RETRY_MS = 3000
+
+
+def _format(event):
+    if event is None:
+        # Heartbeat comment keeps proxies from closing idle connections
+        return ': ping\n\n'
+    data = json.dumps(event, ensure_ascii=False)
+    return f'event: {event["type"]}\ndata: {data}\n\n'
+
+
+async def post_stream(request, pk):
+    """订阅帖子的新评论和点赞数变化"""
+    if not await Post.objects.filter(pk=pk).aexists():
+        raise Http404('帖子不存在')
+
+    async def events():
+        yield f'retry: {RETRY_MS}\n\n'
+        subscription = get_broker().subscribe(post_channel(pk), lifetime=settings.FORUM_STREAM_MAX_AGE)
+        async with aclosing(subscription):
+            async for event in subscription:
+                yield _format(event)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,67 @@
+"""
+评论楼层组装
+
+帖子详情一次取出全部评论，在内存中按顶级评论分组，避免逐条查询回复；
+楼层模式（/comments/?post=<id>&thread=1）按顶级评论分页，每层只内联前 N 条回复，
+其余回复通过游标继续加载。点赞状态由 loaders.ViewerLikes 统一批量加载。
+"""
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Comment
+
+# 楼层模式下每个顶级评论默认内联的回复数及上限
+INLINE_REPLIES = 3
+MAX_INLINE_REPLIES = 20
+
+
+def group_replies(comments):
+    """
+    把评论拆分为顶级评论和 {顶级评论ID: [回复, ...]}
+
+    回复不论嵌套多深都挂在所属顶级评论下，按时间先后排列。
+    """
+    roots = []
+    replies = {}
+    for comment in comments:
+        if comment.root_id is None:
+            roots.append(comment)
+        else:
+            replies.setdefault(comment.root_id, []).append(comment)
+    return roots, replies
+
+
+def load_post_comments(post):
+    """帖子的全部评论（一次查询），按时间先后排列"""
+    return list(
+        Comment.objects.filter(post=post).select_related('author').order_by('created_at', 'id')
+    )
+
+
+def inline_replies(root_ids, limit):
+    """
+    每个顶级评论的前 ``limit`` 条回复及回复总数
+
+    用窗口函数在一条查询里完成分组截断，不会因为某一层回复很多而整层取出；回复
+    总数另用一条分组计数查询，不受截断影响。
+    """
+    replies = Comment.objects.filter(root_id__in=root_ids).select_related('author').annotate(
+        position=Window(RowNumber(), partition_by=F('root_id'), order_by=[F('created_at').asc(), F('id').asc()]),
+    ).filter(position__lte=limit).order_by('root_id', 'created_at', 'id')
+
+    grouped = {}
+    for reply in replies:
+        grouped.setdefault(reply.root_id, []).append(reply)
+    totals = dict(
+        Comment.objects.filter(root_id__in=root_ids).order_by()
+        .values_list('root_id').annotate(count=Count('id'))
+    )
+    return grouped, totals
+
+
+def replies_after(root_id, cursor=None):
+    """某个顶级评论下游标之后的回复（按ID递增的键集分页）"""
+    replies = Comment.objects.filter(root_id=root_id).select_related('author').order_by('id')
+    if cursor is not None:
+        replies = replies.filter(id__gt=cursor)
+    return replies
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import CategoryViewSet, PostViewSet, CommentViewSet
+from .views import CategoryViewSet, PostViewSet, CommentViewSet, LikeViewSet, PostImageViewSet
+from .streams import post_stream
 
 app_name = 'forum'
 
@@ -8,7 +9,10 @@ router = DefaultRouter()
 router.register(r'categories', CategoryViewSet, basename='category')
 router.register(r'posts', PostViewSet, basename='post')
 router.register(r'comments', CommentViewSet, basename='comment')
+router.register(r'likes', LikeViewSet, basename='like')
+router.register(r'images', PostImageViewSet, basename='image')
 
 urlpatterns = [
+    path('posts/<int:pk>/stream/', post_stream, name='post-stream'),
     path('', include(router.urls)),
 ]
@@ -1,24 +1,88 @@
-from rest_framework import viewsets, status, permissions, filters
+from rest_framework import viewsets, mixins, status, permissions, filters
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from django.contrib.contenttypes.models import ContentType
 from django.db.models import Q
-from .models import Category, Post, Comment, Like
+from django.db import transaction
+from django.http import Http404
+from .models import Category, Post, Comment, Like, PostImage
+from . import archive, counters, moderation, threads
+from . import search as fulltext
+from .broker import publish_post_event
+from .loaders import ViewerLikes, viewer_likes
+from .ranking import refresh_hot_scores
+from users import activity
 from .serializers import (
     CategorySerializer,
     PostListSerializer,
     PostDetailSerializer,
     PostCreateUpdateSerializer,
+    PostSearchResultSerializer,
+    PostImageSerializer,
     CommentSerializer,
     CommentCreateSerializer,
-    LikeSerializer
+    LikeSerializer,
+    LikeBulkSerializer,
+    PostBulkActionSerializer,
+    CommentBulkActionSerializer
 )
 
 
+def publish_like_event(obj, delta):
+    """向所属帖子的事件流推送点赞数变化"""
+    if isinstance(obj, Post):
+        post_id, target = obj.id, 'post'
+    else:
+        post_id, target = obj.post_id, 'comment'
+    publish_post_event(post_id, {'type': 'like', 'target': target, 'id': obj.id, 'delta': delta})
+
+
+def like_summary(obj):
+    """点赞动态的摘要：帖子标题或评论内容"""
+    return obj.title if isinstance(obj, Post) else obj.content
+
+
+def set_like(request, obj):
+    """
+    点赞状态变更
+    
+    POST 切换点赞状态；PUT 点赞、DELETE 取消点赞，二者是幂等的，
+    重复提交或客户端重试不会把状态翻转回去。
+    """
+    lookup = {
+        'user': request.user,
+        'content_type': ContentType.objects.get_for_model(type(obj)),
+        'object_id': obj.id,
+    }
+    with transaction.atomic():
+        if request.method == 'PUT':
+            _, created = Like.objects.get_or_create(**lookup)
+            liked, delta = True, int(created)
+        elif request.method == 'DELETE':
+            deleted, _ = Like.objects.filter(**lookup).delete()
+            liked, delta = False, -deleted
+        else:
+            like, created = Like.objects.get_or_create(**lookup)
+            if not created:
+                like.delete()
+            liked, delta = created, 1 if created else -1
+        
+        if delta:
+            counters.like_changed(obj, delta)
+            publish_like_event(obj, delta)
+        if delta > 0:
+            activity.record(request.user, 'like', obj, like_summary(obj))
+    
+    if liked:
+        return Response({'message': '点赞成功', 'liked': True})
+    return Response({'message': '已取消点赞', 'liked': False})
+
+
 class CategoryViewSet(viewsets.ModelViewSet):
     """分类视图集"""
-    queryset = Category.objects.all()
+    queryset = Category.objects.select_related('stats__latest_post').all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     
@@ -33,9 +97,10 @@ class PostViewSet(viewsets.ModelViewSet):
     """帖子视图集"""
     queryset = Post.objects.select_related('author', 'category').all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [fulltext.FullTextSearchFilter, fulltext.RelevanceOrderingFilter]
     search_fields = ['title', 'content']
-    ordering_fields = ['created_at', 'view_count', 'updated_at']
+    ordering_fields = ['created_at', 'view_count', 'updated_at', 'last_activity_at',
+                       'like_count', 'comment_count', 'hot_score']
     ordering = ['-is_pinned', '-created_at']
     
     def get_serializer_class(self):
@@ -61,47 +126,103 @@ class PostViewSet(viewsets.ModelViewSet):
         return queryset
     
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        # Increment view count
-        instance.view_count += 1
-        instance.save(update_fields=['view_count'])
+        try:
+            instance = self.get_object()
+        except Http404:
+            # Threads moved to the archive stay readable at the same URL
+            pk = kwargs[self.lookup_field]
+            archived = archive.load(pk, request) if str(pk).isdigit() else None
+            if archived is None:
+                raise
+            return Response(archived)
+        # Buffer the view; it is written back in batches by counters.view_counter
+        # (or written at once when buffering is off, hence the returned delta)
+        written = counters.view_counter.add(instance.pk)
+        instance.view_count += written + counters.view_counter.pending(instance.pk)
         
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
     
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            post = serializer.save(author=self.request.user)
+            counters.post_created(post)
+            refresh_hot_scores([post.id])
+            activity.record(self.request.user, 'post', post, post.title)
     
     def perform_update(self, serializer):
         # Only author or admin can update
         instance = self.get_object()
         if instance.author != self.request.user and not self.request.user.is_staff:
             raise PermissionDenied('您没有权限修改此帖子')
-        serializer.save()
+        old_category_id = instance.category_id
+        with transaction.atomic():
+            post = serializer.save()
+            if post.category_id != old_category_id:
+                counters.posts_deleted([old_category_id, post.category_id])
     
     def perform_destroy(self, instance):
         # Only author or admin can delete
         if instance.author != self.request.user and not self.request.user.is_staff:
             raise PermissionDenied('您没有权限删除此帖子')
-        instance.delete()
+        with transaction.atomic():
+            instance.delete()
+            counters.posts_deleted([instance.category_id])
     
-    @action(detail=True, methods=['post'])
+    @action(detail=True, methods=['post', 'put', 'delete'])
     def like(self, request, pk=None):
         """点赞或取消点赞帖子"""
-        post = self.get_object()
-        content_type = ContentType.objects.get_for_model(Post)
+        return set_like(request, self.get_object())
+    
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def bulk(self, request):
+        """批量置顶、锁定或删除帖子（仅管理员）"""
+        serializer = PostBulkActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        action_name = serializer.validated_data['action']
+        ids = serializer.validated_data['ids']
         
-        like, created = Like.objects.get_or_create(
-            user=request.user,
-            content_type=content_type,
-            object_id=post.id
-        )
+        summary = {'action': action_name, 'requested': len(ids)}
+        if action_name == 'delete':
+            summary['deleted'] = moderation.delete_posts(ids)
+            summary['affected'] = summary['deleted']['posts']
+        else:
+            summary['affected'] = moderation.update_posts(ids, action_name)
+        return Response(summary)
+    
+    @action(detail=False, methods=['get'])
+    def hot(self, request):
+        """热门帖子（按热度排序）"""
+        posts = self.get_queryset().filter(hot_score__gt=0).order_by('-hot_score')
+        page = self.paginate_queryset(posts)
+        if page is not None:
+            serializer = PostListSerializer(page, many=True, context={'request': request})
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = PostListSerializer(posts, many=True, context={'request': request})
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """全文搜索帖子（按相关度排序，附高亮摘要）"""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': '请输入搜索关键词'}, status=status.HTTP_400_BAD_REQUEST)
         
-        if not created:
-            like.delete()
-            return Response({'message': '已取消点赞', 'liked': False})
+        # Category/author filters apply in the same query as the matched ids, before pagination
+        if fulltext.is_available():
+            posts = fulltext.ranked(self.get_queryset(), query)
+        else:
+            posts = self.get_queryset().filter(Q(title__icontains=query) | Q(content__icontains=query))
         
-        return Response({'message': '点赞成功', 'liked': True})
+        page = self.paginate_queryset(posts)
+        results = page if page is not None else posts[:fulltext.MAX_RESULTS]
+        
+        context = dict(self.get_serializer_context(), search_terms=fulltext.query_terms(query))
+        serializer = PostSearchResultSerializer(results, many=True, context=context)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
     def my_posts(self, request):
@@ -116,10 +237,24 @@ class PostViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
+def int_param(params, name, default=None):
+    """整数查询参数，缺省时返回 default，不是整数时返回 400"""
+    value = params.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({'detail': f'{name} 必须是整数'})
+
+
 class CommentViewSet(viewsets.ModelViewSet):
     """评论视图集"""
     queryset = Comment.objects.select_related('author', 'post', 'parent').all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['created_at', 'like_count']
+    ordering = ['created_at']
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -136,8 +271,82 @@ class CommentViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    def list(self, request, *args, **kwargs):
+        params = request.query_params
+        if params.get('root'):
+            return self._list_replies(request, int_param(params, 'root'), int_param(params, 'after'))
+        if params.get('post') and params.get('thread'):
+            return self._list_thread(request, params['post'])
+        return super().list(request, *args, **kwargs)
+    
+    def _list_thread(self, request, post_id):
+        """楼层模式：按顶级评论分页，每层内联前 N 条回复"""
+        limit = int_param(request.query_params, 'replies', threads.INLINE_REPLIES)
+        if not 1 <= limit <= threads.MAX_INLINE_REPLIES:
+            raise ValidationError({'detail': f'replies 必须在 1 到 {threads.MAX_INLINE_REPLIES} 之间'})
+        
+        roots = Comment.objects.filter(post_id=post_id, parent=None).select_related('author')
+        roots = self.filter_queryset(roots)
+        page = self.paginate_queryset(roots)
+        items = page if page is not None else list(roots)
+        
+        replies, totals = threads.inline_replies([root.id for root in items], limit)
+        context = dict(self.get_serializer_context(), comment_replies=replies)
+        viewer_likes(context).load(
+            comments=items + [reply for group in replies.values() for reply in group]
+        )
+        data = CommentSerializer(items, many=True, context=context).data
+        
+        for item in data:
+            shown = replies.get(item['id'], [])
+            remaining = totals.get(item['id'], 0) - len(shown)
+            item['more_replies'] = None
+            if remaining > 0:
+                cursor = shown[-1].id if shown else None
+                query = f'?root={item["id"]}' + (f'&after={cursor}' if cursor else '')
+                item['more_replies'] = {
+                    'remaining': remaining,
+                    'cursor': cursor,
+                    'next': request.build_absolute_uri(request.path + query),
+                }
+        
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+    
+    def _list_replies(self, request, root_id, cursor):
+        """按游标继续加载某个顶级评论下的回复"""
+        page_size = self.paginator.get_page_size(request) if self.paginator else None
+        replies = threads.replies_after(root_id, cursor)
+        if page_size:
+            replies = list(replies[:page_size + 1])
+            has_more = len(replies) > page_size
+            replies = replies[:page_size]
+        else:
+            replies = list(replies)
+            has_more = False
+        
+        context = dict(self.get_serializer_context(), comment_replies={})
+        next_url = None
+        if has_more:
+            next_url = request.build_absolute_uri(f'{request.path}?root={root_id}&after={replies[-1].id}')
+        return Response({
+            'next': next_url,
+            'results': CommentSerializer(replies, many=True, context=context).data,
+        })
+    
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        with transaction.atomic():
+            comment = serializer.save(author=self.request.user)
+            counters.comment_created(comment)
+            activity.record(self.request.user, 'comment', comment, comment.content)
+            # The request only builds absolute media URLs like the polling endpoints do; is_liked is
+            # viewer-specific, so it is rendered for an anonymous viewer (always false for a new comment)
+            context = {'request': self.request, 'comment_replies': {}, 'viewer_likes': ViewerLikes(None)}
+            publish_post_event(comment.post_id, {
+                'type': 'comment',
+                'comment': CommentSerializer(comment, context=context).data,
+            })
     
     def perform_update(self, serializer):
         # Only author can update
@@ -150,22 +359,123 @@ class CommentViewSet(viewsets.ModelViewSet):
         # Only author or admin can delete
         if instance.author != self.request.user and not self.request.user.is_staff:
             raise PermissionDenied('您没有权限删除此评论')
-        instance.delete()
+        with transaction.atomic():
+            instance.delete()
+            counters.comments_deleted([instance.post_id])
     
-    @action(detail=True, methods=['post'])
+    @action(detail=True, methods=['post', 'put', 'delete'])
     def like(self, request, pk=None):
         """点赞或取消点赞评论"""
-        comment = self.get_object()
-        content_type = ContentType.objects.get_for_model(Comment)
+        return set_like(request, self.get_object())
+    
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def bulk(self, request):
+        """批量删除评论（仅管理员，回复一并删除）"""
+        serializer = CommentBulkActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
         
-        like, created = Like.objects.get_or_create(
-            user=request.user,
-            content_type=content_type,
-            object_id=comment.id
-        )
+        deleted = moderation.delete_comments(ids)
+        return Response({
+            'action': serializer.validated_data['action'],
+            'requested': len(ids),
+            'affected': deleted['comments'],
+            'deleted': deleted,
+        })
+
+
+class LikeViewSet(viewsets.GenericViewSet):
+    """点赞视图集（批量操作）"""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """批量点赞/取消点赞"""
+        serializer = LikeBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
         
-        if not created:
-            like.delete()
-            return Response({'message': '已取消点赞', 'liked': False})
+        # Later operations on the same target win
+        operations = {}
+        for op in serializer.validated_data['operations']:
+            operations[(op['content_type'], op['object_id'])] = op['liked']
         
-        return Response({'message': '点赞成功', 'liked': True})
+        models = {'post': Post, 'comment': Comment}
+        content_types = ContentType.objects.get_for_models(Post, Comment)
+        existing = {
+            name: set(model.objects.filter(
+                pk__in=[object_id for (kind, object_id) in operations if kind == name]
+            ).values_list('pk', flat=True))
+            for name, model in models.items()
+        }
+        
+        results, errors = [], []
+        to_like, to_unlike = [], Q(pk__in=[])
+        for (kind, object_id), liked in operations.items():
+            if object_id not in existing[kind]:
+                errors.append({'content_type': kind, 'object_id': object_id, 'error': f'{kind} 不存在'})
+                continue
+            content_type = content_types[models[kind]]
+            if liked:
+                to_like.append(Like(user=request.user, content_type=content_type, object_id=object_id))
+            else:
+                to_unlike |= Q(content_type=content_type, object_id=object_id)
+            results.append({'content_type': kind, 'object_id': object_id, 'liked': liked})
+        
+        targets = {kind: [r['object_id'] for r in results if r['content_type'] == kind] for kind in models}
+        with transaction.atomic():
+            already_liked = set(Like.objects.filter(
+                Q(content_type=content_types[Post], object_id__in=targets['post']) |
+                Q(content_type=content_types[Comment], object_id__in=targets['comment']),
+                user=request.user
+            ).values_list('content_type_id', 'object_id'))
+            Like.objects.bulk_create(to_like, ignore_conflicts=True)
+            Like.objects.filter(to_unlike, user=request.user).delete()
+            # Recount from the likes table so conflicts and no-op deletes cannot skew counters
+            counters.refresh_counters(post_ids=targets['post'], comment_ids=targets['comment'])
+            
+            changed = [
+                r for r in results
+                if r['liked'] != ((content_types[models[r['content_type']]].id, r['object_id']) in already_liked)
+            ]
+            comment_posts = dict(Comment.objects.filter(
+                pk__in=[r['object_id'] for r in changed if r['content_type'] == 'comment']
+            ).values_list('pk', 'post_id'))
+            for r in changed:
+                post_id = r['object_id'] if r['content_type'] == 'post' else comment_posts[r['object_id']]
+                publish_post_event(post_id, {
+                    'type': 'like',
+                    'target': r['content_type'],
+                    'id': r['object_id'],
+                    'delta': 1 if r['liked'] else -1,
+                })
+            
+            liked = {
+                kind: [r['object_id'] for r in changed if r['content_type'] == kind and r['liked']]
+                for kind in models
+            }
+            liked_objects = [
+                obj
+                for kind, field in (('post', 'title'), ('comment', 'content'))
+                for obj in models[kind].objects.only(field).in_bulk(liked[kind]).values()
+            ]
+            activity.record_many(request.user, 'like', [(obj, like_summary(obj)) for obj in liked_objects])
+        
+        return Response({'results': results, 'errors': errors})
+
+
+class PostImageViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """帖子图片视图集（上传和查询处理状态）"""
+    queryset = PostImage.objects.all()
+    serializer_class = PostImageSerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    parser_classes = [MultiPartParser, FormParser]
+    
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(uploader=request.user)
+        # An identical image already exists: return it instead of storing a copy
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED if serializer.created else status.HTTP_200_OK
+        )
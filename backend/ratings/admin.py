@@ -1,5 +1,72 @@
-from django.contrib import admin
-from .models import Tag, Teacher, Canteen, Rating, HelpfulMark
+from django import forms
+from django.contrib import admin, messages
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from .models import Tag, Department, Building, Teacher, Canteen, Rating, HelpfulMark
+from . import aggregates, leaderboards, terms
+from .importers import IMPORTS, ImportFormatError, import_file
+
+# 导入后在页面上列出的行错误数
+SHOWN_IMPORT_ERRORS = 20
+
+
+class ImportForm(forms.Form):
+    file = forms.FileField(label='文件', help_text='CSV 或 XLSX')
+
+
+class ImportAdminMixin:
+    """在列表页增加“批量导入”入口，import_kind 为 importers.IMPORTS 中的类型"""
+    import_kind = None
+    change_list_template = 'admin/ratings/change_list_import.html'
+    
+    def get_urls(self):
+        opts = self.model._meta
+        return [
+            path(
+                'import/',
+                self.admin_site.admin_view(self.import_view),
+                name=f'{opts.app_label}_{opts.model_name}_import'
+            ),
+        ] + super().get_urls()
+    
+    def import_view(self, request):
+        if not self.has_add_permission(request) or not self.has_change_permission(request):
+            return redirect('admin:index')
+        
+        form = ImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                result = import_file(self.import_kind, upload, upload.name)
+            except ImportFormatError as exc:
+                form.add_error('file', str(exc))
+            else:
+                self.message_user(
+                    request,
+                    f'新增 {result["created"]} 条，更新 {result["updated"]} 条，失败 {result["failed"]} 行',
+                    messages.SUCCESS if not result['failed'] else messages.WARNING
+                )
+                for line, error in result['errors'][:SHOWN_IMPORT_ERRORS]:
+                    self.message_user(request, f'第 {line} 行: {error}', messages.ERROR)
+                if result['failed'] > SHOWN_IMPORT_ERRORS:
+                    self.message_user(
+                        request, f'其余 {result["failed"] - SHOWN_IMPORT_ERRORS} 行错误未列出', messages.ERROR
+                    )
+                opts = self.model._meta
+                return redirect(f'admin:{opts.app_label}_{opts.model_name}_changelist')
+        
+        model, key, fields = IMPORTS[self.import_kind]
+        opts = model._meta
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': opts,
+            'title': f'批量导入{opts.verbose_name}',
+            'form': form,
+            'columns': [(field, opts.get_field(field).verbose_name) for field in fields],
+            'natural_key': '+'.join(str(opts.get_field(field).verbose_name) for field in key),
+        }
+        return TemplateResponse(request, 'admin/ratings/import_form.html', context)
 
 
 @admin.register(Tag)
@@ -11,10 +78,33 @@ class TagAdmin(admin.ModelAdmin):
     ordering = ['category', 'order', 'name']
 
 
+class DirectoryAdmin(admin.ModelAdmin):
+    """院系/食堂目录由教师和食堂窗口的文本字段维护，后台只读"""
+    search_fields = ['name']
+    ordering = ['name']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Department)
+class DepartmentAdmin(DirectoryAdmin):
+    list_display = ['name', 'teacher_count']
+
+
+@admin.register(Building)
+class BuildingAdmin(DirectoryAdmin):
+    list_display = ['name', 'canteen_count']
+
+
 @admin.register(Teacher)
-class TeacherAdmin(admin.ModelAdmin):
+class TeacherAdmin(ImportAdminMixin, admin.ModelAdmin):
+    import_kind = 'teacher'
     list_display = ['name', 'department', 'title', 'created_at']
-    list_filter = ['department', 'title']
+    list_filter = ['department_entry', 'title']
     search_fields = ['name', 'department', 'courses']
     readonly_fields = ['created_at', 'updated_at']
     ordering = ['department', 'name']
@@ -31,12 +121,18 @@ class TeacherAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and 'department' in form.changed_data:
+            leaderboards.target_changed(obj)
 
 
 @admin.register(Canteen)
-class CanteenAdmin(admin.ModelAdmin):
+class CanteenAdmin(ImportAdminMixin, admin.ModelAdmin):
+    import_kind = 'canteen'
     list_display = ['name', 'canteen_building', 'location', 'price_range', 'created_at']
-    list_filter = ['canteen_building']
+    list_filter = ['building_entry']
     search_fields = ['name', 'specialties']
     readonly_fields = ['created_at', 'updated_at']
     ordering = ['canteen_building', 'name']
@@ -53,6 +149,11 @@ class CanteenAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and 'canteen_building' in form.changed_data:
+            leaderboards.target_changed(obj)
 
 
 @admin.register(Rating)
@@ -63,6 +164,33 @@ class RatingAdmin(admin.ModelAdmin):
     readonly_fields = ['helpful_count', 'created_at', 'updated_at']
     filter_horizontal = ['tags']
     ordering = ['-created_at']
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if not change:
+            aggregates.rating_created(obj)
+            return
+        changed = set(form.changed_data)
+        if {'score', 'content_type', 'object_id'} & changed:
+            aggregates.refresh([
+                (form.initial['content_type'], form.initial['object_id']),
+                (obj.content_type_id, obj.object_id),
+            ])
+        if {'comment', 'content_type', 'object_id'} & changed:
+            terms.apply([
+                (form.initial['content_type'], form.initial['object_id'], form.initial['comment'], ''),
+                (obj.content_type_id, obj.object_id, '', obj.comment),
+            ])
+    
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        aggregates.rating_deleted(obj)
+    
+    def delete_queryset(self, request, queryset):
+        rows = list(queryset.values_list('content_type_id', 'object_id', 'comment'))
+        super().delete_queryset(request, queryset)
+        aggregates.refresh([(content_type_id, object_id) for content_type_id, object_id, _ in rows])
+        terms.apply([(content_type_id, object_id, comment, '') for content_type_id, object_id, comment in rows])
 
 
 @admin.register(HelpfulMark)
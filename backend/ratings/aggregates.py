@@ -0,0 +1,126 @@
+"""
+评价聚合维护
+
+每个评价对象在 RatingAggregate 中保存评价数、总分、平均分和 1~5 星分布，在
+RatingMonthly 中按评价的创建月份保存同样的计数。评价的新增、修改和删除在同一
+事务中调用这里的函数，以 F() 表达式增量更新；列表页关联聚合表筛选和排序，
+趋势图只读取几十行月度汇总，都不再逐行 aggregate/count。后台批量删除等绕过
+增量更新的写路径用 refresh 按评价表重算。聚合变化后同步刷新排行榜条目（见
+leaderboards）；单条评价的变化同时调整评论词频（见 terms）。
+"""
+from django.db.models import Case, Count, DateField, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, TruncMonth
+from django.utils import timezone
+
+from .models import Rating, RatingAggregate, RatingMonthly
+from . import leaderboards, terms
+
+SCORES = range(1, 6)
+
+
+def _average():
+    return Case(
+        When(count=0, then=Value(0.0)),
+        default=Cast(F('total'), FloatField()) / F('count'),
+        output_field=FloatField()
+    )
+
+
+def month_of(created_at):
+    """评价计入的月份（本地时间的当月 1 日）"""
+    return timezone.localtime(created_at).date().replace(day=1)
+
+
+def _increment(model, lookup, changes):
+    # Create the row on first use, then apply the deltas in one UPDATE
+    model.objects.bulk_create([model(**lookup)], ignore_conflicts=True)
+    rows = model.objects.filter(**lookup)
+    rows.update(**changes)
+    return rows
+
+
+def apply(content_type_id, object_id, old_score=None, new_score=None, month=None):
+    """
+    按一次评价变化调整聚合
+
+    新增为 (None, score)，删除为 (score, None)，修改评分为 (旧评分, 新评分)。
+    month 为评价计入的月份，不为 None 时同时调整月度汇总。
+    """
+    if old_score == new_score:
+        return
+    changes = {'total': F('total') + (new_score or 0) - (old_score or 0)}
+    count_delta = (new_score is not None) - (old_score is not None)
+    if count_delta:
+        changes['count'] = F('count') + count_delta
+    if old_score is not None:
+        changes[f's{old_score}'] = F(f's{old_score}') - 1
+    if new_score is not None:
+        changes[f's{new_score}'] = F(f's{new_score}') + 1
+
+    target = {'content_type_id': content_type_id, 'object_id': object_id}
+    aggregate = _increment(RatingAggregate, target, changes)
+    # The mean is derived from the already-updated columns, hence a second statement
+    aggregate.update(average=_average())
+    if month is not None:
+        _increment(RatingMonthly, {**target, 'month': month}, changes)
+    leaderboards.refresh([(content_type_id, object_id)])
+
+
+def rating_created(rating):
+    apply(rating.content_type_id, rating.object_id, new_score=rating.score, month=month_of(rating.created_at))
+    terms.apply([(rating.content_type_id, rating.object_id, '', rating.comment)])
+
+
+def rating_updated(rating, old_score, old_comment):
+    apply(
+        rating.content_type_id, rating.object_id,
+        old_score=old_score, new_score=rating.score, month=month_of(rating.created_at)
+    )
+    terms.apply([(rating.content_type_id, rating.object_id, old_comment, rating.comment)])
+
+
+def rating_deleted(rating):
+    apply(rating.content_type_id, rating.object_id, old_score=rating.score, month=month_of(rating.created_at))
+    terms.apply([(rating.content_type_id, rating.object_id, rating.comment, '')])
+
+
+def _score_counts():
+    return {
+        'count': Count('id'),
+        'total': Sum('score'),
+        **{f's{score}': Count('id', filter=Q(score=score)) for score in SCORES}
+    }
+
+
+def refresh(targets=None):
+    """
+    按评价表重算聚合和月度汇总
+
+    targets 为 [(content_type_id, object_id), ...]，为 None 时重算全部评价对象。
+    没有评价的对象不保留聚合行（读取时按 0 处理）。返回写入的聚合行数。
+    """
+    ratings = Rating.objects.all()
+    aggregates = RatingAggregate.objects.all()
+    monthly = RatingMonthly.objects.all()
+    if targets is not None:
+        scope = Q(pk__in=[])
+        for content_type_id, object_id in set(targets):
+            scope |= Q(content_type_id=content_type_id, object_id=object_id)
+        ratings = ratings.filter(scope)
+        aggregates = aggregates.filter(scope)
+        monthly = monthly.filter(scope)
+
+    rows = ratings.order_by().values('content_type_id', 'object_id').annotate(**_score_counts())
+    aggregates.delete()
+    written = len(RatingAggregate.objects.bulk_create([
+        RatingAggregate(average=row['total'] / row['count'], **row) for row in rows
+    ]))
+
+    months = ratings.order_by().annotate(
+        month=TruncMonth('created_at', output_field=DateField())
+    ).values('content_type_id', 'object_id', 'month').annotate(**_score_counts())
+    monthly.delete()
+    RatingMonthly.objects.bulk_create([RatingMonthly(**row) for row in months])
+
+    leaderboards.refresh(targets)
+    return written
@@ -0,0 +1,123 @@
+"""
+批量提交评价
+
+期末“给所有老师打分”时一个用户一次提交几十条评价。逐条创建每条要查询评价对象、
+检查是否已评价、校验标签、插入评价再写标签，约 7 次往返。这里对整批评价：按类型
+各用一次查询取回评价对象，一次查询取回已有评价，标签按进程内缓存校验；通过校验
+的评价一次 bulk_create 插入，标签关联再一次批量插入，评价聚合按受影响的对象集合
+重算。某一条校验失败只在结果中报告，不影响其他评价。
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from users import activity
+
+from .models import Teacher, Canteen, Rating
+from .serializers import RatingFieldsSerializer
+from .tag_registry import registry as tag_registry
+from . import aggregates, terms
+
+# 评价类型 -> (模型, 标签分类)
+TARGETS = {'teacher': (Teacher, 'TEACHER'), 'canteen': (Canteen, 'CANTEEN')}
+
+
+def _message(errors):
+    return '；'.join(
+        f'{field}: {" ".join(str(message) for message in messages)}' if field != 'non_field_errors'
+        else ' '.join(str(message) for message in messages)
+        for field, messages in errors.items()
+    )
+
+
+def _error(index, item, message):
+    return {
+        'index': index,
+        'target_type': item.get('target_type'),
+        'target_id': item.get('target_id'),
+        'error': message,
+    }
+
+
+def submit(user, items):
+    """
+    为 user 批量创建评价
+
+    items 为提交的评价列表。返回 (results, errors)：results 为
+    [{'index', 'target_type', 'target_id', 'id'}, ...]，errors 为
+    [{'index', 'target_type', 'target_id', 'error'}, ...]，index 是在 items 中的位置。
+    """
+    errors, valid = [], []
+    for index, item in enumerate(items):
+        serializer = RatingFieldsSerializer(data=item)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            errors.append(_error(index, item, _message(serializer.errors)))
+
+    content_types = ContentType.objects.get_for_models(*(model for model, _ in TARGETS.values()))
+    targets, rated_scope = {}, Q(pk__in=[])
+    for kind, (model, _) in TARGETS.items():
+        ids = {attrs['target_id'] for _, attrs in valid if attrs['target_type'] == kind}
+        targets[kind] = model.objects.in_bulk(ids) if ids else {}
+        if ids:
+            rated_scope |= Q(content_type=content_types[model], object_id__in=ids)
+    rated = set(Rating.objects.filter(rated_scope, user=user).values_list('content_type_id', 'object_id'))
+
+    accepted, seen = [], set()
+    for index, attrs in valid:
+        kind = attrs['target_type']
+        model, category = TARGETS[kind]
+        key = (content_types[model].id, attrs['target_id'])
+        target = targets[kind].get(attrs['target_id'])
+        tag_ids = attrs.get('tags', [])
+        if target is None:
+            message = f'{kind} 不存在'
+        elif key in rated:
+            message = '您已经评价过该对象'
+        elif key in seen:
+            message = '同一对象在本次提交中重复'
+        elif not tag_registry.valid(tag_ids, category):
+            message = '部分标签不存在或不适用于该类型'
+        else:
+            seen.add(key)
+            rating = Rating(
+                user=user,
+                content_type=content_types[model],
+                object_id=target.pk,
+                score=attrs['score'],
+                comment=attrs.get('comment', ''),
+                is_anonymous=attrs['is_anonymous'],
+            )
+            accepted.append((index, kind, target, rating, tag_ids))
+            continue
+        errors.append(_error(index, attrs, message))
+
+    if accepted:
+        try:
+            with transaction.atomic():
+                Rating.objects.bulk_create([rating for _, _, _, rating, _ in accepted])
+                Through = Rating.tags.through
+                Through.objects.bulk_create([
+                    Through(rating_id=rating.pk, tag_id=tag_id)
+                    for _, _, _, rating, tag_ids in accepted
+                    for tag_id in tag_registry.ordered(tag_ids)
+                ])
+                aggregates.refresh([(rating.content_type_id, rating.object_id) for _, _, _, rating, _ in accepted])
+                terms.apply([
+                    (rating.content_type_id, rating.object_id, '', rating.comment) for _, _, _, rating, _ in accepted
+                ])
+                activity.record_many(user, 'rating', [
+                    (target, f'{target} {rating.score}星') for _, _, target, rating, _ in accepted
+                ])
+        except IntegrityError:
+            # A concurrent request rated one of the same targets between the check and the insert
+            raise ValidationError({'detail': '部分评价已被提交，请刷新后重试'})
+
+    results = [
+        {'index': index, 'target_type': kind, 'target_id': target.pk, 'id': rating.pk}
+        for index, kind, target, rating, _ in accepted
+    ]
+    errors.sort(key=lambda error: error['index'])
+    return results, errors
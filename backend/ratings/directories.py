@@ -0,0 +1,72 @@
+"""
+院系和食堂目录
+
+教师的所属学院/部门、食堂窗口的所属食堂是自由文本。Department 和 Building 为每个
+不同的名称保存一行，教师和食堂窗口通过外键关联，并保存各自的教师数/窗口数：
+前端的院系和食堂选择器直接读取目录表（一次小查询），不再拉取全部教师和窗口去重；
+按院系/食堂筛选走外键索引。
+
+文本字段仍是数据来源（排行榜分榜、导入的自然键都使用它），关联和计数由保存/
+删除时的信号和批量导入维护；计数按外键重新统计受影响的目录行，而不是增减，
+并发修改不会累积误差。
+"""
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from xuanwu_backend.bulk import chunked
+
+from .models import Teacher, Canteen, Department, Building
+
+# 模型 -> (文本字段, 外键字段, 目录模型, 计数字段)
+DIRECTORIES = {
+    Teacher: ('department', 'department_entry', Department, 'teacher_count'),
+    Canteen: ('canteen_building', 'building_entry', Building, 'canteen_count'),
+}
+
+
+def clean_name(value):
+    """目录中的名称（合并首尾和连续空白）"""
+    return ' '.join((value or '').split())
+
+
+def _resolve(entry_model, names):
+    """名称 -> 目录行ID，不存在的目录行被创建"""
+    ids = {}
+    for chunk in chunked(names):
+        ids.update(entry_model.objects.filter(name__in=chunk).values_list('name', 'id'))
+    missing = [name for name in names if name not in ids]
+    if missing:
+        entry_model.objects.bulk_create([entry_model(name=name) for name in missing], ignore_conflicts=True)
+        for chunk in chunked(missing):
+            ids.update(entry_model.objects.filter(name__in=chunk).values_list('name', 'id'))
+    return ids
+
+
+def recount(model, entry_ids=None):
+    """重新统计目录行的对象数，entry_ids 为 None 时统计全部"""
+    _, fk, entry_model, count_field = DIRECTORIES[model]
+    count = model.objects.filter(**{fk: OuterRef('pk')}).order_by().values(fk).annotate(n=Count('pk')).values('n')
+    counts = {count_field: Coalesce(Subquery(count), Value(0))}
+    if entry_ids is None:
+        entry_model.objects.update(**counts)
+        return
+    for chunk in chunked({entry_id for entry_id in entry_ids if entry_id is not None}):
+        entry_model.objects.filter(pk__in=chunk).update(**counts)
+
+
+def link(model, objs):
+    """按文本字段设置一组教师或食堂窗口的目录外键，并更新受影响目录行的计数"""
+    field, fk, entry_model, _ = DIRECTORIES[model]
+    objs = [obj for obj in objs if obj.pk is not None]
+    ids = _resolve(entry_model, {clean_name(getattr(obj, field)) for obj in objs} - {''})
+
+    changed, affected = [], set()
+    for obj in objs:
+        old = getattr(obj, f'{fk}_id')
+        new = ids.get(clean_name(getattr(obj, field)))
+        if old != new:
+            setattr(obj, f'{fk}_id', new)
+            changed.append(obj)
+            affected.update((old, new))
+    model.objects.bulk_update(changed, [fk])
+    recount(model, affected)
@@ -0,0 +1,92 @@
+"""
+评价的有用标记
+
+热门评价会在短时间内收到大量有用标记。如果每次标记都在事务中 F() 更新同一行
+Rating.helpful_count，这一行就成了锁热点（SQLite 只有一个写者，所有点击都要排队）。
+因此写路径只插入或删除 HelpfulMark 一行，有用数的变化交给写回缓冲：同一评价在
+一个刷写周期内的增减合并为一个净增量，批量写回。返回给客户端的有用数加上尚未
+写回的增量。进程异常退出会丢失未写回的增量，可用 reconcile_helpful_counts 命令
+按标记表重算。
+"""
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from xuanwu_backend.bulk import chunked
+from xuanwu_backend.buffers import WriteBehindCounter
+
+from .models import Rating, HelpfulMark
+
+# 评价有用数缓冲：每个刷写周期对每条评价只产生一次写入
+helpful_counter = WriteBehindCounter(Rating, 'helpful_count', settings.RATINGS_HELPFUL_FLUSH_INTERVAL)
+
+
+def helpful_count(rating):
+    """评价的有用数（含尚未写回的增量）"""
+    return rating.helpful_count + helpful_counter.pending(rating.pk)
+
+
+def set_helpful(user, rating, helpful):
+    """
+    设置用户对评价的有用标记，返回有用数的变化（-1、0 或 1）
+
+    重复设置为同一状态不产生变化，因此是幂等的。不缓冲时变化直接写库，同时计入
+    rating.helpful_count，helpful_count(rating) 因此总是包含这次标记。
+    """
+    if helpful:
+        _, created = HelpfulMark.objects.get_or_create(user=user, rating=rating)
+        delta = int(created)
+    else:
+        deleted, _ = HelpfulMark.objects.filter(user=user, rating=rating).delete()
+        delta = -deleted
+    if delta:
+        rating.helpful_count += helpful_counter.add(rating.pk, delta)
+    return delta
+
+
+def bulk_set(user, operations):
+    """
+    批量设置有用标记
+
+    operations 为 {rating_id: helpful}，评价必须存在。返回状态发生变化的评价ID。
+    先一次查出已有标记跳过不需要变化的评价，其余逐条写入：有用数的增减以每条
+    INSERT/DELETE 的实际结果为准，并发请求对同一评价的重复标记不会重复计数。
+    """
+    with transaction.atomic():
+        already = set(HelpfulMark.objects.filter(
+            user=user, rating_id__in=list(operations)
+        ).values_list('rating_id', flat=True))
+        deltas = {}
+        for rating_id, helpful in operations.items():
+            if helpful and rating_id not in already:
+                try:
+                    # A savepoint keeps the outer transaction usable after a duplicate insert
+                    with transaction.atomic():
+                        HelpfulMark.objects.create(user=user, rating_id=rating_id)
+                except IntegrityError:
+                    continue  # Marked by a concurrent request, which counted it
+                deltas[rating_id] = 1
+            elif not helpful and rating_id in already:
+                deleted, _ = HelpfulMark.objects.filter(user=user, rating_id=rating_id).delete()
+                if deleted:
+                    deltas[rating_id] = -deleted
+
+    for rating_id, delta in deltas.items():
+        helpful_counter.add(rating_id, delta)
+    return list(deltas)
+
+
+def reconcile(rating_ids=None):
+    """先写回缓冲的增量，再按标记表重算有用数，返回更新的评价数"""
+    helpful_counter.flush()
+    marks = HelpfulMark.objects.filter(rating=OuterRef('pk')).order_by().values('rating').annotate(
+        c=Count('pk')
+    ).values('c')
+    count = Coalesce(Subquery(marks), Value(0))
+    if rating_ids is None:
+        return Rating.objects.update(helpful_count=count)
+    return sum(
+        Rating.objects.filter(pk__in=chunk).update(helpful_count=count)
+        for chunk in chunked(rating_ids)
+    )
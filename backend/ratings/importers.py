@@ -0,0 +1,189 @@
+"""
+教师和食堂窗口批量导入
+
+每学期开始时按 CSV 或 XLSX 文件导入教师和食堂窗口。文件逐行流式读取，每
+CHUNK_SIZE 行为一块：按自然键（教师为姓名+院系，食堂窗口为所属食堂+名称）一次
+查出已有对象，已有的 bulk_update、新的 bulk_create，每块在各自的事务中提交，内存
+占用与文件大小无关。
+
+表头可以使用字段名（name）或字段的中文名称（姓名），不识别的列被忽略。某一行
+校验失败只记录该行的错误，不影响其他行；文件中同一自然键出现多次时以最后一行
+为准。已有对象的空单元格保留原值。自然键按 directories.clean_name 规范化后比较，
+库中名称带多余空白的对象也能匹配上。
+"""
+import codecs
+import csv
+import os
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from courses import catalog
+from xuanwu_backend.bulk import CHUNK_SIZE, chunked
+
+from .models import Teacher, Canteen
+from . import directories
+
+# 类型 -> (模型, 自然键, 可导入的字段)
+IMPORTS = {
+    'teacher': (Teacher, ('name', 'department'), ('name', 'department', 'title', 'courses', 'bio', 'email', 'office')),
+    'canteen': (Canteen, ('canteen_building', 'name'), (
+        'name', 'canteen_building', 'location', 'description', 'specialties', 'price_range', 'opening_hours'
+    )),
+}
+
+# 结果中最多保留的行错误数（超出部分只计数）
+MAX_REPORTED_ERRORS = 1000
+
+FORMATS = ('.csv', '.xlsx')
+
+
+class ImportFormatError(Exception):
+    """文件格式无法读取"""
+
+
+def _csv_rows(file):
+    # Lines are decoded as they are read; utf-8-sig drops the BOM Excel writes
+    reader = csv.reader(codecs.iterdecode(file, 'utf-8-sig'))
+    try:
+        for row in reader:
+            yield row
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise ImportFormatError(f'第 {reader.line_num} 行无法解析: {exc}')
+
+
+def _xlsx_rows(file):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFormatError('读取 XLSX 文件需要安装 openpyxl（pip install openpyxl），或将文件另存为 CSV')
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except Exception as exc:
+        raise ImportFormatError(f'无法打开 XLSX 文件: {exc}')
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield ['' if value is None else str(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def read_rows(file, filename):
+    """按扩展名逐行读取以二进制模式打开的文件，返回 (行号, 单元格列表) 的迭代器"""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == '.csv':
+        rows = _csv_rows(file)
+    elif ext == '.xlsx':
+        rows = _xlsx_rows(file)
+    else:
+        raise ImportFormatError(f'不支持的文件类型 {ext or filename}，仅支持 {"、".join(FORMATS)}')
+    return enumerate(rows, start=1)
+
+
+def _columns(header, model, fields):
+    """表头各列对应的字段（不识别的列为 None）"""
+    names = {}
+    for field in fields:
+        names[field] = field
+        names[str(model._meta.get_field(field).verbose_name)] = field
+    return [names.get(cell.strip()) for cell in header]
+
+
+def _parse(rows, kind):
+    """校验表头，逐行产生 (行号, {字段: 值})"""
+    model, key, fields = IMPORTS[kind]
+    header = next(rows, None)
+    if header is None:
+        raise ImportFormatError('文件为空')
+    columns = _columns(header[1], model, fields)
+    missing = [str(model._meta.get_field(field).verbose_name) for field in key if field not in columns]
+    if missing:
+        raise ImportFormatError(f'缺少必需的列: {"、".join(missing)}')
+
+    for line, cells in rows:
+        values = {}
+        for field, cell in zip(columns, cells):
+            if field is not None:
+                values[field] = cell.strip()
+        if any(values.values()):  # Skip blank lines
+            yield line, values
+
+
+def _natural_key(key, get):
+    return tuple(directories.clean_name(get(field)) for field in key)
+
+
+def _apply_chunk(model, key, fields, chunk, result):
+    # Later rows with the same natural key win
+    latest = {}
+    for line, values in chunk:
+        latest[_natural_key(key, lambda name: values.get(name, ''))] = (line, values)
+
+    # Candidates are found through the directory foreign key, whose names are already
+    # normalized (the directory field is required, so every stored object has one);
+    # the remaining key fields are compared after normalizing in Python
+    field, fk, _, _ = directories.DIRECTORIES[model]
+    position = key.index(field)
+    names = {natural_key[position] for natural_key in latest} - {''}
+    existing = {}
+    for obj in model.objects.filter(**{f'{fk}__name__in': names}).order_by('-pk'):
+        # Several legacy rows may share a key; the oldest one is updated
+        existing[_natural_key(key, lambda name: getattr(obj, name))] = obj
+
+    to_create, to_update, updated_fields = [], [], set()
+    now = timezone.now()
+    for natural_key, (line, values) in latest.items():
+        obj = existing.get(natural_key)
+        if obj is None:
+            obj = model(**values)
+        else:
+            values = {field: value for field, value in values.items() if value}
+            for field, value in values.items():
+                setattr(obj, field, value)
+        try:
+            obj.full_clean(exclude=[f.name for f in model._meta.fields if f.name not in fields], validate_unique=False)
+        except ValidationError as exc:
+            _error(result, model, line, exc)
+            continue
+        if obj.pk is None:
+            to_create.append(obj)
+        else:
+            obj.updated_at = now
+            updated_fields.update(values)
+            to_update.append(obj)
+
+    with transaction.atomic():
+        model.objects.bulk_create(to_create)
+        if to_update:
+            model.objects.bulk_update(to_update, sorted(updated_fields) + ['updated_at'])
+        # Bulk writes skip the post_save signals that maintain these links
+        directories.link(model, to_create + to_update)
+        if model is Teacher:
+            catalog.link_teachers(to_create + to_update)
+    result['created'] += len(to_create)
+    result['updated'] += len(to_update)
+
+
+def _error(result, model, line, exc):
+    result['failed'] += 1
+    if len(result['errors']) < MAX_REPORTED_ERRORS:
+        messages = []
+        for field, errors in exc.message_dict.items():
+            label = model._meta.get_field(field).verbose_name if field != '__all__' else '数据'
+            messages.append(f'{label}: {"；".join(errors)}')
+        result['errors'].append((line, '，'.join(messages)))
+
+
+def import_file(kind, file, filename, batch_size=CHUNK_SIZE):
+    """
+    导入教师（kind='teacher'）或食堂窗口（kind='canteen'）
+
+    返回 {'created': n, 'updated': n, 'failed': n, 'errors': [(行号, 错误), ...]}。
+    文件无法读取时抛出 ImportFormatError。
+    """
+    model, key, fields = IMPORTS[kind]
+    result = {'created': 0, 'updated': 0, 'failed': 0, 'errors': []}
+    for chunk in chunked(_parse(read_rows(file, filename), kind), batch_size):
+        _apply_chunk(model, key, fields, chunk, result)
+    return result
@@ -0,0 +1,97 @@
+"""
+评价排行榜
+
+教师按院系、食堂窗口按所属食堂分榜。直接按平均分排序会让只有一条五星评价的
+对象排在上百条 4.8 分的对象前面，因此排名使用贝叶斯平均：
+
+    score = (C * m + 总分) / (C + 评价数)
+
+m 为先验平均分（RATINGS_LEADERBOARD_PRIOR_MEAN），C 为先验权重
+（RATINGS_LEADERBOARD_PRIOR_WEIGHT），评价越少越向 m 收缩。m 取固定值而不是全局
+平均分，这样一条评价变化只影响它自己的条目。条目随评价聚合在同一事务中刷新，
+榜单按 (content_type, board, -score) 索引直接取前 N 名。分榜名称与院系/食堂目录
+一样按 directories.clean_name 规范化，排行榜和列表筛选对同一院系给出相同的结果。
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+
+from .directories import clean_name
+from .models import Teacher, Canteen, LeaderboardEntry
+
+# 分榜字段
+BOARDS = {Teacher: 'department', Canteen: 'canteen_building'}
+
+# 榜单默认和最多返回的条目数
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+
+
+def bayesian_average(count, total):
+    weight = settings.RATINGS_LEADERBOARD_PRIOR_WEIGHT
+    return (settings.RATINGS_LEADERBOARD_PRIOR_MEAN * weight + total) / (weight + count)
+
+
+def refresh(targets=None):
+    """
+    按评价聚合重算排行榜条目
+
+    targets 为 [(content_type_id, object_id), ...]，为 None 时重算全部。没有评价的
+    对象不上榜。返回写入的条目数。
+    """
+    wanted = None
+    if targets is not None:
+        wanted = defaultdict(set)
+        for content_type_id, object_id in targets:
+            wanted[content_type_id].add(object_id)
+
+    written = 0
+    for model, field in BOARDS.items():
+        content_type = ContentType.objects.get_for_model(model)
+        entries = LeaderboardEntry.objects.filter(content_type=content_type)
+        objects = model.objects.filter(rating_aggregate__count__gt=0)
+        if wanted is not None:
+            ids = wanted.get(content_type.id)
+            if not ids:
+                continue
+            entries = entries.filter(object_id__in=ids)
+            objects = objects.filter(pk__in=ids)
+
+        rows = objects.values_list(
+            'pk', field, 'rating_aggregate__count', 'rating_aggregate__total', 'rating_aggregate__average'
+        )
+        entries.delete()
+        written += len(LeaderboardEntry.objects.bulk_create([
+            LeaderboardEntry(
+                content_type=content_type,
+                object_id=pk,
+                board=clean_name(board),
+                score=bayesian_average(count, total),
+                average=average,
+                count=count,
+            )
+            for pk, board, count, total, average in rows
+        ]))
+    return written
+
+
+def target_changed(obj):
+    """评价对象的分榜字段可能变化后调用"""
+    refresh([(ContentType.objects.get_for_model(obj).id, obj.pk)])
+
+
+def top(model, board=None, limit=DEFAULT_LIMIT):
+    """
+    榜单前 limit 名，返回 [(条目, 评价对象), ...]
+
+    board 为空时是该类型的总榜，否则按规范化后的名称匹配。评价对象附带
+    with_rating_stats 的注解。
+    """
+    entries = LeaderboardEntry.objects.filter(content_type=ContentType.objects.get_for_model(model))
+    board = clean_name(board)
+    if board:
+        entries = entries.filter(board=board)
+    entries = list(entries.order_by('-score', 'object_id')[:limit])
+    objects = model.objects.with_rating_stats().in_bulk([entry.object_id for entry in entries])
+    return [(entry, objects[entry.object_id]) for entry in entries if entry.object_id in objects]
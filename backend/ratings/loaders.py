@@ -0,0 +1,97 @@
+"""
+按请求批量加载评价序列化所需的关联数据
+
+评价通过通用外键指向教师或食堂窗口。序列化一页评价前，RatingPage 按 content_type
+分组一次取回各类评价对象，用一次 IN 查询取回当前用户对这一页的有用标记，再用
+一次查询取回这一页评价的标签ID（标签本身来自进程内的标签缓存），每个评价人的
+用户信息也只序列化一次。
+"""
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+
+from users.serializers import UserSerializer
+
+from .models import Teacher, Canteen, Rating, HelpfulMark
+from .tag_registry import registry as tag_registry
+
+TARGET_TYPES = {Teacher: 'teacher', Canteen: 'canteen'}
+
+
+class RatingPage:
+    """一页评价的评价对象、当前用户的有用标记和评价人信息"""
+
+    def __init__(self, user, request=None):
+        self.user = user if user is not None and user.is_authenticated else None
+        # Passed on to UserSerializer so avatar URLs are absolute like everywhere else
+        self.request = request
+        self._targets = {}
+        self._loaded = set()
+        self._helpful = set()
+        self._tags = defaultdict(list)
+        self._users = {}
+
+    def load(self, ratings):
+        """批量加载尚未加载过的评价"""
+        ratings = [rating for rating in ratings if rating.pk not in self._loaded]
+        if not ratings:
+            return
+        self._loaded.update(rating.pk for rating in ratings)
+
+        wanted = defaultdict(set)
+        for rating in ratings:
+            if (rating.content_type_id, rating.object_id) not in self._targets:
+                wanted[rating.content_type_id].add(rating.object_id)
+        for content_type_id, ids in wanted.items():
+            model = ContentType.objects.get_for_id(content_type_id).model_class()
+            objects = model._default_manager.in_bulk(ids) if model is not None else {}
+            for object_id in ids:
+                self._targets[(content_type_id, object_id)] = objects.get(object_id)
+
+        tag_rows = Rating.tags.through.objects.filter(
+            rating_id__in=[rating.pk for rating in ratings]
+        ).values_list('rating_id', 'tag_id')
+        for rating_id, tag_id in tag_rows:
+            self._tags[rating_id].append(tag_id)
+
+        if self.user is not None:
+            self._helpful.update(
+                HelpfulMark.objects.filter(
+                    user=self.user, rating_id__in=[rating.pk for rating in ratings]
+                ).values_list('rating_id', flat=True)
+            )
+
+    def target(self, rating):
+        """评价对象，已删除时为 None"""
+        self.load([rating])
+        return self._targets.get((rating.content_type_id, rating.object_id))
+
+    def target_type(self, rating):
+        return TARGET_TYPES.get(type(self.target(rating)), 'unknown')
+
+    def tag_ids(self, rating):
+        """评价的标签ID（按标签的默认顺序）"""
+        self.load([rating])
+        return tag_registry.ordered(self._tags.get(rating.pk, ()))
+
+    def is_helpful(self, rating):
+        if self.user is None:
+            return False
+        self.load([rating])
+        return rating.pk in self._helpful
+
+    def user_data(self, user):
+        """评价人的用户信息，同一用户只序列化一次"""
+        if user.pk not in self._users:
+            self._users[user.pk] = UserSerializer(user, context={'request': self.request}).data
+        return self._users[user.pk]
+
+
+def rating_page(context):
+    """取出（或创建）序列化上下文中共享的 RatingPage"""
+    loader = context.get('rating_page')
+    if loader is None:
+        request = context.get('request')
+        loader = RatingPage(request.user if request else None, request)
+        context['rating_page'] = loader
+    return loader
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ratings.importers import IMPORTS, ImportFormatError, import_file
+from xuanwu_backend.bulk import CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = '从 CSV 或 XLSX 文件批量导入教师或食堂窗口（按自然键更新已有记录）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTS), help='导入类型')
+        parser.add_argument('path', help='CSV 或 XLSX 文件路径')
+        parser.add_argument('--batch-size', type=int, default=CHUNK_SIZE, help='每批写入的行数')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['path'], 'rb') as file:
+                result = import_file(options['kind'], file, options['path'], options['batch_size'])
+        except OSError as exc:
+            raise CommandError(f'无法读取文件: {exc}')
+        except ImportFormatError as exc:
+            raise CommandError(str(exc))
+
+        for line, error in result['errors']:
+            self.stderr.write(f'第 {line} 行: {error}')
+        if result['failed'] > len(result['errors']):
+            self.stderr.write(f'另有 {result["failed"] - len(result["errors"])} 行错误未列出')
+        self.stdout.write(self.style.SUCCESS(
+            f'新增 {result["created"]} 条，更新 {result["updated"]} 条，失败 {result["failed"]} 行'
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ratings.aggregates import refresh
+
+
+class Command(BaseCommand):
+    help = '按评价表重算教师和食堂窗口的评价聚合（评价数、平均分、星级分布）、月度汇总和排行榜'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = refresh()
+        self.stdout.write(self.style.SUCCESS(f'已重算 {total} 个评价对象的聚合'))
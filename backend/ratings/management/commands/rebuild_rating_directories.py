@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ratings import directories
+from xuanwu_backend.bulk import CHUNK_SIZE, chunked
+
+
+class Command(BaseCommand):
+    help = '按教师的所属学院/部门和食堂窗口的所属食堂重建院系、食堂目录的关联和计数'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=CHUNK_SIZE, help='每批处理的记录数')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model, (field, fk, entry_model, count_field) in directories.DIRECTORIES.items():
+            queryset = model.objects.only('id', field, fk).order_by('pk')
+            with transaction.atomic():
+                for chunk in chunked(queryset.iterator(chunk_size=batch_size), batch_size):
+                    directories.link(model, chunk)
+                directories.recount(model)
+            total = entry_model.objects.filter(**{f'{count_field}__gt': 0}).count()
+            self.stdout.write(self.style.SUCCESS(f'已重建{entry_model._meta.verbose_name}目录，共 {total} 项'))
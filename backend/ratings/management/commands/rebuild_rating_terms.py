@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ratings.terms import refresh
+
+
+class Command(BaseCommand):
+    help = '按评价表重建教师和食堂窗口的评论词频（修改停用词后执行）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批读取的评价数')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = refresh(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'已按 {total} 条评论重建词频'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ratings.helpful import reconcile
+
+
+class Command(BaseCommand):
+    help = '按有用标记表重算评价的有用数（用于进程异常退出丢失缓冲增量后的校正）'
+
+    def handle(self, *args, **options):
+        total = reconcile()
+        self.stdout.write(self.style.SUCCESS(f'已校正 {total} 条评价的有用数'))
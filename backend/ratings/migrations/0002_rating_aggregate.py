@@ -0,0 +1,52 @@
+# Generated by Django 4.2.27 on 2026-10-17 22:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Q, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Rating = apps.get_model('ratings', 'Rating')
+    RatingAggregate = apps.get_model('ratings', 'RatingAggregate')
+    rows = Rating.objects.order_by().values('content_type_id', 'object_id').annotate(
+        count=Count('id'),
+        total=Sum('score'),
+        **{f's{score}': Count('id', filter=Q(score=score)) for score in range(1, 6)}
+    )
+    RatingAggregate.objects.bulk_create([
+        RatingAggregate(average=row['total'] / row['count'], **row) for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('ratings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('count', models.IntegerField(default=0, verbose_name='评价数')),
+                ('total', models.IntegerField(default=0, verbose_name='总分')),
+                ('average', models.FloatField(default=0, verbose_name='平均分')),
+                ('s1', models.IntegerField(default=0, verbose_name='1星')),
+                ('s2', models.IntegerField(default=0, verbose_name='2星')),
+                ('s3', models.IntegerField(default=0, verbose_name='3星')),
+                ('s4', models.IntegerField(default=0, verbose_name='4星')),
+                ('s5', models.IntegerField(default=0, verbose_name='5星')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': '评价聚合',
+                'verbose_name_plural': '评价聚合',
+                'indexes': [models.Index(fields=['content_type', '-average'], name='ratings_rat_content_fcd856_idx'), models.Index(fields=['content_type', '-count'], name='ratings_rat_content_7c05fb_idx')],
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
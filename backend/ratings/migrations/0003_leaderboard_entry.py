@@ -0,0 +1,62 @@
+# Generated by Django 4.2.27 on 2026-10-17 22:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.conf import settings
+
+
+def backfill_leaderboard_entries(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    RatingAggregate = apps.get_model('ratings', 'RatingAggregate')
+    LeaderboardEntry = apps.get_model('ratings', 'LeaderboardEntry')
+    mean = settings.RATINGS_LEADERBOARD_PRIOR_MEAN
+    weight = settings.RATINGS_LEADERBOARD_PRIOR_WEIGHT
+    entries = []
+    for model_name, field in (('teacher', 'department'), ('canteen', 'canteen_building')):
+        content_type = ContentType.objects.filter(app_label='ratings', model=model_name).first()
+        if content_type is None:
+            continue
+        boards = dict(apps.get_model('ratings', model_name).objects.values_list('pk', field))
+        for aggregate in RatingAggregate.objects.filter(content_type=content_type, count__gt=0):
+            if aggregate.object_id not in boards:
+                continue
+            entries.append(LeaderboardEntry(
+                content_type=content_type,
+                object_id=aggregate.object_id,
+                board=boards[aggregate.object_id],
+                score=(mean * weight + aggregate.total) / (weight + aggregate.count),
+                average=aggregate.average,
+                count=aggregate.count,
+            ))
+    LeaderboardEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('ratings', '0002_rating_aggregate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('board', models.CharField(max_length=100, verbose_name='榜单')),
+                ('score', models.FloatField(verbose_name='排名分')),
+                ('average', models.FloatField(verbose_name='平均分')),
+                ('count', models.IntegerField(verbose_name='评价数')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': '排行榜条目',
+                'verbose_name_plural': '排行榜条目',
+                'indexes': [models.Index(fields=['content_type', 'board', '-score'], name='ratings_lea_content_113115_idx'), models.Index(fields=['content_type', '-score'], name='ratings_lea_content_22a18f_idx')],
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+        migrations.RunPython(backfill_leaderboard_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.27 on 2026-10-17 22:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rating_monthly(apps, schema_editor):
+    Rating = apps.get_model('ratings', 'Rating')
+    RatingMonthly = apps.get_model('ratings', 'RatingMonthly')
+    rows = Rating.objects.order_by().annotate(
+        month=TruncMonth('created_at', output_field=DateField())
+    ).values('content_type_id', 'object_id', 'month').annotate(
+        count=Count('id'),
+        total=Sum('score'),
+        **{f's{score}': Count('id', filter=Q(score=score)) for score in range(1, 6)}
+    )
+    RatingMonthly.objects.bulk_create([RatingMonthly(**row) for row in rows])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('ratings', '0003_leaderboard_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingMonthly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('month', models.DateField(verbose_name='月份')),
+                ('count', models.IntegerField(default=0, verbose_name='评价数')),
+                ('total', models.IntegerField(default=0, verbose_name='总分')),
+                ('s1', models.IntegerField(default=0, verbose_name='1星')),
+                ('s2', models.IntegerField(default=0, verbose_name='2星')),
+                ('s3', models.IntegerField(default=0, verbose_name='3星')),
+                ('s4', models.IntegerField(default=0, verbose_name='4星')),
+                ('s5', models.IntegerField(default=0, verbose_name='5星')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': '月度评价汇总',
+                'verbose_name_plural': '月度评价汇总',
+                'unique_together': {('content_type', 'object_id', 'month')},
+            },
+        ),
+        migrations.RunPython(backfill_rating_monthly, migrations.RunPython.noop),
+    ]
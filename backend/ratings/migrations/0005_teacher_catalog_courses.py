@@ -0,0 +1,19 @@
+# Generated by Django 4.2.27 on 2026-10-17 22:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('ratings', '0004_rating_monthly'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teacher',
+            name='catalog_courses',
+            field=models.ManyToManyField(blank=True, help_text='由主讲课程自动解析', related_name='teachers', to='courses.course', verbose_name='课程目录'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 4.2.27 on 2026-10-17 22:49
+
+from collections import defaultdict
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_directories(apps, schema_editor):
+    for model_name, field, fk, entry_name, count_field in (
+        ('Teacher', 'department', 'department_entry', 'Department', 'teacher_count'),
+        ('Canteen', 'canteen_building', 'building_entry', 'Building', 'canteen_count'),
+    ):
+        Model = apps.get_model('ratings', model_name)
+        Entry = apps.get_model('ratings', entry_name)
+        spellings = defaultdict(list)
+        for value in Model.objects.order_by().values_list(field, flat=True).distinct():
+            name = ' '.join(value.split())
+            if name:
+                spellings[name].append(value)
+        Entry.objects.bulk_create([Entry(name=name) for name in spellings])
+        for entry in Entry.objects.all():
+            linked = Model.objects.filter(**{f'{field}__in': spellings[entry.name]}).update(**{fk: entry})
+            Entry.objects.filter(pk=entry.pk).update(**{count_field: linked})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ratings', '0005_teacher_catalog_courses'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Building',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='名称')),
+                ('canteen_count', models.IntegerField(default=0, verbose_name='窗口数')),
+            ],
+            options={
+                'verbose_name': '食堂',
+                'verbose_name_plural': '食堂',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Department',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='名称')),
+                ('teacher_count', models.IntegerField(default=0, verbose_name='教师数')),
+            ],
+            options={
+                'verbose_name': '院系',
+                'verbose_name_plural': '院系',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='canteen',
+            name='building_entry',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='canteens', to='ratings.building', verbose_name='食堂目录'),
+        ),
+        migrations.AddField(
+            model_name='teacher',
+            name='department_entry',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='teachers', to='ratings.department', verbose_name='院系目录'),
+        ),
+        migrations.RunPython(backfill_directories, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 4.2.27 on 2026-10-17 22:53
+
+import re
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copies of ratings.terms.comment_terms and the bigram tokenizer as of this migration
+_CJK = '㐀-䶿一-鿿豈-﫿'
+_TOKEN_RE = re.compile(rf'(?P<cjk>[{_CJK}]+)|(?P<word>[^\W_{_CJK}]+)')
+
+MAX_TERM_LENGTH = 20
+
+STOP_CHARS = frozenset('的了着过吗呢吧啊呀哦嘛么是和与及或就都也还又很太我你他她它们这那')
+
+STOPWORDS = frozenset({
+    '老师', '课程', '门课', '上课', '食堂', '窗口', '一个', '一下', '一点', '有点', '比较', '非常',
+    '特别', '真的', '感觉', '觉得', '认为', '没有', '但是', '因为', '所以', '如果', '可以', '不过',
+    '然后', '而且', '其实', '总之', '反正', '以后', '之前', '时候', '大家', '自己', '什么', '怎么',
+    'the', 'and', 'for', 'but', 'not', 'you', 'are', 'was', 'is', 'it', 'to', 'of', 'in', 'a', 'an',
+})
+
+
+def tokenize(text):
+    tokens = []
+    for match in _TOKEN_RE.finditer(text or ''):
+        run = match.group('cjk')
+        if run:
+            tokens.extend([run] if len(run) < 2 else [run[i:i + 2] for i in range(len(run) - 1)])
+        else:
+            tokens.append(match.group('word').lower())
+    return tokens
+
+
+def comment_terms(comment):
+    return {
+        token for token in tokenize(comment)
+        if 2 <= len(token) <= MAX_TERM_LENGTH
+        and token not in STOPWORDS
+        and not token.isdigit()
+        and STOP_CHARS.isdisjoint(token)
+    }
+
+
+def backfill_rating_terms(apps, schema_editor):
+    Rating = apps.get_model('ratings', 'Rating')
+    RatingTerm = apps.get_model('ratings', 'RatingTerm')
+    counts = Counter()
+    for content_type_id, object_id, comment in Rating.objects.exclude(comment='').values_list(
+        'content_type_id', 'object_id', 'comment'
+    ).iterator():
+        for term in comment_terms(comment):
+            counts[(content_type_id, object_id, term)] += 1
+    RatingTerm.objects.bulk_create([
+        RatingTerm(content_type_id=content_type_id, object_id=object_id, term=term, count=count)
+        for (content_type_id, object_id, term), count in counts.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('ratings', '0006_directories'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('term', models.CharField(max_length=20, verbose_name='词')),
+                ('count', models.IntegerField(default=0, verbose_name='评价数')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': '评论词频',
+                'verbose_name_plural': '评论词频',
+                'indexes': [models.Index(fields=['content_type', 'object_id', '-count'], name='ratings_rat_content_233226_idx')],
+                'unique_together': {('content_type', 'object_id', 'term')},
+            },
+        ),
+        migrations.RunPython(backfill_rating_terms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.27 on 2026-10-17 23:20
+
+from django.db import migrations
+
+
+def clean_boards(apps, schema_editor):
+    """分榜名称按目录的规则规范化（合并首尾和连续空白）"""
+    LeaderboardEntry = apps.get_model('ratings', 'LeaderboardEntry')
+    boards = LeaderboardEntry.objects.order_by().values_list('board', flat=True).distinct()
+    for board in list(boards):
+        name = ' '.join(board.split())
+        if name != board:
+            LeaderboardEntry.objects.filter(board=board).update(board=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ratings', '0007_rating_term'),
+    ]
+
+    operations = [
+        migrations.RunPython(clean_boards, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
-from django.db.models import Avg
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
@@ -28,12 +29,67 @@ class Tag(models.Model):
         return f"{self.get_category_display()} - {self.name}"
 
 
+class RatedQuerySet(models.QuerySet):
+    """评价对象（教师、食堂窗口）的查询集"""
+    
+    def with_rating_stats(self):
+        """关联评价聚合表，附加 average_rating 和 rating_count，可直接用于筛选和排序"""
+        return self.annotate(
+            average_rating=Coalesce(F('rating_aggregate__average'), Value(0.0)),
+            rating_count=Coalesce(F('rating_aggregate__count'), Value(0)),
+        )
+
+
+class Department(models.Model):
+    """院系目录（由教师的所属学院/部门维护）"""
+    name = models.CharField(max_length=100, unique=True, verbose_name="名称")
+    teacher_count = models.IntegerField(default=0, verbose_name="教师数")
+    
+    class Meta:
+        verbose_name = "院系"
+        verbose_name_plural = "院系"
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
+class Building(models.Model):
+    """食堂目录（由食堂窗口的所属食堂维护）"""
+    name = models.CharField(max_length=50, unique=True, verbose_name="名称")
+    canteen_count = models.IntegerField(default=0, verbose_name="窗口数")
+    
+    class Meta:
+        verbose_name = "食堂"
+        verbose_name_plural = "食堂"
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
 class Teacher(models.Model):
     """教师"""
     name = models.CharField(max_length=50, verbose_name="姓名")
     department = models.CharField(max_length=100, verbose_name="所属学院/部门")
+    department_entry = models.ForeignKey(
+        Department,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='teachers',
+        verbose_name="院系目录"
+    )
     title = models.CharField(max_length=50, blank=True, verbose_name="职称")
     courses = models.TextField(blank=True, verbose_name="主讲课程")
+    catalog_courses = models.ManyToManyField(
+        'courses.Course',
+        blank=True,
+        related_name='teachers',
+        verbose_name="课程目录",
+        help_text="由主讲课程自动解析"
+    )
     bio = models.TextField(blank=True, verbose_name="个人简介")
     image = models.ImageField(upload_to='teachers/', null=True, blank=True, verbose_name="照片")
     email = models.EmailField(blank=True, verbose_name="邮箱")
@@ -41,6 +97,12 @@ class Teacher(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
     ratings = GenericRelation('Rating', related_query_name='teacher')
+    rating_aggregate = GenericRelation('RatingAggregate', related_query_name='teacher')
+    leaderboard_entry = GenericRelation('LeaderboardEntry', related_query_name='teacher')
+    monthly_ratings = GenericRelation('RatingMonthly', related_query_name='teacher')
+    rating_terms = GenericRelation('RatingTerm', related_query_name='teacher')
+    
+    objects = RatedQuerySet.as_manager()
     
     class Meta:
         verbose_name = "教师"
@@ -53,25 +115,21 @@ class Teacher(models.Model):
     
     def __str__(self):
         return f"{self.name} - {self.department}"
-    
-    @property
-    def average_rating(self):
-        """平均评分"""
-        result = self.ratings.aggregate(avg=Avg('score'))
-        if result['avg']:
-            return round(result['avg'], 1)
-        return 0
-    
-    @property
-    def rating_count(self):
-        """评价数量"""
-        return self.ratings.count()
 
 
 class Canteen(models.Model):
     """食堂窗口"""
     name = models.CharField(max_length=100, verbose_name="名称")
     canteen_building = models.CharField(max_length=50, verbose_name="所属食堂")
+    building_entry = models.ForeignKey(
+        Building,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='canteens',
+        verbose_name="食堂目录"
+    )
     location = models.CharField(max_length=100, verbose_name="位置/楼层")
     description = models.TextField(blank=True, verbose_name="描述")
     specialties = models.TextField(blank=True, verbose_name="特色菜品")
@@ -81,6 +139,12 @@ class Canteen(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
     ratings = GenericRelation('Rating', related_query_name='canteen')
+    rating_aggregate = GenericRelation('RatingAggregate', related_query_name='canteen')
+    leaderboard_entry = GenericRelation('LeaderboardEntry', related_query_name='canteen')
+    monthly_ratings = GenericRelation('RatingMonthly', related_query_name='canteen')
+    rating_terms = GenericRelation('RatingTerm', related_query_name='canteen')
+    
+    objects = RatedQuerySet.as_manager()
     
     class Meta:
         verbose_name = "食堂窗口"
@@ -93,19 +157,6 @@ class Canteen(models.Model):
     
     def __str__(self):
         return f"{self.canteen_building} - {self.name}"
-    
-    @property
-    def average_rating(self):
-        """平均评分"""
-        result = self.ratings.aggregate(avg=Avg('score'))
-        if result['avg']:
-            return round(result['avg'], 1)
-        return 0
-    
-    @property
-    def rating_count(self):
-        """评价数量"""
-        return self.ratings.count()
 
 
 class Rating(models.Model):
@@ -146,6 +197,111 @@ class Rating(models.Model):
         return f"{self.user.username} 评价了 {self.content_object} - {self.score}星"
 
 
+class RatingAggregate(models.Model):
+    """评价对象的评价聚合（评价数、总分、平均分和各星级数量）"""
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    count = models.IntegerField(default=0, verbose_name="评价数")
+    total = models.IntegerField(default=0, verbose_name="总分")
+    average = models.FloatField(default=0, verbose_name="平均分")
+    s1 = models.IntegerField(default=0, verbose_name="1星")
+    s2 = models.IntegerField(default=0, verbose_name="2星")
+    s3 = models.IntegerField(default=0, verbose_name="3星")
+    s4 = models.IntegerField(default=0, verbose_name="4星")
+    s5 = models.IntegerField(default=0, verbose_name="5星")
+    
+    class Meta:
+        verbose_name = "评价聚合"
+        verbose_name_plural = "评价聚合"
+        unique_together = [['content_type', 'object_id']]
+        indexes = [
+            models.Index(fields=['content_type', '-average']),
+            models.Index(fields=['content_type', '-count']),
+        ]
+    
+    def __str__(self):
+        return f"{self.content_object} - {self.average:.1f}分 ({self.count})"
+    
+    @property
+    def distribution(self):
+        """各星级的评价数 {1: n, ..., 5: n}"""
+        return {score: getattr(self, f's{score}') for score in range(1, 6)}
+
+
+class RatingMonthly(models.Model):
+    """评价对象按月汇总的评价（按评价的创建月份计入）"""
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    month = models.DateField(verbose_name="月份")
+    count = models.IntegerField(default=0, verbose_name="评价数")
+    total = models.IntegerField(default=0, verbose_name="总分")
+    s1 = models.IntegerField(default=0, verbose_name="1星")
+    s2 = models.IntegerField(default=0, verbose_name="2星")
+    s3 = models.IntegerField(default=0, verbose_name="3星")
+    s4 = models.IntegerField(default=0, verbose_name="4星")
+    s5 = models.IntegerField(default=0, verbose_name="5星")
+    
+    class Meta:
+        verbose_name = "月度评价汇总"
+        verbose_name_plural = "月度评价汇总"
+        # The unique index also serves per-target range scans ordered by month
+        unique_together = [['content_type', 'object_id', 'month']]
+    
+    def __str__(self):
+        return f"{self.content_object} - {self.month:%Y-%m} ({self.count})"
+    
+    @property
+    def distribution(self):
+        """各星级的评价数 {1: n, ..., 5: n}"""
+        return {score: getattr(self, f's{score}') for score in range(1, 6)}
+
+
+class RatingTerm(models.Model):
+    """评价对象的评论词频（包含该词的评价数）"""
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    term = models.CharField(max_length=20, verbose_name="词")
+    count = models.IntegerField(default=0, verbose_name="评价数")
+    
+    class Meta:
+        verbose_name = "评论词频"
+        verbose_name_plural = "评论词频"
+        unique_together = [['content_type', 'object_id', 'term']]
+        indexes = [
+            models.Index(fields=['content_type', 'object_id', '-count']),
+        ]
+    
+    def __str__(self):
+        return f"{self.content_object} - {self.term} ({self.count})"
+
+
+class LeaderboardEntry(models.Model):
+    """排行榜条目（教师按院系、食堂窗口按食堂分榜，按贝叶斯平均分排序）"""
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    content_object = GenericForeignKey('content_type', 'object_id')
+    board = models.CharField(max_length=100, verbose_name="榜单")
+    score = models.FloatField(verbose_name="排名分")
+    average = models.FloatField(verbose_name="平均分")
+    count = models.IntegerField(verbose_name="评价数")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+    
+    class Meta:
+        verbose_name = "排行榜条目"
+        verbose_name_plural = "排行榜条目"
+        unique_together = [['content_type', 'object_id']]
+        indexes = [
+            models.Index(fields=['content_type', 'board', '-score']),
+            models.Index(fields=['content_type', '-score']),
+        ]
+    
+    def __str__(self):
+        return f"{self.board} - {self.content_object} ({self.score:.2f})"
+
+
 class HelpfulMark(models.Model):
     """有用标记"""
     user = models.ForeignKey(
@@ -1,7 +1,11 @@
 from rest_framework import serializers
 from django.contrib.contenttypes.models import ContentType
-from .models import Tag, Teacher, Canteen, Rating, HelpfulMark
-from users.serializers import UserSerializer
+from django.db.models import Manager
+from courses.serializers import CourseBriefSerializer
+from .models import Tag, Department, Building, Teacher, Canteen, Rating
+from .loaders import rating_page
+from .helpful import helpful_count
+from .tag_registry import registry as tag_registry
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -14,64 +18,105 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
+class DepartmentSerializer(serializers.ModelSerializer):
+    """院系目录序列化器"""
+    
+    class Meta:
+        model = Department
+        fields = ('id', 'name', 'teacher_count')
+        read_only_fields = fields
+
+
+class BuildingSerializer(serializers.ModelSerializer):
+    """食堂目录序列化器"""
+    
+    class Meta:
+        model = Building
+        fields = ('id', 'name', 'canteen_count')
+        read_only_fields = fields
+
+
+class RoundedAverageField(serializers.FloatField):
+    """平均分保留一位小数（来自 with_rating_stats 的注解）"""
+    
+    def to_representation(self, value):
+        return round(value, 1)
+
+
 class TeacherListSerializer(serializers.ModelSerializer):
     """教师列表序列化器（简化版）"""
-    average_rating = serializers.ReadOnlyField()
-    rating_count = serializers.ReadOnlyField()
+    department_id = serializers.IntegerField(source='department_entry_id', read_only=True)
+    average_rating = RoundedAverageField(read_only=True)
+    rating_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Teacher
-        fields = ('id', 'name', 'department', 'title', 'courses', 'image',
+        fields = ('id', 'name', 'department', 'department_id', 'title', 'courses', 'image',
                   'average_rating', 'rating_count')
         read_only_fields = ('id',)
 
 
 class TeacherDetailSerializer(serializers.ModelSerializer):
     """教师详情序列化器"""
-    average_rating = serializers.ReadOnlyField()
-    rating_count = serializers.ReadOnlyField()
+    department_id = serializers.IntegerField(source='department_entry_id', read_only=True)
+    average_rating = RoundedAverageField(read_only=True)
+    rating_count = serializers.IntegerField(read_only=True)
+    catalog_courses = CourseBriefSerializer(many=True, read_only=True)
     
     class Meta:
         model = Teacher
-        fields = ('id', 'name', 'department', 'title', 'courses', 'bio', 'image',
-                  'email', 'office', 'average_rating', 'rating_count',
-                  'created_at', 'updated_at')
+        fields = ('id', 'name', 'department', 'department_id', 'title', 'courses',
+                  'catalog_courses', 'bio', 'image', 'email', 'office', 'average_rating',
+                  'rating_count', 'created_at', 'updated_at')
         read_only_fields = ('id', 'created_at', 'updated_at')
 
 
 class CanteenListSerializer(serializers.ModelSerializer):
     """食堂窗口列表序列化器（简化版）"""
-    average_rating = serializers.ReadOnlyField()
-    rating_count = serializers.ReadOnlyField()
+    building_id = serializers.IntegerField(source='building_entry_id', read_only=True)
+    average_rating = RoundedAverageField(read_only=True)
+    rating_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Canteen
-        fields = ('id', 'name', 'canteen_building', 'location', 'specialties',
+        fields = ('id', 'name', 'canteen_building', 'building_id', 'location', 'specialties',
                   'image', 'price_range', 'average_rating', 'rating_count')
         read_only_fields = ('id',)
 
 
 class CanteenDetailSerializer(serializers.ModelSerializer):
     """食堂窗口详情序列化器"""
-    average_rating = serializers.ReadOnlyField()
-    rating_count = serializers.ReadOnlyField()
+    building_id = serializers.IntegerField(source='building_entry_id', read_only=True)
+    average_rating = RoundedAverageField(read_only=True)
+    rating_count = serializers.IntegerField(read_only=True)
     
     class Meta:
         model = Canteen
-        fields = ('id', 'name', 'canteen_building', 'location', 'description',
+        fields = ('id', 'name', 'canteen_building', 'building_id', 'location', 'description',
                   'specialties', 'image', 'price_range', 'opening_hours',
                   'average_rating', 'rating_count', 'created_at', 'updated_at')
         read_only_fields = ('id', 'created_at', 'updated_at')
 
 
+class RatingPageListSerializer(serializers.ListSerializer):
+    """序列化整页评价前，一次性加载评价对象、有用标记和评价人"""
+    
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, Manager) else data)
+        rating_page(self.context).load(items)
+        return super().to_representation(items)
+
+
 class RatingSerializer(serializers.ModelSerializer):
     """评价序列化器"""
-    user = UserSerializer(read_only=True)
+    user = serializers.SerializerMethodField()
     user_display = serializers.SerializerMethodField()
-    tags_detail = TagSerializer(source='tags', many=True, read_only=True)
+    tags = serializers.SerializerMethodField()
+    tags_detail = serializers.SerializerMethodField()
     target_type = serializers.SerializerMethodField()
     target_name = serializers.SerializerMethodField()
     is_helpful = serializers.SerializerMethodField()
+    helpful_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Rating
@@ -79,37 +124,45 @@ class RatingSerializer(serializers.ModelSerializer):
                   'is_anonymous', 'helpful_count', 'is_helpful', 'target_type', 'target_name',
                   'created_at', 'updated_at')
         read_only_fields = ('id', 'user', 'helpful_count', 'created_at', 'updated_at')
+        list_serializer_class = RatingPageListSerializer
+    
+    def get_user(self, obj):
+        return rating_page(self.context).user_data(obj.user)
     
     def get_user_display(self, obj):
         """根据是否匿名返回用户信息"""
         if obj.is_anonymous:
             return {"username": "匿名用户", "real_name": "匿名"}
-        return UserSerializer(obj.user).data
+        return rating_page(self.context).user_data(obj.user)
+    
+    def get_tags(self, obj):
+        return rating_page(self.context).tag_ids(obj)
+    
+    def get_tags_detail(self, obj):
+        return tag_registry.data(rating_page(self.context).tag_ids(obj))
     
     def get_target_type(self, obj):
         """获取评价对象类型"""
-        if isinstance(obj.content_object, Teacher):
-            return 'teacher'
-        elif isinstance(obj.content_object, Canteen):
-            return 'canteen'
-        return 'unknown'
+        return rating_page(self.context).target_type(obj)
     
     def get_target_name(self, obj):
         """获取评价对象名称"""
-        if obj.content_object:
-            return str(obj.content_object)
+        target = rating_page(self.context).target(obj)
+        if target:
+            return str(target)
         return ''
     
     def get_is_helpful(self, obj):
         """当前用户是否标记为有用"""
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return HelpfulMark.objects.filter(user=request.user, rating=obj).exists()
-        return False
+        return rating_page(self.context).is_helpful(obj)
+    
+    def get_helpful_count(self, obj):
+        """有用数（含尚未写回的增量）"""
+        return helpful_count(obj)
 
 
-class RatingCreateSerializer(serializers.Serializer):
-    """创建评价序列化器"""
+class RatingFieldsSerializer(serializers.Serializer):
+    """评价的提交字段（只校验格式，不查询数据库）"""
     target_type = serializers.ChoiceField(choices=['teacher', 'canteen'])
     target_id = serializers.IntegerField()
     score = serializers.IntegerField(min_value=1, max_value=5)
@@ -120,6 +173,10 @@ class RatingCreateSerializer(serializers.Serializer):
         allow_empty=True
     )
     is_anonymous = serializers.BooleanField(default=False)
+
+
+class RatingCreateSerializer(RatingFieldsSerializer):
+    """创建评价序列化器"""
     
     def validate(self, attrs):
         target_type = attrs['target_type']
@@ -149,8 +206,7 @@ class RatingCreateSerializer(serializers.Serializer):
         # Validate tags
         if 'tags' in attrs and attrs['tags']:
             tag_category = 'TEACHER' if target_type == 'teacher' else 'CANTEEN'
-            valid_tags = Tag.objects.filter(id__in=attrs['tags'], category=tag_category)
-            if len(valid_tags) != len(attrs['tags']):
+            if not tag_registry.valid(attrs['tags'], tag_category):
                 raise serializers.ValidationError("部分标签不存在或不适用于该类型")
         
         attrs['content_type'] = content_type
@@ -158,8 +214,17 @@ class RatingCreateSerializer(serializers.Serializer):
         return attrs
 
 
+class TagIdsField(serializers.ListField):
+    """标签ID列表（按标签缓存校验，不逐个查询标签）"""
+    child = serializers.IntegerField()
+    
+    def to_representation(self, value):
+        return [tag.pk for tag in value.all()]
+
+
 class RatingUpdateSerializer(serializers.ModelSerializer):
     """更新评价序列化器"""
+    tags = TagIdsField(required=False)
     
     class Meta:
         model = Rating
@@ -167,13 +232,32 @@ class RatingUpdateSerializer(serializers.ModelSerializer):
     
     def validate_tags(self, value):
         """验证标签是否适用"""
-        instance = self.instance
-        if isinstance(instance.content_object, Teacher):
-            category = 'TEACHER'
-        else:
-            category = 'CANTEEN'
-        
-        valid_tags = Tag.objects.filter(id__in=[t.id for t in value], category=category)
-        if len(valid_tags) != len(value):
+        model = ContentType.objects.get_for_id(self.instance.content_type_id).model_class()
+        category = 'TEACHER' if model is Teacher else 'CANTEEN'
+        if not tag_registry.valid(value, category):
             raise serializers.ValidationError("部分标签不适用于该类型")
-        return value
+        return tag_registry.ordered(value)
+
+
+class HelpfulOperationSerializer(serializers.Serializer):
+    """单个批量有用标记操作"""
+    rating_id = serializers.IntegerField()
+    helpful = serializers.BooleanField(default=True)
+
+
+class HelpfulBulkSerializer(serializers.Serializer):
+    """批量有用标记序列化器"""
+    operations = serializers.ListField(
+        child=HelpfulOperationSerializer(),
+        allow_empty=False,
+        max_length=200
+    )
+
+
+class RatingBatchSerializer(serializers.Serializer):
+    """批量提交评价序列化器（逐条的字段在视图中用 RatingFieldsSerializer 校验）"""
+    ratings = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=100
+    )
@@ -0,0 +1,40 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from courses import catalog
+
+from .models import Tag, Teacher, Canteen
+from .tag_registry import bump_version
+from . import directories
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_registry(sender, **kwargs):
+    # Bump now so this process sees its own change, and again on commit in case another
+    # process reloaded in between and cached the pre-commit state
+    bump_version()
+    transaction.on_commit(bump_version)
+
+
+@receiver(post_save, sender=Teacher)
+def link_teacher_courses(sender, instance, update_fields=None, **kwargs):
+    if update_fields and 'courses' not in update_fields:
+        return
+    catalog.link_teachers([instance])
+
+
+@receiver(post_save, sender=Teacher)
+@receiver(post_save, sender=Canteen)
+def link_directory(sender, instance, update_fields=None, **kwargs):
+    if update_fields and directories.DIRECTORIES[sender][0] not in update_fields:
+        return
+    directories.link(sender, [instance])
+
+
+@receiver(post_delete, sender=Teacher)
+@receiver(post_delete, sender=Canteen)
+def recount_directory(sender, instance, **kwargs):
+    fk = directories.DIRECTORIES[sender][1]
+    directories.recount(sender, [getattr(instance, f'{fk}_id')])
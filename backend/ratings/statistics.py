@@ -0,0 +1,138 @@
+"""
+评价统计
+
+教师和食堂窗口共用的统计：星级分布和热门标签都由数据库 GROUP BY 计算，不在
+Python 中遍历评价，标签名称来自进程内的标签缓存。不带筛选条件时星级分布直接
+读取评价聚合表；按时间或评价人身份筛选时按 (content_type, object_id) 索引只
+扫描该对象的评价。评论关键词读取增量维护的词频表（见 terms），不受筛选条件
+影响。按月趋势读取月度汇总表，每个月一行。
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework import serializers
+
+from users.models import User
+
+from .aggregates import month_of
+from .models import Rating, RatingAggregate, RatingMonthly
+from .tag_registry import registry as tag_registry
+from .terms import top_terms
+
+SCORES = range(1, 6)
+
+# 热门标签返回的数量
+POPULAR_TAGS = 10
+
+# 趋势默认和最多返回的月数
+TREND_MONTHS = 12
+MAX_TREND_MONTHS = 120
+
+
+class StatisticsFilterSerializer(serializers.Serializer):
+    """统计筛选条件：since（含）、until（不含）、identity_type"""
+    since = serializers.DateTimeField(required=False, input_formats=['iso-8601', '%Y-%m-%d'])
+    until = serializers.DateTimeField(required=False, input_formats=['iso-8601', '%Y-%m-%d'])
+    identity_type = serializers.ChoiceField(choices=User.IDENTITY_CHOICES, required=False)
+
+    def validate(self, attrs):
+        if 'since' in attrs and 'until' in attrs and attrs['since'] >= attrs['until']:
+            raise serializers.ValidationError('since 必须早于 until')
+        return attrs
+
+
+def _rating_filters(since=None, until=None, identity_type=None):
+    filters = {}
+    if since is not None:
+        filters['created_at__gte'] = since
+    if until is not None:
+        filters['created_at__lt'] = until
+    if identity_type:
+        filters['user__identity_type'] = identity_type
+    return filters
+
+
+def score_histogram(content_type, object_id, **filters):
+    """各星级的评价数 {1: n, ..., 5: n}"""
+    if not filters:
+        aggregate = RatingAggregate.objects.filter(content_type=content_type, object_id=object_id).first()
+        if aggregate is not None:
+            return aggregate.distribution
+    histogram = dict.fromkeys(SCORES, 0)
+    histogram.update(
+        Rating.objects.filter(content_type=content_type, object_id=object_id, **filters)
+        .order_by().values_list('score').annotate(count=Count('id'))
+    )
+    return histogram
+
+
+def popular_tags(content_type, object_id, limit=POPULAR_TAGS, **filters):
+    """出现次数最多的标签 [(名称, 次数), ...]"""
+    lookups = {f'rating__{key}': value for key, value in filters.items()}
+    counts = dict(
+        Rating.tags.through.objects.filter(
+            rating__content_type=content_type, rating__object_id=object_id, **lookups
+        ).order_by().values_list('tag_id').annotate(count=Count('id'))
+    )
+    # Names come from the tag registry; ties keep the tags' default ordering
+    ranked = sorted(tag_registry.ordered(counts), key=lambda tag_id: -counts[tag_id])
+    return [(tag_registry.get(tag_id).name, counts[tag_id]) for tag_id in ranked[:limit]]
+
+
+def rating_statistics(obj, **params):
+    """
+    评价对象的统计数据
+
+    params 为 StatisticsFilterSerializer 校验后的筛选条件。
+    """
+    content_type = ContentType.objects.get_for_model(obj)
+    filters = _rating_filters(**params)
+    histogram = score_histogram(content_type, obj.pk, **filters)
+    count = sum(histogram.values())
+    total = sum(score * n for score, n in histogram.items())
+    return {
+        'average_rating': round(total / count, 1) if count else 0,
+        'total_ratings': count,
+        'score_distribution': {f'{score}星': n for score, n in histogram.items()},
+        'popular_tags': popular_tags(content_type, obj.pk, **filters),
+        'top_terms': top_terms(content_type, obj.pk),
+    }
+
+
+class TrendFilterSerializer(serializers.Serializer):
+    """趋势查询条件：最近 months 个月（含当月）"""
+    months = serializers.IntegerField(required=False, default=TREND_MONTHS, min_value=1, max_value=MAX_TREND_MONTHS)
+
+
+def _add_months(month, n):
+    index = month.year * 12 + month.month - 1 + n
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def rating_trend(obj, months=TREND_MONTHS):
+    """
+    评价对象最近 months 个月的逐月统计
+
+    没有评价的月份也会返回（评价数为 0，平均分为 None），便于直接绘制趋势图。
+    """
+    end = month_of(timezone.now())
+    start = _add_months(end, 1 - months)
+    rows = {
+        row.month: row for row in RatingMonthly.objects.filter(
+            content_type=ContentType.objects.get_for_model(obj), object_id=obj.pk, month__gte=start
+        )
+    }
+    trend = []
+    for i in range(months):
+        month = _add_months(start, i)
+        row = rows.get(month)
+        histogram = row.distribution if row is not None else dict.fromkeys(SCORES, 0)
+        count = row.count if row is not None else 0
+        total = row.total if row is not None else 0
+        trend.append({
+            'month': f'{month:%Y-%m}',
+            'count': count,
+            'average_rating': round(total / count, 2) if count else None,
+            'score_distribution': {f'{score}星': n for score, n in histogram.items()},
+        })
+    return trend
@@ -0,0 +1,99 @@
+"""
+进程内标签缓存
+
+标签表很小且几乎不变，却在标签列表、评价校验和每一页评价的序列化中被反复查询。
+TagRegistry 在进程内一次性加载全部标签（及其序列化结果），此后的查找和校验不再
+查询数据库。
+
+标签保存或删除后（事务提交时）递增缓存中的版本号，各进程下次访问时发现版本号
+变化即重新加载。版本号存放在 Django 缓存（CACHES）中：默认的本地内存缓存只在
+单进程内有效，多进程部署需配置共享缓存（如 Redis、Memcached），失效才能通知到
+所有进程。
+"""
+import threading
+import time
+
+from django.core.cache import cache
+
+from .models import Tag
+
+VERSION_KEY = 'ratings:tag_registry:version'
+
+
+def _initial_version():
+    # A timestamp rather than 1, so a version lost with the cache never repeats an old one
+    return time.time_ns()
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _initial_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    """使所有进程的标签缓存失效"""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, _initial_version(), timeout=None)
+
+
+class TagRegistry:
+    """全部标签的只读快照，版本号变化时重新加载"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        # (id -> Tag in the model's default ordering, id -> serialized data, id -> position),
+        # replaced as a whole so readers never see a half-built snapshot
+        self._snapshot = ({}, {}, {})
+
+    def _load(self):
+        version = current_version()
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    # Deferred import: the serializers module imports this one
+                    from .serializers import TagSerializer
+                    tags = list(Tag.objects.all())
+                    self._snapshot = (
+                        {tag.id: tag for tag in tags},
+                        {tag.id: TagSerializer(tag).data for tag in tags},
+                        {tag.id: i for i, tag in enumerate(tags)},
+                    )
+                    self._version = version
+        return self._snapshot
+
+    def all(self, category=None):
+        """全部标签（按默认顺序），可按分类筛选"""
+        tags = self._load()[0].values()
+        if category is not None:
+            return [tag for tag in tags if tag.category == category]
+        return list(tags)
+
+    def get(self, tag_id):
+        return self._load()[0].get(tag_id)
+
+    def _ordered(self, snapshot, tag_ids):
+        tags, _, positions = snapshot
+        return sorted((tag_id for tag_id in set(tag_ids) if tag_id in tags), key=positions.__getitem__)
+
+    def ordered(self, tag_ids):
+        """按标签的默认顺序排列 tag_ids，去掉重复和不存在的ID"""
+        return self._ordered(self._load(), tag_ids)
+
+    def data(self, tag_ids):
+        """标签的序列化结果（按默认顺序），不存在的ID被跳过"""
+        snapshot = self._load()
+        return [snapshot[1][tag_id] for tag_id in self._ordered(snapshot, tag_ids)]
+
+    def valid(self, tag_ids, category):
+        """tag_ids 是否都是存在的、属于 category 的标签"""
+        tags = self._load()[0]
+        return all(tag_id in tags and tags[tag_id].category == category for tag_id in tag_ids)
+
+
+registry = TagRegistry()
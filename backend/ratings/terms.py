@@ -0,0 +1,152 @@
+"""
+评论关键词
+
+教师和食堂窗口页面展示评论中出现最多的词（如“作业”“给分”）。实时统计需要读出
+并切分该对象的全部评论，因此在 RatingTerm 中按对象保存每个词出现在多少条评价
+中：评价新增、修改评论或删除时，只切分这一条评论，对增加和消失的词各用一条
+F() 表达式更新，计数归零的行随即删除；统计接口按 (content_type, object_id, -count)
+索引读取前 N 个词。
+
+切分使用 xuanwu_backend.tokenizer 的二元切分，去掉单字、停用词和含虚词的二元组。
+每条评价对一个词只计一次，一条长评论不会压过多条短评论。
+"""
+from collections import defaultdict
+
+from django.db.models import F, Q
+
+from xuanwu_backend.bulk import chunked
+from xuanwu_backend.tokenizer import tokenize
+
+from .models import Rating, RatingTerm
+
+# 统计接口返回的关键词数
+TOP_TERMS = 10
+
+# 词的最大长度（与 RatingTerm.term 一致），更长的英文单词等不计入
+MAX_TERM_LENGTH = 20
+
+# 含这些字的二元组不计入（虚词、代词等，与相邻字组成的二元组大多没有意义）
+STOP_CHARS = frozenset('的了着过吗呢吧啊呀哦嘛么是和与及或就都也还又很太我你他她它们这那')
+
+# 停用词
+STOPWORDS = frozenset({
+    # Bigrams that are common in any review but say nothing about the target
+    '老师', '课程', '门课', '上课', '食堂', '窗口', '一个', '一下', '一点', '有点', '比较', '非常',
+    '特别', '真的', '感觉', '觉得', '认为', '没有', '但是', '因为', '所以', '如果', '可以', '不过',
+    '然后', '而且', '其实', '总之', '反正', '以后', '之前', '时候', '大家', '自己', '什么', '怎么',
+    # English
+    'the', 'and', 'for', 'but', 'not', 'you', 'are', 'was', 'is', 'it', 'to', 'of', 'in', 'a', 'an',
+})
+
+# 一条 UPDATE 中最多的绑定参数数（低于 SQLite 默认的 999）
+_MAX_PARAMS = 900
+
+
+def comment_terms(comment):
+    """评论中计入词频的词（集合）"""
+    return {
+        token for token in tokenize(comment)
+        if 2 <= len(token) <= MAX_TERM_LENGTH
+        and token not in STOPWORDS
+        and not token.isdigit()
+        and STOP_CHARS.isdisjoint(token)
+    }
+
+
+def _scopes(targets):
+    """把 {(content_type_id, object_id): [词, ...]} 拆成绑定参数数有上限的查询条件"""
+    scope, params = Q(pk__in=[]), 0
+    for (content_type_id, object_id), terms in targets.items():
+        for chunk in chunked(terms, _MAX_PARAMS - 2):
+            if params + len(chunk) + 2 > _MAX_PARAMS:
+                yield scope
+                scope, params = Q(pk__in=[]), 0
+            scope |= Q(content_type_id=content_type_id, object_id=object_id, term__in=chunk)
+            params += len(chunk) + 2
+    if params:
+        yield scope
+
+
+def apply(changes):
+    """
+    按评论变化调整词频
+
+    changes 为 [(content_type_id, object_id, 旧评论, 新评论), ...]：新增评价的旧评论
+    为 ''，删除评价的新评论为 ''。
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for content_type_id, object_id, old_comment, new_comment in changes:
+        old_terms, new_terms = comment_terms(old_comment), comment_terms(new_comment)
+        target = deltas[(content_type_id, object_id)]
+        for term in new_terms - old_terms:
+            target[term] += 1
+        for term in old_terms - new_terms:
+            target[term] -= 1
+
+    # Group by delta so each group is one UPDATE ... SET count = count + delta
+    groups = defaultdict(lambda: defaultdict(list))
+    for target, terms in deltas.items():
+        for term, delta in terms.items():
+            if delta:
+                groups[delta][target].append(term)
+
+    RatingTerm.objects.bulk_create([
+        RatingTerm(content_type_id=content_type_id, object_id=object_id, term=term)
+        for delta, targets in groups.items() if delta > 0
+        for (content_type_id, object_id), terms in targets.items()
+        for term in terms
+    ], ignore_conflicts=True)
+    for delta, targets in groups.items():
+        for scope in _scopes(targets):
+            RatingTerm.objects.filter(scope).update(count=F('count') + delta)
+            if delta < 0:
+                RatingTerm.objects.filter(scope, count__lte=0).delete()
+
+
+def top_terms(content_type, object_id, limit=TOP_TERMS):
+    """出现在最多评价中的词 [(词, 评价数), ...]"""
+    return list(
+        RatingTerm.objects.filter(content_type=content_type, object_id=object_id)
+        .order_by('-count', 'term').values_list('term', 'count')[:limit]
+    )
+
+
+def _flush(target, counts):
+    content_type_id, object_id = target
+    RatingTerm.objects.bulk_create([
+        RatingTerm(content_type_id=content_type_id, object_id=object_id, term=term, count=count)
+        for term, count in counts.items()
+    ])
+
+
+def refresh(targets=None, batch_size=1000):
+    """
+    按评价表重建词频
+
+    targets 为 [(content_type_id, object_id), ...]，为 None 时重建全部评价对象。评论
+    按对象顺序流式读取，内存中只保留当前对象的词频。返回处理的评价数。
+    """
+    ratings = Rating.objects.exclude(comment='')
+    rows = RatingTerm.objects.all()
+    if targets is not None:
+        scope = Q(pk__in=[])
+        for content_type_id, object_id in set(targets):
+            scope |= Q(content_type_id=content_type_id, object_id=object_id)
+        ratings = ratings.filter(scope)
+        rows = rows.filter(scope)
+    rows.delete()
+
+    total, current, counts = 0, None, defaultdict(int)
+    for content_type_id, object_id, comment in ratings.order_by('content_type_id', 'object_id').values_list(
+        'content_type_id', 'object_id', 'comment'
+    ).iterator(chunk_size=batch_size):
+        if (content_type_id, object_id) != current:
+            if current is not None:
+                _flush(current, counts)
+            current, counts = (content_type_id, object_id), defaultdict(int)
+        for term in comment_terms(comment):
+            counts[term] += 1
+        total += 1
+    if current is not None:
+        _flush(current, counts)
+    return total
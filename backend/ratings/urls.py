@@ -1,11 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TagViewSet, TeacherViewSet, CanteenViewSet, RatingViewSet
+from .views import (
+    TagViewSet, DepartmentViewSet, BuildingViewSet, TeacherViewSet, CanteenViewSet, RatingViewSet
+)
 
 app_name = 'ratings'
 
 router = DefaultRouter()
 router.register(r'tags', TagViewSet, basename='tag')
+router.register(r'departments', DepartmentViewSet, basename='department')
+router.register(r'buildings', BuildingViewSet, basename='building')
 router.register(r'teachers', TeacherViewSet, basename='teacher')
 router.register(r'canteen', CanteenViewSet, basename='canteen')
 router.register(r'ratings', RatingViewSet, basename='rating')
@@ -1,21 +1,30 @@
 from rest_framework import viewsets, status, permissions, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Avg, Count, F
 from django.db import transaction
-from .models import Tag, Teacher, Canteen, Rating, HelpfulMark
+from courses import catalog
+from .models import Tag, Department, Building, Teacher, Canteen, Rating, HelpfulMark
+from . import aggregates, directories, helpful, leaderboards
+from .batch import submit as submit_ratings
+from .tag_registry import registry as tag_registry
+from .statistics import StatisticsFilterSerializer, TrendFilterSerializer, rating_statistics, rating_trend
 from .serializers import (
     TagSerializer,
+    DepartmentSerializer,
+    BuildingSerializer,
     TeacherListSerializer,
     TeacherDetailSerializer,
     CanteenListSerializer,
     CanteenDetailSerializer,
     RatingSerializer,
     RatingCreateSerializer,
-    RatingUpdateSerializer
+    RatingUpdateSerializer,
+    RatingBatchSerializer,
+    HelpfulBulkSerializer
 )
+from users import activity
 
 
 class IsVerifiedUser(permissions.BasePermission):
@@ -28,6 +37,37 @@ class IsVerifiedUser(permissions.BasePermission):
         return request.user.is_authenticated and request.user.is_verified
 
 
+def filter_by_rating(queryset, params):
+    """按 min_rating（最低平均分）和 min_count（最少评价数）筛选评价对象"""
+    try:
+        min_rating = float(params['min_rating']) if params.get('min_rating') else None
+        min_count = int(params['min_count']) if params.get('min_count') else None
+    except ValueError:
+        raise ValidationError({'detail': 'min_rating 和 min_count 必须是数字'})
+    if min_rating is not None:
+        queryset = queryset.filter(average_rating__gte=min_rating)
+    if min_count is not None:
+        queryset = queryset.filter(rating_count__gte=min_count)
+    return queryset
+
+
+def leaderboard_response(request, model, serializer_class, board):
+    """排行榜响应：榜单前 N 名，每项在列表序列化结果上附加 rank 和 score"""
+    try:
+        limit = int(request.query_params.get('limit', leaderboards.DEFAULT_LIMIT))
+    except ValueError:
+        raise ValidationError({'detail': 'limit 必须是整数'})
+    limit = min(max(limit, 1), leaderboards.MAX_LIMIT)
+    board = directories.clean_name(board)
+    
+    results = []
+    for rank, (entry, obj) in enumerate(leaderboards.top(model, board, limit), start=1):
+        data = serializer_class(obj, context={'request': request}).data
+        data.update(rank=rank, score=round(entry.score, 2))
+        results.append(data)
+    return Response({'board': board, 'results': results})
+
+
 class TagViewSet(viewsets.ReadOnlyModelViewSet):
     """标签视图集（只读）"""
     queryset = Tag.objects.all()
@@ -40,15 +80,41 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
         if category:
             queryset = queryset.filter(category=category.upper())
         return queryset
+    
+    def list(self, request, *args, **kwargs):
+        # Served from the in-process tag registry without touching the database
+        category = request.query_params.get('category')
+        tags = tag_registry.all(category.upper() if category else None)
+        page = self.paginate_queryset(tags)
+        if page is not None:
+            return self.get_paginated_response(tag_registry.data([tag.id for tag in page]))
+        return Response(tag_registry.data([tag.id for tag in tags]))
+
+
+class DepartmentViewSet(viewsets.ReadOnlyModelViewSet):
+    """院系目录视图集（只读，用于院系选择器）"""
+    queryset = Department.objects.filter(teacher_count__gt=0)
+    serializer_class = DepartmentSerializer
+    permission_classes = [permissions.AllowAny]
+    # The directory is small; pickers need all of it in one response
+    pagination_class = None
+
+
+class BuildingViewSet(viewsets.ReadOnlyModelViewSet):
+    """食堂目录视图集（只读，用于食堂选择器）"""
+    queryset = Building.objects.filter(canteen_count__gt=0)
+    serializer_class = BuildingSerializer
+    permission_classes = [permissions.AllowAny]
+    pagination_class = None
 
 
 class TeacherViewSet(viewsets.ModelViewSet):
     """教师视图集"""
-    queryset = Teacher.objects.all()
+    queryset = Teacher.objects.with_rating_stats()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'department', 'courses']
-    ordering_fields = ['name', 'department', 'created_at']
+    ordering_fields = ['name', 'department', 'created_at', 'average_rating', 'rating_count']
     ordering = ['department', 'name']
     
     def get_serializer_class(self):
@@ -64,10 +130,27 @@ class TeacherViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         queryset = super().get_queryset()
+        
+        # Exact department filters, by directory id or name (both indexed)
+        department_id = self.request.query_params.get('department_id')
+        if department_id:
+            queryset = queryset.filter(department_entry_id=department_id)
         department = self.request.query_params.get('department')
         if department:
-            queryset = queryset.filter(department__icontains=department)
-        return queryset
+            queryset = queryset.filter(department_entry__name=directories.clean_name(department))
+        
+        # Filter by course through the course catalog: prefix on name/alias, or exact id
+        course = self.request.query_params.get('course')
+        if course:
+            queryset = queryset.filter(pk__in=catalog.teacher_ids(catalog.search(course)))
+        course_id = self.request.query_params.get('course_id')
+        if course_id:
+            queryset = queryset.filter(pk__in=catalog.teacher_ids([course_id]))
+        return filter_by_rating(queryset, self.request.query_params)
+    
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            leaderboards.target_changed(serializer.save())
     
     @action(detail=True, methods=['get'])
     def ratings(self, request, pk=None):
@@ -77,7 +160,7 @@ class TeacherViewSet(viewsets.ModelViewSet):
         ratings = Rating.objects.filter(
             content_type=content_type,
             object_id=teacher.id
-        ).prefetch_related('tags').select_related('user').order_by('-created_at')
+        ).select_related('user').order_by('-created_at')
         
         # Pagination
         page = self.paginate_queryset(ratings)
@@ -88,42 +171,33 @@ class TeacherViewSet(viewsets.ModelViewSet):
         serializer = RatingSerializer(ratings, many=True, context={'request': request})
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def leaderboard(self, request):
+        """教师排行榜（按 department 分榜，不指定时为总榜）"""
+        return leaderboard_response(request, Teacher, TeacherListSerializer, request.query_params.get('department'))
+    
     @action(detail=True, methods=['get'])
     def statistics(self, request, pk=None):
-        """获取教师的评价统计"""
-        teacher = self.get_object()
-        content_type = ContentType.objects.get_for_model(Teacher)
-        ratings = Rating.objects.filter(
-            content_type=content_type,
-            object_id=teacher.id
-        ).prefetch_related('tags')
-        
-        # Score distribution
-        score_distribution = {}
-        for i in range(1, 6):
-            score_distribution[f'{i}星'] = ratings.filter(score=i).count()
-        
-        # Tag statistics
-        tag_stats = {}
-        for rating in ratings:
-            for tag in rating.tags.all():
-                tag_stats[tag.name] = tag_stats.get(tag.name, 0) + 1
-        
-        return Response({
-            'average_rating': teacher.average_rating,
-            'total_ratings': teacher.rating_count,
-            'score_distribution': score_distribution,
-            'popular_tags': sorted(tag_stats.items(), key=lambda x: x[1], reverse=True)[:10]
-        })
+        """获取教师的评价统计（可按 since、until、identity_type 筛选）"""
+        params = StatisticsFilterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(rating_statistics(self.get_object(), **params.validated_data))
+    
+    @action(detail=True, methods=['get'])
+    def trend(self, request, pk=None):
+        """获取教师最近几个月的评价趋势"""
+        params = TrendFilterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(rating_trend(self.get_object(), **params.validated_data))
 
 
 class CanteenViewSet(viewsets.ModelViewSet):
     """食堂窗口视图集"""
-    queryset = Canteen.objects.all()
+    queryset = Canteen.objects.with_rating_stats()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'canteen_building', 'specialties']
-    ordering_fields = ['name', 'canteen_building', 'created_at']
+    ordering_fields = ['name', 'canteen_building', 'created_at', 'average_rating', 'rating_count']
     ordering = ['canteen_building', 'name']
     
     def get_serializer_class(self):
@@ -139,10 +213,19 @@ class CanteenViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         queryset = super().get_queryset()
+        
+        # Exact building filters, by directory id or name (both indexed)
+        building_id = self.request.query_params.get('building_id')
+        if building_id:
+            queryset = queryset.filter(building_entry_id=building_id)
         building = self.request.query_params.get('building')
         if building:
-            queryset = queryset.filter(canteen_building__icontains=building)
-        return queryset
+            queryset = queryset.filter(building_entry__name=directories.clean_name(building))
+        return filter_by_rating(queryset, self.request.query_params)
+    
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            leaderboards.target_changed(serializer.save())
     
     @action(detail=True, methods=['get'])
     def ratings(self, request, pk=None):
@@ -152,7 +235,7 @@ class CanteenViewSet(viewsets.ModelViewSet):
         ratings = Rating.objects.filter(
             content_type=content_type,
             object_id=canteen.id
-        ).prefetch_related('tags').select_related('user').order_by('-created_at')
+        ).select_related('user').order_by('-created_at')
         
         # Pagination
         page = self.paginate_queryset(ratings)
@@ -163,38 +246,29 @@ class CanteenViewSet(viewsets.ModelViewSet):
         serializer = RatingSerializer(ratings, many=True, context={'request': request})
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def leaderboard(self, request):
+        """食堂窗口排行榜（按 building 分榜，不指定时为总榜）"""
+        return leaderboard_response(request, Canteen, CanteenListSerializer, request.query_params.get('building'))
+    
     @action(detail=True, methods=['get'])
     def statistics(self, request, pk=None):
-        """获取食堂窗口的评价统计"""
-        canteen = self.get_object()
-        content_type = ContentType.objects.get_for_model(Canteen)
-        ratings = Rating.objects.filter(
-            content_type=content_type,
-            object_id=canteen.id
-        ).prefetch_related('tags')
-        
-        # Score distribution
-        score_distribution = {}
-        for i in range(1, 6):
-            score_distribution[f'{i}星'] = ratings.filter(score=i).count()
-        
-        # Tag statistics
-        tag_stats = {}
-        for rating in ratings:
-            for tag in rating.tags.all():
-                tag_stats[tag.name] = tag_stats.get(tag.name, 0) + 1
-        
-        return Response({
-            'average_rating': canteen.average_rating,
-            'total_ratings': canteen.rating_count,
-            'score_distribution': score_distribution,
-            'popular_tags': sorted(tag_stats.items(), key=lambda x: x[1], reverse=True)[:10]
-        })
+        """获取食堂窗口的评价统计（可按 since、until、identity_type 筛选）"""
+        params = StatisticsFilterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(rating_statistics(self.get_object(), **params.validated_data))
+    
+    @action(detail=True, methods=['get'])
+    def trend(self, request, pk=None):
+        """获取食堂窗口最近几个月的评价趋势"""
+        params = TrendFilterSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(rating_trend(self.get_object(), **params.validated_data))
 
 
 class RatingViewSet(viewsets.ModelViewSet):
     """评价视图集"""
-    queryset = Rating.objects.all()
+    queryset = Rating.objects.select_related('user')
     permission_classes = [IsVerifiedUser]
     
     def get_serializer_class(self):
@@ -235,55 +309,104 @@ class RatingViewSet(viewsets.ModelViewSet):
         target_id = validated_data.pop('target_id')
         validated_data.pop('target_type')
         
-        rating = Rating.objects.create(
-            user=request.user,
-            content_type=content_type,
-            object_id=target_id,
-            **validated_data
-        )
-        
-        # Add tags
-        if tag_ids:
-            rating.tags.set(Tag.objects.filter(id__in=tag_ids))
+        with transaction.atomic():
+            rating = Rating.objects.create(
+                user=request.user,
+                content_type=content_type,
+                object_id=target_id,
+                **validated_data
+            )
+            
+            # Add tags
+            if tag_ids:
+                rating.tags.set(tag_ids)
+            
+            aggregates.rating_created(rating)
+            target = model_class.objects.get(pk=target_id)
+            activity.record(request.user, 'rating', target, f'{target} {rating.score}星')
         
         return Response(
             RatingSerializer(rating, context={'request': request}).data,
             status=status.HTTP_201_CREATED
         )
     
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """批量提交评价，逐条返回创建结果或错误"""
+        serializer = RatingBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results, errors = submit_ratings(request.user, serializer.validated_data['ratings'])
+        return Response(
+            {'results': results, 'errors': errors},
+            status=status.HTTP_201_CREATED if results else status.HTTP_400_BAD_REQUEST
+        )
+    
     def perform_update(self, serializer):
         # Only author can update
         instance = self.get_object()
         if instance.user != self.request.user:
             raise PermissionDenied('您没有权限修改此评价')
-        serializer.save()
+        old_score, old_comment = instance.score, instance.comment
+        with transaction.atomic():
+            rating = serializer.save()
+            aggregates.rating_updated(rating, old_score, old_comment)
     
     def perform_destroy(self, instance):
         # Only author or admin can delete
         if instance.user != self.request.user and not self.request.user.is_staff:
             raise PermissionDenied('您没有权限删除此评价')
-        instance.delete()
+        with transaction.atomic():
+            instance.delete()
+            aggregates.rating_deleted(instance)
     
-    @action(detail=True, methods=['post'])
+    @action(detail=True, methods=['post', 'put', 'delete'])
     def mark_helpful(self, request, pk=None):
-        """标记评价为有用/取消标记"""
+        """
+        标记评价为有用/取消标记
+        
+        POST 切换标记状态；PUT 标记、DELETE 取消标记，二者是幂等的。
+        """
         rating = self.get_object()
+        if request.method == 'PUT':
+            marked = True
+        elif request.method == 'DELETE':
+            marked = False
+        else:
+            marked = not HelpfulMark.objects.filter(user=request.user, rating=rating).exists()
+        helpful.set_helpful(request.user, rating, marked)
         
-        with transaction.atomic():
-            helpful_mark, created = HelpfulMark.objects.get_or_create(
-                user=request.user,
-                rating=rating
-            )
-            
-            if not created:
-                helpful_mark.delete()
-                # Use F() expression for atomic decrement
-                Rating.objects.filter(pk=rating.pk).update(helpful_count=F('helpful_count') - 1)
-                return Response({'message': '已取消标记', 'marked': False})
-            
-            # Use F() expression for atomic increment
-            Rating.objects.filter(pk=rating.pk).update(helpful_count=F('helpful_count') + 1)
-            return Response({'message': '已标记为有用', 'marked': True})
+        return Response({
+            'message': '已标记为有用' if marked else '已取消标记',
+            'marked': marked,
+            'helpful_count': helpful.helpful_count(rating),
+        })
+    
+    @action(detail=False, methods=['post'], url_path='helpful/bulk')
+    def bulk_helpful(self, request):
+        """批量标记/取消标记有用"""
+        serializer = HelpfulBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        # Later operations on the same rating win
+        operations = {}
+        for op in serializer.validated_data['operations']:
+            operations[op['rating_id']] = op['helpful']
+        
+        existing = set(Rating.objects.filter(pk__in=list(operations)).values_list('pk', flat=True))
+        errors = [
+            {'rating_id': rating_id, 'error': '评价不存在'}
+            for rating_id in operations if rating_id not in existing
+        ]
+        operations = {rating_id: marked for rating_id, marked in operations.items() if rating_id in existing}
+        changed = set(helpful.bulk_set(request.user, operations))
+        
+        return Response({
+            'results': [
+                {'rating_id': rating_id, 'helpful': marked, 'changed': rating_id in changed}
+                for rating_id, marked in operations.items()
+            ],
+            'errors': errors,
+        })
     
     @action(detail=False, methods=['get'])
     def my_ratings(self, request):
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import ResourceCategory, Resource, ResourceDownload, ResourceComment
+from . import moderation
 
 
 @admin.register(ResourceCategory)
@@ -19,6 +20,7 @@ class ResourceAdmin(admin.ModelAdmin):
     list_editable = ['is_approved']
     readonly_fields = ['file_size', 'download_count', 'created_at', 'updated_at']
     ordering = ['-created_at']
+    actions = ['approve_resources', 'unapprove_resources']
     
     fieldsets = (
         ('基本信息', {
@@ -35,6 +37,19 @@ class ResourceAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+    
+    def delete_queryset(self, request, queryset):
+        moderation.delete_resources(list(queryset.values_list('pk', flat=True)))
+    
+    @admin.action(description='审核通过所选资源')
+    def approve_resources(self, request, queryset):
+        updated = moderation.update_resources(list(queryset.values_list('pk', flat=True)), 'approve')
+        self.message_user(request, f'已审核通过 {updated} 个资源')
+    
+    @admin.action(description='取消审核所选资源')
+    def unapprove_resources(self, request, queryset):
+        updated = moderation.update_resources(list(queryset.values_list('pk', flat=True)), 'unapprove')
+        self.message_user(request, f'已取消审核 {updated} 个资源')
 
 
 @admin.register(ResourceDownload)
@@ -5,3 +5,6 @@ class ResourcesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'resources'
     verbose_name = '资源交流'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,20 @@
+# Generated by Django 4.2.27 on 2026-10-17 22:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0001_initial'),
+        ('resources', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resource',
+            name='catalog_course',
+            field=models.ForeignKey(blank=True, help_text='由相关课程自动解析', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='resources', to='courses.course', verbose_name='课程目录'),
+        ),
+    ]
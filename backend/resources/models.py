@@ -55,6 +55,15 @@ class Resource(models.Model):
         verbose_name="上传者"
     )
     course = models.CharField(max_length=100, blank=True, verbose_name="相关课程")
+    catalog_course = models.ForeignKey(
+        'courses.Course',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='resources',
+        verbose_name="课程目录",
+        help_text="由相关课程自动解析"
+    )
     year = models.IntegerField(null=True, blank=True, verbose_name="年份")
     semester = models.CharField(max_length=20, blank=True, verbose_name="学期")
     tags = models.CharField(max_length=200, blank=True, verbose_name="标签", 
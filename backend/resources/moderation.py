@@ -0,0 +1,37 @@
+"""
+资源批量管理
+
+审核状态按块直接 UPDATE；删除按块执行，每块由 Django 一次取出资源，
+下载记录和评论各用一条 DELETE 级联删除。
+"""
+from django.db import transaction
+
+from xuanwu_backend.bulk import bulk_update, chunked
+
+from .models import Resource
+
+RESOURCE_ACTIONS = {
+    'approve': {'is_approved': True},
+    'unapprove': {'is_approved': False},
+}
+
+
+def update_resources(resource_ids, action):
+    """批量审核/取消审核，返回更新的资源数"""
+    return bulk_update(Resource.objects.all(), resource_ids, **RESOURCE_ACTIONS[action])
+
+
+def delete_resources(resource_ids):
+    """删除资源及其下载记录和评论，返回 {'resources': n, 'downloads': n, 'comments': n}"""
+    deleted = {'resources': 0, 'downloads': 0, 'comments': 0}
+    labels = {
+        'resources.Resource': 'resources',
+        'resources.ResourceDownload': 'downloads',
+        'resources.ResourceComment': 'comments',
+    }
+    for chunk in chunked(resource_ids):
+        with transaction.atomic():
+            _, counts = Resource.objects.filter(pk__in=chunk).delete()
+        for label, count in counts.items():
+            deleted[labels[label]] += count
+    return deleted
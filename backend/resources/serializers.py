@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import ResourceCategory, Resource, ResourceDownload, ResourceComment
 from users.serializers import UserSerializer
+from xuanwu_backend.bulk import BulkActionSerializer
 
 User = get_user_model()
 
@@ -31,9 +32,9 @@ class ResourceListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Resource
         fields = ('id', 'title', 'description', 'category', 'category_name', 'uploader',
-                  'course', 'year', 'semester', 'tags', 'file_extension', 'file_size_mb',
+                  'course', 'catalog_course', 'year', 'semester', 'tags', 'file_extension', 'file_size_mb',
                   'download_count', 'average_rating', 'comment_count', 'created_at')
-        read_only_fields = ('id', 'uploader', 'download_count', 'created_at')
+        read_only_fields = ('id', 'uploader', 'catalog_course', 'download_count', 'created_at')
 
 
 class ResourceDetailSerializer(serializers.ModelSerializer):
@@ -49,10 +50,10 @@ class ResourceDetailSerializer(serializers.ModelSerializer):
     class Meta:
         model = Resource
         fields = ('id', 'title', 'description', 'file_url', 'category', 'category_name',
-                  'uploader', 'course', 'year', 'semester', 'tags', 'file_extension',
+                  'uploader', 'course', 'catalog_course', 'year', 'semester', 'tags', 'file_extension',
                   'file_size', 'file_size_mb', 'download_count', 'average_rating',
                   'comment_count', 'is_approved', 'created_at', 'updated_at')
-        read_only_fields = ('id', 'uploader', 'file_size', 'download_count', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'uploader', 'catalog_course', 'file_size', 'download_count', 'created_at', 'updated_at')
     
     def get_file_url(self, obj):
         request = self.context.get('request')
@@ -118,3 +119,12 @@ class ResourceDownloadSerializer(serializers.ModelSerializer):
         model = ResourceDownload
         fields = ('id', 'resource', 'resource_title', 'user', 'downloaded_at', 'ip_address')
         read_only_fields = ('id', 'user', 'downloaded_at', 'ip_address')
+
+
+class ResourceBulkActionSerializer(BulkActionSerializer):
+    """资源批量操作"""
+    ACTIONS = (
+        ('approve', '审核通过'),
+        ('unapprove', '取消审核'),
+        ('delete', '删除'),
+    )
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from courses import catalog
+
+from .models import Resource
+
+
+@receiver(post_save, sender=Resource)
+def link_resource_course(sender, instance, update_fields=None, **kwargs):
+    if update_fields and 'course' not in update_fields:
+        return
+    catalog.link_resources([instance])
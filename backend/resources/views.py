@@ -5,7 +5,9 @@ from rest_framework.exceptions import PermissionDenied
 from django.http import FileResponse, Http404
 from django.db.models import F, Q
 from django.db import transaction
+from courses import catalog
 from .models import ResourceCategory, Resource, ResourceDownload, ResourceComment
+from . import moderation
 from .serializers import (
     ResourceCategorySerializer,
     ResourceListSerializer,
@@ -13,8 +15,10 @@ from .serializers import (
     ResourceUploadSerializer,
     ResourceUpdateSerializer,
     ResourceCommentSerializer,
-    ResourceDownloadSerializer
+    ResourceDownloadSerializer,
+    ResourceBulkActionSerializer
 )
+from users import activity
 
 
 def get_client_ip(request):
@@ -71,10 +75,18 @@ class ResourceViewSet(viewsets.ModelViewSet):
         if uploader_id:
             queryset = queryset.filter(uploader_id=uploader_id)
         
-        # Filter by course
+        # Filter by course through the course catalog: prefix on name/alias, or exact id
         course = self.request.query_params.get('course')
         if course:
-            queryset = queryset.filter(course__icontains=course)
+            queryset = queryset.filter(catalog_course__in=catalog.search(course))
+        course_id = self.request.query_params.get('course_id')
+        if course_id:
+            queryset = queryset.filter(catalog_course_id=course_id)
+        
+        # Filter by the courses a teacher teaches
+        teacher_id = self.request.query_params.get('teacher')
+        if teacher_id:
+            queryset = queryset.filter(catalog_course__in=catalog.course_ids(teacher_id))
         
         # Filter by year
         year = self.request.query_params.get('year')
@@ -89,7 +101,9 @@ class ResourceViewSet(viewsets.ModelViewSet):
         return queryset
     
     def perform_create(self, serializer):
-        serializer.save(uploader=self.request.user)
+        with transaction.atomic():
+            resource = serializer.save(uploader=self.request.user)
+            activity.record(self.request.user, 'upload', resource, resource.title)
     
     def perform_update(self, serializer):
         # Only uploader or admin can update
@@ -104,6 +118,22 @@ class ResourceViewSet(viewsets.ModelViewSet):
             raise PermissionDenied('您没有权限删除此资源')
         instance.delete()
     
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def bulk(self, request):
+        """批量审核或删除资源（仅管理员，包括未审核的资源）"""
+        serializer = ResourceBulkActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        action_name = serializer.validated_data['action']
+        ids = serializer.validated_data['ids']
+        
+        summary = {'action': action_name, 'requested': len(ids)}
+        if action_name == 'delete':
+            summary['deleted'] = moderation.delete_resources(ids)
+            summary['affected'] = summary['deleted']['resources']
+        else:
+            summary['affected'] = moderation.update_resources(ids, action_name)
+        return Response(summary)
+    
     @action(detail=True, methods=['get'])
     def download(self, request, pk=None):
         """下载资源文件"""
@@ -122,6 +152,7 @@ class ResourceViewSet(viewsets.ModelViewSet):
                 )
                 # Increment download count atomically
                 Resource.objects.filter(pk=resource.pk).update(download_count=F('download_count') + 1)
+                activity.record(request.user, 'download', resource, resource.title)
         
         # Return file response
         try:
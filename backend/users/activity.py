@@ -0,0 +1,38 @@
+"""
+用户动态写入
+
+各写路径在对应事务内调用 record/record_many 追加动态；摘要在写入时截取，
+时间线读取时只扫描 (user, -created_at) 索引，不再回表查询帖子、评价等对象。
+"""
+from django.contrib.contenttypes.models import ContentType
+
+from .models import Activity
+
+SUMMARY_LENGTH = 200
+
+
+def summarize(text):
+    text = ' '.join((text or '').split())
+    return text[:SUMMARY_LENGTH]
+
+
+def build(user, verb, target, summary=''):
+    return Activity(
+        user=user,
+        verb=verb,
+        content_type=ContentType.objects.get_for_model(target),
+        object_id=target.pk,
+        summary=summarize(summary),
+    )
+
+
+def record(user, verb, target, summary=''):
+    """追加一条动态"""
+    activity = build(user, verb, target, summary)
+    activity.save()
+    return activity
+
+
+def record_many(user, verb, entries):
+    """批量追加同一动作的动态，entries 为 [(target, summary), ...]"""
+    return Activity.objects.bulk_create([build(user, verb, target, summary) for target, summary in entries])
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User
+from .models import User, Activity
 
 
 @admin.register(User)
@@ -21,3 +21,20 @@ class UserAdmin(BaseUserAdmin):
             'fields': ('real_name', 'student_id', 'identity_type', 'is_verified', 'avatar')
         }),
     )
+
+
+@admin.register(Activity)
+class ActivityAdmin(admin.ModelAdmin):
+    """Read-only admin for the append-only activity timeline"""
+    
+    list_display = ['user', 'verb', 'content_type', 'object_id', 'summary', 'created_at']
+    list_filter = ['verb', 'created_at']
+    search_fields = ['user__username', 'summary']
+    readonly_fields = ['user', 'verb', 'content_type', 'object_id', 'summary', 'created_at']
+    ordering = ['-created_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,75 @@
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from forum.models import Post, Comment, Like
+from ratings.models import Rating
+from resources.models import Resource, ResourceDownload
+from users.activity import summarize
+from users.models import Activity
+
+
+class Command(BaseCommand):
+    help = '按帖子、评论、点赞、评价、上传和下载记录重建用户动态（已删除对象的动态不会保留）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批写入的记录数')
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        with transaction.atomic():
+            Activity.objects.all().delete()
+            total = sum(self._write(verb, rows) for verb, rows in self._sources())
+        self.stdout.write(self.style.SUCCESS(f'已写入 {total} 条动态'))
+
+    def _sources(self):
+        """产出 (verb, 行迭代器)，行为 (user_id, content_type_id, object_id, summary, created_at)"""
+        post_type, comment_type, resource_type = (
+            ContentType.objects.get_for_model(model).id for model in (Post, Comment, Resource)
+        )
+        yield 'post', (
+            (user_id, post_type, pk, title, created_at)
+            for user_id, pk, title, created_at in Post.objects.values_list('author_id', 'id', 'title', 'created_at')
+        )
+        yield 'comment', (
+            (user_id, comment_type, pk, content, created_at)
+            for user_id, pk, content, created_at in Comment.objects.values_list('author_id', 'id', 'content', 'created_at')
+        )
+        for content_type, model, field in ((post_type, Post, 'title'), (comment_type, Comment, 'content')):
+            summary = Subquery(model.objects.filter(pk=OuterRef('object_id')).values(field)[:1])
+            likes = Like.objects.filter(content_type_id=content_type).annotate(summary=summary)
+            yield 'like', (
+                (user_id, content_type, object_id, text, created_at)
+                for user_id, object_id, text, created_at in likes.values_list('user_id', 'object_id', 'summary', 'created_at')
+            )
+        yield 'rating', (
+            (rating.user_id, rating.content_type_id, rating.object_id,
+             f'{rating.content_object} {rating.score}星', rating.created_at)
+            for rating in Rating.objects.prefetch_related('content_object').iterator(chunk_size=self.batch_size)
+        )
+        yield 'upload', (
+            (user_id, resource_type, pk, title, created_at)
+            for user_id, pk, title, created_at in Resource.objects.values_list('uploader_id', 'id', 'title', 'created_at')
+        )
+        yield 'download', (
+            (user_id, resource_type, pk, title, downloaded_at)
+            for user_id, pk, title, downloaded_at in ResourceDownload.objects.values_list(
+                'user_id', 'resource_id', 'resource__title', 'downloaded_at'
+            )
+        )
+
+    def _write(self, verb, rows):
+        batch = []
+        total = 0
+        for user_id, content_type_id, object_id, summary, created_at in rows:
+            batch.append(Activity(
+                user_id=user_id, verb=verb, content_type_id=content_type_id, object_id=object_id,
+                summary=summarize(summary), created_at=created_at
+            ))
+            if len(batch) >= self.batch_size:
+                Activity.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        Activity.objects.bulk_create(batch)
+        return total + len(batch)
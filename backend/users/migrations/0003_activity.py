@@ -0,0 +1,35 @@
+# Generated by Django 4.2.27 on 2026-10-17 22:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('users', '0002_alter_user_identity_type_alter_user_real_name_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Activity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('verb', models.CharField(choices=[('post', '发布帖子'), ('comment', '发表评论'), ('like', '点赞'), ('rating', '发表评价'), ('upload', '上传资源'), ('download', '下载资源')], max_length=20, verbose_name='动作')),
+                ('object_id', models.PositiveIntegerField()),
+                ('summary', models.CharField(blank=True, help_text='写入时的标题或内容摘要，对象删除后仍可展示', max_length=200, verbose_name='摘要')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='时间')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activities', to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '用户动态',
+                'verbose_name_plural': '用户动态',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['user', '-created_at'], name='users_activ_user_id_5d6877_idx')],
+            },
+        ),
+    ]
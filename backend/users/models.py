@@ -1,5 +1,9 @@
 from django.db import models
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -20,3 +24,41 @@ class User(AbstractUser):
     
     def __str__(self):
         return f"{self.username} ({self.real_name})"
+
+
+class Activity(models.Model):
+    """用户动态（只追加，发帖、评论、点赞、评价、上传、下载时写入）"""
+    
+    VERB_CHOICES = [
+        ('post', '发布帖子'),
+        ('comment', '发表评论'),
+        ('like', '点赞'),
+        ('rating', '发表评价'),
+        ('upload', '上传资源'),
+        ('download', '下载资源'),
+    ]
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='activities',
+        verbose_name="用户"
+    )
+    verb = models.CharField(max_length=20, choices=VERB_CHOICES, verbose_name="动作")
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    target = GenericForeignKey('content_type', 'object_id')
+    summary = models.CharField(max_length=200, blank=True, verbose_name="摘要",
+                               help_text="写入时的标题或内容摘要，对象删除后仍可展示")
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="时间")
+    
+    class Meta:
+        verbose_name = "用户动态"
+        verbose_name_plural = "用户动态"
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} {self.get_verb_display()}"
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.contrib.contenttypes.models import ContentType
+from .models import Activity
 
 User = get_user_model()
 
@@ -76,3 +78,19 @@ class ChangePasswordSerializer(serializers.Serializer):
         if not user.check_password(value):
             raise serializers.ValidationError("旧密码不正确")
         return value
+
+
+class ActivitySerializer(serializers.ModelSerializer):
+    """Serializer for user activity timeline entries"""
+    verb_display = serializers.CharField(source='get_verb_display', read_only=True)
+    target_type = serializers.SerializerMethodField()
+    target_id = serializers.IntegerField(source='object_id', read_only=True)
+    
+    class Meta:
+        model = Activity
+        fields = ('id', 'verb', 'verb_display', 'target_type', 'target_id', 'summary', 'created_at')
+        read_only_fields = fields
+    
+    def get_target_type(self, obj):
+        # get_for_id is served from the content type cache, no query per row
+        return ContentType.objects.get_for_id(obj.content_type_id).model
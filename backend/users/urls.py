@@ -5,6 +5,7 @@ from .views import (
     UserProfileView,
     ChangePasswordView,
     UserListView,
+    ActivityView,
 )
 
 app_name = 'users'
@@ -18,6 +19,7 @@ urlpatterns = [
     path('register/', UserRegistrationView.as_view(), name='register'),
     path('profile/', UserProfileView.as_view(), name='profile'),
     path('change-password/', ChangePasswordView.as_view(), name='change_password'),
+    path('activity/', ActivityView.as_view(), name='activity'),
     
     # User list (for testing)
     path('list/', UserListView.as_view(), name='user_list'),
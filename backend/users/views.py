@@ -1,4 +1,5 @@
 from rest_framework import generics, status, permissions
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.contrib.auth import get_user_model
@@ -6,8 +7,10 @@ from .serializers import (
     UserRegistrationSerializer, 
     UserSerializer, 
     UserProfileUpdateSerializer,
-    ChangePasswordSerializer
+    ChangePasswordSerializer,
+    ActivitySerializer
 )
+from .models import Activity
 
 User = get_user_model()
 
@@ -72,3 +75,25 @@ class UserListView(generics.ListAPIView):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+
+
+class ActivityPagination(CursorPagination):
+    """按时间倒序的游标分页，每页只读取 (user, -created_at) 索引上的一段"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+
+class ActivityView(generics.ListAPIView):
+    """当前用户的动态时间线接口"""
+    serializer_class = ActivitySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ActivityPagination
+    
+    def get_queryset(self):
+        queryset = Activity.objects.filter(user=self.request.user)
+        verb = self.request.query_params.get('verb')
+        if verb:
+            queryset = queryset.filter(verb=verb)
+        return queryset
@@ -0,0 +1,91 @@
+"""
+写回（write-behind）计数缓冲
+
+高频的计数类写入（浏览次数等）先在进程内存中累加，由后台线程按固定间隔
+合并成批量的 ``UPDATE ... SET field = field + n`` 语句写入数据库；进程退出时
+再刷写一次。多个进程各自缓冲、各自以增量方式写回，因此结果可以直接相加，
+不会互相覆盖。
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindCounter:
+    """按主键累加计数增量，定期批量写回 ``model.field``"""
+
+    def __init__(self, model, field, interval, on_write=None):
+        self.model = model
+        self.field = field
+        # interval <= 0 表示不缓冲，每次 add 直接写库
+        self.interval = interval
+        # 写回后以本批主键列表回调，用于刷新依赖该计数的派生数据
+        self.on_write = on_write
+        self._deltas = defaultdict(int)
+        self._lock = threading.Lock()
+        self._thread = None
+        atexit.register(self.flush)
+
+    def add(self, pk, n=1):
+        """
+        记录一次增量（可以为负），返回已直接写入数据库的部分
+
+        不缓冲时增量立即写库，返回 n；否则进入缓冲，返回 0，尚未写回的部分由
+        pending() 查询。调用方据此校正写入前读出的计数。
+        """
+        if self.interval <= 0:
+            self._write({pk: n})
+            return n
+        with self._lock:
+            self._deltas[pk] += n
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f'{self.model.__name__}.{self.field} flusher', daemon=True
+                )
+                self._thread.start()
+        return 0
+
+    def pending(self, pk):
+        """尚未写回数据库的增量"""
+        with self._lock:
+            return self._deltas.get(pk, 0)
+
+    def flush(self):
+        """立即写回所有缓冲的增量"""
+        with self._lock:
+            deltas, self._deltas = self._deltas, defaultdict(int)
+        if not deltas:
+            return
+        try:
+            self._write(deltas)
+        except Exception:
+            logger.exception('写回 %s.%s 计数失败，将在下次刷写时重试', self.model.__name__, self.field)
+            with self._lock:
+                for pk, n in deltas.items():
+                    self._deltas[pk] += n
+
+    def _write(self, deltas):
+        # 相同增量的行合并为一条 UPDATE
+        by_delta = defaultdict(list)
+        for pk, n in deltas.items():
+            if n:
+                by_delta[n].append(pk)
+        with transaction.atomic():
+            for n, pks in by_delta.items():
+                self.model.objects.filter(pk__in=pks).update(**{self.field: F(self.field) + n})
+            if self.on_write is not None and by_delta:
+                self.on_write([pk for pks in by_delta.values() for pk in pks])
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+            # 后台线程持有独立的数据库连接，每轮结束后释放
+            connection.close()
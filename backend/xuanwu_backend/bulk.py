@@ -0,0 +1,51 @@
+"""
+批量管理操作的公共部分
+
+管理员一次可以对成千上万个对象执行置顶、锁定、审核或删除。这类操作按主键分块，
+每块一条 ``UPDATE``/``DELETE`` 语句并在各自的事务中提交，避免逐个 save() 和
+长时间持有写锁；接口只返回汇总结果，不序列化每个对象。
+"""
+from itertools import islice
+
+from rest_framework import serializers
+
+# 每块的主键数（低于 SQLite 默认的 999 个绑定参数上限）
+CHUNK_SIZE = 500
+
+# 一次请求最多处理的对象数
+MAX_BULK_IDS = 10000
+
+
+def chunked(iterable, size=CHUNK_SIZE):
+    """把可迭代对象切成长度不超过 size 的列表"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def bulk_update(queryset, ids, **values):
+    """分块执行 ``queryset.filter(pk__in=...).update(**values)``，返回更新的行数"""
+    return sum(queryset.filter(pk__in=chunk).update(**values) for chunk in chunked(ids))
+
+
+class BulkActionSerializer(serializers.Serializer):
+    """批量操作请求：{"action": ..., "ids": [...]}，子类通过 ACTIONS 声明可用操作"""
+    ACTIONS = ()
+
+    action = serializers.ChoiceField(choices=())
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_IDS
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['action'].choices = self.ACTIONS
+
+    def validate_ids(self, value):
+        # Keep the first occurrence order while dropping duplicates
+        return list(dict.fromkeys(value))
@@ -43,6 +43,7 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'users',
     'forum',
+    'courses',
     'ratings',
     'resources',
 ]
@@ -148,6 +149,25 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
 }
 
+# Forum settings
+# 帖子浏览次数在内存中缓冲，每隔多少秒批量写回数据库（0 表示每次访问直接写库）
+FORUM_VIEW_COUNT_FLUSH_INTERVAL = config('FORUM_VIEW_COUNT_FLUSH_INTERVAL', default=10, cast=int)
+# 帖子实时事件的消息代理（需实现 publish/subscribe，多进程部署时替换为跨进程实现）
+FORUM_STREAM_BROKER = config('FORUM_STREAM_BROKER', default='forum.broker.InProcessBroker')
+# 帖子实时事件流的单个连接最长保持多少秒，到期后由客户端自动重连
+FORUM_STREAM_MAX_AGE = config('FORUM_STREAM_MAX_AGE', default=300, cast=int)
+# 生成帖子图片缩略图的后台线程数（0 表示在上传请求中同步生成）
+FORUM_IMAGE_WORKERS = config('FORUM_IMAGE_WORKERS', default=2, cast=int)
+# 帖子图片上传大小上限（字节）
+FORUM_IMAGE_MAX_UPLOAD_SIZE = config('FORUM_IMAGE_MAX_UPLOAD_SIZE', default=10 * 1024 * 1024, cast=int)
+# 最后活跃时间早于多少天的帖子由 archive_threads 命令归档
+FORUM_ARCHIVE_AFTER_DAYS = config('FORUM_ARCHIVE_AFTER_DAYS', default=365, cast=int)
+# 评价排行榜贝叶斯平均的先验平均分和先验权重（相当于每个对象预先有若干条该分数的评价）
+RATINGS_LEADERBOARD_PRIOR_MEAN = config('RATINGS_LEADERBOARD_PRIOR_MEAN', default=3.5, cast=float)
+RATINGS_LEADERBOARD_PRIOR_WEIGHT = config('RATINGS_LEADERBOARD_PRIOR_WEIGHT', default=5, cast=int)
+# 评价有用数在内存中缓冲，每隔多少秒把净增量批量写回数据库（0 表示每次标记直接写库）
+RATINGS_HELPFUL_FLUSH_INTERVAL = config('RATINGS_HELPFUL_FLUSH_INTERVAL', default=5, cast=int)
+
 # Simple JWT settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
@@ -0,0 +1,37 @@
+"""
+中英文混合分词
+
+中文没有空格分隔，这里采用二元切分（bigram）：连续的汉字按相邻两字切成词元，
+单个汉字单独成词；英文和数字按单词切分并转为小写。切分结果可以直接写入
+以空格分词的全文索引，也可以用来做词频统计。
+"""
+import re
+
+_CJK = '㐀-䶿一-鿿豈-﫿'
+_TOKEN_RE = re.compile(rf'(?P<cjk>[{_CJK}]+)|(?P<word>[^\W_{_CJK}]+)')
+
+
+def bigrams(run):
+    """把一段连续的汉字切成二元词元"""
+    if len(run) < 2:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def segments(text):
+    """
+    按原文顺序返回 (kind, raw, tokens) 片段
+
+    kind 为 ``'cjk'`` 时 raw 是一段连续汉字、tokens 是它的二元词元；为 ``'word'``
+    时 raw 是一个英文/数字单词，tokens 只含它的小写形式。
+    """
+    for match in _TOKEN_RE.finditer(text or ''):
+        if match.group('cjk'):
+            yield 'cjk', match.group('cjk'), bigrams(match.group('cjk'))
+        else:
+            yield 'word', match.group('word'), [match.group('word').lower()]
+
+
+def tokenize(text):
+    """切分为词元列表"""
+    return [token for _, _, tokens in segments(text) for token in tokens]
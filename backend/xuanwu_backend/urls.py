@@ -23,6 +23,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/users/', include('users.urls')),
     path('api/forum/', include('forum.urls')),
+    path('api/courses/', include('courses.urls')),
     path('api/ratings/', include('ratings.urls')),
     path('api/resources/', include('resources.urls')),
 ]